@@ -0,0 +1,94 @@
+"""
+Benchmark the fast_decode path of query_datasource against full pydantic validation.
+
+Builds a synthetic QueryOutput body and decodes it through query_datasource._parse_response with and
+without fast_decode, reporting the best wall time of several runs.
+
+Usage:
+    python benchmarks/bench_fast_decode.py [--rows 1000000] [--format OBJECTS|ARRAYS] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable
+
+import httpx
+import tableauserverclient as TSC
+
+# Add project root to sys.path
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, root_dir)
+
+from src.api import query_datasource  # noqa: E402
+from src.api.client import VizQLDataServiceClient  # noqa: E402
+
+
+def build_body(rows: int, return_format: str) -> bytes:
+    categories = ["Furniture", "Office Supplies", "Technology"]
+    data: list = []
+    for i in range(rows):
+        row = {
+            "Category": categories[i % 3],
+            "Order Date": f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+            "SUM(Sales)": i * 1.25,
+            "COUNT(Orders)": i,
+        }
+        data.append(list(row.values()) if return_format == "ARRAYS" else row)
+    return json.dumps({"data": data}).encode()
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["OBJECTS", "ARRAYS"], default="OBJECTS")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    server = TSC.Server("http://localhost")
+    server._auth_token = "benchmark-token"  # type: ignore
+    client = VizQLDataServiceClient(
+        "http://localhost", server, TSC.TableauAuth("user", "password")
+    )
+    body = build_body(args.rows, args.format)
+    response = httpx.Response(200, content=body)
+    print(f"{args.rows:,} rows, {args.format} format, {len(body) / 2**20:.1f} MiB body")
+
+    results = {
+        "validated": best_of(
+            args.repeat,
+            lambda: query_datasource._parse_response(client=client, response=response),
+        ),
+        "fast_decode": best_of(
+            args.repeat,
+            lambda: query_datasource._parse_response(
+                client=client, response=response, fast_decode=True
+            ),
+        ),
+    }
+    client.fast_decode_sample_rows = 1000
+    results["fast_decode, 1000 sampled rows"] = best_of(
+        args.repeat,
+        lambda: query_datasource._parse_response(
+            client=client, response=response, fast_decode=True
+        ),
+    )
+
+    baseline = results["validated"]
+    for name, seconds in results.items():
+        print(f"{name:>32}: {seconds:7.3f}s  ({baseline / seconds:4.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
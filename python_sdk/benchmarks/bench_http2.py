@@ -0,0 +1,222 @@
+"""
+Benchmark concurrent queries over HTTP/1.1 against HTTP/2 multiplexing.
+
+Starts a local stand-in server in another process, speaking HTTP/1.1 and cleartext HTTP/2, which answers every
+query after a fixed latency, and runs a batch of concurrent queries through query_datasource.batch_async with
+http2 off and on, reporting throughput and the number of connections the server accepted. Requires the h2
+package.
+
+The stand-in server does not use TLS, so the handshakes saved by HTTP/2 against a real server come on top of
+the connection counts reported here.
+
+Usage:
+    python benchmarks/bench_http2.py [--queries 2000] [--concurrency 64] [--latency-ms 20] [--repeat 3]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import h2.config
+import h2.connection
+import h2.events
+import h11
+import tableauserverclient as TSC
+
+# Add project root to sys.path
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, root_dir)
+
+from src.api import query_datasource  # noqa: E402
+from src.api.client import VizQLDataServiceClient  # noqa: E402
+from src.api.openapi_generated import (  # noqa: E402
+    Datasource,
+    DimensionField,
+    Field,
+    Query,
+    QueryRequest,
+)
+
+HTTP2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+BODY = json.dumps(
+    {"data": [{"Category": category, "SUM(Sales)": 1.25} for category in "ABCDEFGH"]}
+).encode()
+
+
+class StandInServer:
+    """A server answering every request with BODY after a fixed latency, over HTTP/1.1 or HTTP/2"""
+
+    def __init__(self, latency: float, connections):
+        self.latency = latency
+        self.connections = connections
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        with self.connections.get_lock():
+            self.connections.value += 1
+        try:
+            data = await reader.read(len(HTTP2_PREFACE))
+            while data and HTTP2_PREFACE.startswith(data) and data != HTTP2_PREFACE:
+                data += await reader.read(len(HTTP2_PREFACE) - len(data))
+            if data == HTTP2_PREFACE:
+                await self._serve_http2(reader, writer, data)
+            else:
+                await self._serve_http1(reader, writer, data)
+        except (ConnectionError, h11.ProtocolError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_http1(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, data: bytes
+    ) -> None:
+        connection = h11.Connection(h11.SERVER)
+        connection.receive_data(data)
+        while True:
+            event = connection.next_event()
+            if event is h11.NEED_DATA:
+                connection.receive_data(await reader.read(65536))
+            elif isinstance(event, h11.EndOfMessage):
+                await asyncio.sleep(self.latency)
+                headers = [
+                    ("content-type", "application/json"),
+                    ("content-length", str(len(BODY))),
+                ]
+                writer.write(
+                    connection.send(h11.Response(status_code=200, headers=headers))
+                )
+                writer.write(connection.send(h11.Data(data=BODY)))
+                writer.write(connection.send(h11.EndOfMessage()))
+                await writer.drain()
+                connection.start_next_cycle()
+            elif isinstance(event, h11.ConnectionClosed):
+                return
+
+    async def _serve_http2(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, data: bytes
+    ) -> None:
+        connection = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False)
+        )
+        connection.initiate_connection()
+        responses = set()
+
+        async def respond(stream_id: int) -> None:
+            await asyncio.sleep(self.latency)
+            connection.send_headers(
+                stream_id,
+                [
+                    (":status", "200"),
+                    ("content-type", "application/json"),
+                    ("content-length", str(len(BODY))),
+                ],
+            )
+            connection.send_data(stream_id, BODY, end_stream=True)
+            writer.write(connection.data_to_send())
+
+        while data:
+            for event in connection.receive_data(data):
+                if isinstance(event, h2.events.DataReceived):
+                    connection.acknowledge_received_data(
+                        event.flow_controlled_length, event.stream_id
+                    )
+                elif isinstance(event, h2.events.StreamEnded):
+                    response = asyncio.create_task(respond(event.stream_id))
+                    responses.add(response)
+                    response.add_done_callback(responses.discard)
+            writer.write(connection.data_to_send())
+            await writer.drain()
+            data = await reader.read(65536)
+
+
+def serve(latency: float, connections, ports) -> None:
+    """Run the stand-in server until the process is terminated, sending its port to the queue"""
+
+    async def main() -> None:
+        stand_in = StandInServer(latency, connections)
+        listener = await asyncio.start_server(stand_in.handle, "127.0.0.1", 0)
+        ports.put(listener.sockets[0].getsockname()[1])
+        async with listener:
+            await listener.serve_forever()
+
+    asyncio.run(main())
+
+
+def build_requests(queries: int) -> list[QueryRequest]:
+    return [
+        QueryRequest(
+            datasource=Datasource(datasourceLuid="benchmark-datasource"),
+            query=Query(fields=[Field(root=DimensionField(fieldCaption=f"Field {i}"))]),
+        )
+        for i in range(queries)
+    ]
+
+
+async def run(
+    url: str, http2: bool, requests: list[QueryRequest], concurrency: int
+) -> float:
+    server = TSC.Server(url)
+    server._auth_token = "benchmark-token"  # type: ignore
+    # The stand-in server has no TLS to negotiate HTTP/2 with, so HTTP/2 is used with prior knowledge
+    client = VizQLDataServiceClient(
+        url,
+        server,
+        TSC.TableauAuth("user", "password"),
+        http2=http2,
+        httpx_args={"http1": False} if http2 else {},
+    )
+    async with client.client:
+        start = time.perf_counter()
+        results = await query_datasource.batch_async(
+            client=client, requests=requests, max_concurrency=concurrency
+        )
+        elapsed = time.perf_counter() - start
+    failed = [result for result in results if result.error is not None]
+    if failed:
+        raise RuntimeError(f"{len(failed)} queries failed: {failed[0].error!r}")
+    return elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    connections = multiprocessing.Value("i", 0)
+    ports: multiprocessing.Queue = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=serve, args=(args.latency_ms / 1000, connections, ports), daemon=True
+    )
+    server.start()
+    url = f"http://127.0.0.1:{ports.get(timeout=10)}"
+    requests = build_requests(args.queries)
+    print(
+        f"{args.queries:,} queries, {args.concurrency} concurrent, {args.latency_ms:g} ms server latency"
+    )
+
+    try:
+        baseline = None
+        for name, http2 in [("HTTP/1.1", False), ("HTTP/2", True)]:
+            best = float("inf")
+            connections.value = 0
+            for _ in range(args.repeat):
+                best = min(best, await run(url, http2, requests, args.concurrency))
+            baseline = baseline or best
+            print(
+                f"{name:>9}: {args.queries / best:8.0f} queries/s  ({baseline / best:4.2f}x), "
+                f"{connections.value / args.repeat:.0f} connections per run"
+            )
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
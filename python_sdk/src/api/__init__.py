@@ -2,10 +2,12 @@ from .client import VizQLDataServiceClient
 from . import read_metadata
 from . import query_datasource
 from . import get_datasource_model
+from . import simple_request
 
 __all__ = [
     "VizQLDataServiceClient",
     "read_metadata",
     "query_datasource",
     "get_datasource_model",
+    "simple_request",
 ]
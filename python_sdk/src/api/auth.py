@@ -0,0 +1,284 @@
+"""
+Authentication Module
+
+This module keeps the Tableau session token of a client valid, by signing in again before the session expires or
+when the server rejects the token, without rebuilding the client or its connection pool.
+"""
+
+import asyncio
+import threading
+import time
+from collections.abc import AsyncGenerator, Generator
+from typing import TYPE_CHECKING, Any, Callable, Optional, Union
+
+import httpx
+import tableauserverclient as TSC
+from attrs import define
+
+from .errors import UnexpectedStatus
+
+if TYPE_CHECKING:
+    from .token_cache import TokenCache
+
+TableauAuth = Union[TSC.JWTAuth, TSC.PersonalAccessTokenAuth, TSC.TableauAuth]
+
+# The REST API version used to sign in, supported by every server version with VizQL Data Service
+DEFAULT_REST_API_VERSION = "3.24"
+
+
+class TokenProvider:
+    """Supply the session token of a Tableau server, signing in again when it is stale
+
+    The token is taken from the server when it is already signed in, otherwise the provider signs in on first
+    use. A token older than ``max_age`` seconds is replaced before it is used, and refresh() replaces a token that
+    the server rejected. Concurrent callers share a single sign-in.
+
+    A JWT can usually be used to sign in only once, so for JWT authentication ``auth`` should be a function
+    returning new credentials for each sign-in.
+
+    Args:
+        server: The Tableau server to sign in to.
+        auth: The credentials to sign in with, or a function returning them for each sign-in.
+        max_age: The number of seconds after which a token is replaced before it is used, or None to only
+            replace tokens rejected by the server. It should be shorter than the session timeout of the server.
+        token_cache: The cache of session tokens shared with other clients and processes, used to reuse a
+            session instead of signing in, or None to always sign in.
+        clock: The monotonic clock used to age tokens, in seconds.
+    """
+
+    def __init__(
+        self,
+        server: TSC.Server,
+        auth: Union[TableauAuth, Callable[[], TableauAuth]],
+        *,
+        max_age: Optional[float] = None,
+        token_cache: Optional["TokenCache"] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.server = server
+        self.auth = auth
+        self.max_age = max_age
+        self.token_cache = token_cache
+        self.clock = clock
+        self._token: Optional[str] = (
+            server.auth_token if server.is_signed_in() else None
+        )
+        self._signed_in_at = clock()
+        self._lock = threading.Lock()
+
+    @property
+    def expired(self) -> bool:
+        """Whether the token must be replaced before it is used"""
+        if self._token is None:
+            return True
+        return (
+            self.max_age is not None
+            and self.clock() - self._signed_in_at >= self.max_age
+        )
+
+    def get_token(self) -> str:
+        """Return the current token, signing in first if it has expired"""
+        token = self._token
+        if token is not None and not self.expired:
+            return token
+        return self.refresh(token)
+
+    def refresh(self, rejected: Optional[str]) -> str:
+        """Sign in again, unless the token was already replaced since the rejected one was used
+
+        Args:
+            rejected: The token that expired or that the server rejected.
+
+        Returns:
+            str: The new token.
+        """
+        with self._lock:
+            if self._token is not None and self._token != rejected:
+                return self._token
+            self._token = self.sign_in(rejected)
+            self._signed_in_at = self.clock()
+            return self._token
+
+    def sign_in(self, rejected: Optional[str] = None) -> str:
+        """Sign in to the server and return the session token
+
+        Args:
+            rejected: The token being replaced, which is removed from the token cache so that it is not reused.
+        """
+        auth = self.auth() if callable(self.auth) else self.auth
+        if self.token_cache is None:
+            self.server.auth.sign_in(auth)
+            return self.server.auth_token
+        if rejected is not None:
+            self.token_cache.invalidate(self.server, auth, rejected)
+        return self.token_cache.sign_in(self.server, auth)
+
+
+class TokenAuth(httpx.Auth):
+    """An httpx authentication scheme sending the token of a TokenProvider and replaying requests rejected with 401
+
+    The token is set on each request, so a new token is used by the next request on the same pooled connections.
+    A request rejected with a 401 status is sent once more with a new token.
+
+    Args:
+        provider: The provider of the session token.
+        header_name: The name of the header carrying the token.
+    """
+
+    def __init__(self, provider: TokenProvider, header_name: str):
+        self.provider = provider
+        self.header_name = header_name
+
+    def sync_auth_flow(
+        self, request: httpx.Request
+    ) -> Generator[httpx.Request, httpx.Response, None]:
+        token = self.provider.get_token()
+        request.headers[self.header_name] = token
+        response = yield request
+        if response.status_code == 401:
+            request.headers[self.header_name] = self.provider.refresh(token)
+            yield request
+
+    async def async_auth_flow(
+        self, request: httpx.Request
+    ) -> AsyncGenerator[httpx.Request, httpx.Response]:
+        # Signing in is blocking, so it runs on a worker thread instead of the event loop
+        if self.provider.expired:
+            token = await asyncio.to_thread(self.provider.get_token)
+        else:
+            token = self.provider.get_token()
+        request.headers[self.header_name] = token
+        response = yield request
+        if response.status_code == 401:
+            request.headers[self.header_name] = await asyncio.to_thread(
+                self.provider.refresh, token
+            )
+            yield request
+
+
+@define
+class Session:
+    """A session signed in to with the REST API
+
+    Attributes:
+        token: The session token.
+        site_id: The LUID of the site signed in to.
+        site_url: The content URL of the site signed in to.
+        user_id: The LUID of the signed in user.
+    """
+
+    token: str
+    site_id: str
+    site_url: str
+    user_id: str
+
+
+def restore_session(
+    server: TSC.Server,
+    site_id: str,
+    user_id: str,
+    token: str,
+    site_url: Optional[str] = None,
+) -> None:
+    """Set a session on a TSC.Server as its own sign-in would, so that its REST API methods can be used
+
+    TSC has no public way to set a session signed in to elsewhere, so this is the one place that sets it
+    through the private TSC.Server._set_auth.
+
+    Args:
+        server: The server to set the session on.
+        site_id: The LUID of the site signed in to.
+        user_id: The LUID of the signed in user.
+        token: The session token.
+        site_url: The content URL of the site signed in to, used by TSC to build site-relative URLs.
+    """
+    server._set_auth(site_id, user_id, token, site_url)
+
+
+def _sign_in_body(auth: TableauAuth) -> dict[str, Any]:
+    credentials: dict[str, Any] = {"site": {"contentUrl": auth.site_id or ""}}
+    if isinstance(auth, TSC.JWTAuth):
+        credentials["jwt"] = auth.jwt
+        if auth.isUat:
+            credentials["isUat"] = True
+    else:
+        # Password and personal access token credentials are sent as the TSC classes name them
+        credentials.update(auth.credentials)
+    if auth.user_id_to_impersonate:
+        credentials["user"] = {"id": auth.user_id_to_impersonate}
+    return {"credentials": credentials}
+
+
+async def sign_in_async(
+    client: httpx.AsyncClient,
+    server_url: str,
+    auth: TableauAuth,
+    *,
+    api_version: str = DEFAULT_REST_API_VERSION,
+) -> Session:
+    """Sign in to a Tableau server with the REST API without blocking the event loop
+
+    Args:
+        client: The client to send the request with.
+        server_url: The URL of the server, such as https://tableau.example.com.
+        auth: The password, personal access token or JWT credentials to sign in with.
+        api_version: The version of the REST API to use.
+
+    Raises:
+        errors.UnexpectedStatus: If the server rejects the credentials or does not sign in.
+        httpx.TimeoutException: If the request takes longer than the timeout of the client.
+
+    Returns:
+        Session: The new session.
+    """
+    response = await client.post(
+        f"{server_url.rstrip('/')}/api/{api_version}/auth/signin",
+        json=_sign_in_body(auth),
+        headers={"Accept": "application/json"},
+    )
+    if response.status_code != 200:
+        raise UnexpectedStatus(response.status_code, response.content)
+    credentials = response.json()["credentials"]
+    return Session(
+        token=credentials["token"],
+        site_id=credentials["site"]["id"],
+        site_url=credentials["site"].get("contentUrl", ""),
+        user_id=credentials["user"]["id"],
+    )
+
+
+async def sign_out_async(
+    client: httpx.AsyncClient,
+    server_url: str,
+    token: str,
+    *,
+    api_version: str = DEFAULT_REST_API_VERSION,
+) -> None:
+    """Sign out of a session with the REST API without blocking the event loop
+
+    Args:
+        client: The client to send the request with.
+        server_url: The URL of the server, such as https://tableau.example.com.
+        token: The token of the session.
+        api_version: The version of the REST API to use.
+
+    Raises:
+        errors.UnexpectedStatus: If the server does not sign out.
+    """
+    response = await client.post(
+        f"{server_url.rstrip('/')}/api/{api_version}/auth/signout",
+        headers={"X-Tableau-Auth": token},
+    )
+    if response.status_code not in (200, 204):
+        raise UnexpectedStatus(response.status_code, response.content)
+
+
+__all__ = [
+    "DEFAULT_REST_API_VERSION",
+    "Session",
+    "TokenAuth",
+    "restore_session",
+    "TokenProvider",
+    "sign_in_async",
+    "sign_out_async",
+]
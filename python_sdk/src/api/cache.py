@@ -0,0 +1,413 @@
+"""
+Cache Module
+
+This module provides the caches used by the client to avoid repeating work across calls.
+"""
+
+import hashlib
+import json
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import TYPE_CHECKING, Callable, Generic, Optional, TypeVar
+
+import httpx
+import tableauserverclient as TSC
+from attrs import define
+from pydantic import BaseModel
+
+from .auth import TableauAuth
+from .fingerprint import fingerprint
+from .openapi_generated import QueryRequest
+from .token_cache import TokenCache
+
+if TYPE_CHECKING:
+    from .disk_cache import DiskResultCache
+
+T = TypeVar("T")
+
+
+class EncodedBodyCache:
+    """A size-bounded LRU cache of encoded request bodies
+
+    Bodies are keyed by the identity of the request model, so sending the same request object again reuses
+    its encoded JSON instead of serialising it again. Entries do not keep their request alive, and the least
+    recently used entries are evicted once the encoded bodies exceed ``max_bytes``.
+
+    A request object must not be modified after it has been sent while the cache is in use, as the cached
+    body would no longer match it.
+
+    Args:
+        max_bytes: The maximum total size of the cached bodies.
+    """
+
+    def __init__(self, max_bytes: int):
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[int, tuple[weakref.ref, bytes]] = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """The total size of the cached bodies"""
+        return self._nbytes
+
+    def get(self, body: BaseModel) -> Optional[bytes]:
+        """Return the cached encoding of a request, or None if it is not cached"""
+        with self._lock:
+            entry = self._entries.get(id(body))
+            if entry is None or entry[0]() is not body:
+                return None
+            self._entries.move_to_end(id(body))
+            return entry[1]
+
+    def put(self, body: BaseModel, encoded: bytes) -> None:
+        """Cache the encoding of a request, evicting the least recently used entries as needed"""
+        if len(encoded) > self.max_bytes:
+            return
+        try:
+            ref = weakref.ref(body)
+        except TypeError:
+            return
+        with self._lock:
+            previous = self._entries.pop(id(body), None)
+            if previous is not None:
+                self._nbytes -= len(previous[1])
+            self._entries[id(body)] = (ref, encoded)
+            self._nbytes += len(encoded)
+            while self._nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._nbytes -= len(evicted)
+
+    def encode(self, body: BaseModel) -> bytes:
+        """Return the JSON encoding of a request, from the cache when possible"""
+        encoded = self.get(body)
+        if encoded is None:
+            encoded = encode_body(body)
+            self.put(body, encoded)
+        return encoded
+
+    def clear(self) -> None:
+        """Remove all cached bodies"""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+
+@define
+class CacheEntry(Generic[T]):
+    """A value found in a cache
+
+    Attributes:
+        value: The cached value.
+        stale: Whether the value has outlived its TTL and is only served while it is refreshed.
+    """
+
+    value: T
+    stale: bool = False
+
+
+@define
+class _Entry(Generic[T]):
+    value: T
+    size: int
+    expires_at: float
+    stale_until: float
+    tag: Optional[Hashable]
+
+
+class TTLCache(Generic[T]):
+    """An in-memory cache with per-entry TTL, LRU eviction and stale-while-revalidate
+
+    An entry is fresh for ``ttl`` seconds after it is stored. For ``stale_ttl`` seconds after that it is still
+    returned, marked as stale, so that the caller can serve it while refreshing it in the background. The least
+    recently used entries are evicted once the cache holds more than ``max_entries`` entries or ``max_bytes``
+    bytes, as reported by the size given to set().
+
+    Args:
+        ttl: The number of seconds an entry is fresh for.
+        stale_ttl: The number of seconds a stale entry is still returned for after its TTL.
+        max_entries: The maximum number of entries, or None for no limit.
+        max_bytes: The maximum total size of the entries, or None for no limit.
+        clock: The monotonic clock used to expire entries, in seconds.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        *,
+        stale_ttl: float = 0.0,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if ttl < 0 or stale_ttl < 0:
+            raise ValueError("ttl and stale_ttl must not be negative")
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._entries: OrderedDict[Hashable, _Entry[T]] = OrderedDict()
+        self._refreshing: set[Hashable] = set()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """The total size of the entries"""
+        return self._nbytes
+
+    def get(self, key: Hashable) -> Optional[CacheEntry[T]]:
+        """Return the entry for a key, or None if there is none or it has expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            now = self.clock()
+            if now >= entry.stale_until:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return CacheEntry(entry.value, stale=now >= entry.expires_at)
+
+    def set(
+        self,
+        key: Hashable,
+        value: T,
+        *,
+        size: int = 0,
+        ttl: Optional[float] = None,
+        tag: Optional[Hashable] = None,
+    ) -> None:
+        """Store a value, evicting the least recently used entries as needed
+
+        Args:
+            key: The key of the value.
+            value: The value to store.
+            size: The size of the value, counted against max_bytes.
+            ttl: The number of seconds the value is fresh for, instead of the cache's TTL.
+            tag: A label shared by entries that can be invalidated together with invalidate_tag().
+        """
+        expires_at = self.clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._refreshing.discard(key)
+            self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = _Entry(
+                value, size, expires_at, expires_at + self.stale_ttl, tag
+            )
+            self._nbytes += size
+            while (
+                self.max_entries is not None and len(self._entries) > self.max_entries
+            ) or (self.max_bytes is not None and self._nbytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Remove the entry for a key, returning whether there was one"""
+        with self._lock:
+            return self._remove(key)
+
+    def invalidate_tag(self, tag: Hashable) -> int:
+        """Remove the entries stored with a tag, returning how many there were"""
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry.tag == tag]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove the entries whose key matches a predicate, returning how many there were"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def start_refresh(self, key: Hashable) -> bool:
+        """Mark a key as being refreshed, returning False if it already is"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def finish_refresh(self, key: Hashable) -> None:
+        """Mark a key as no longer being refreshed, whether or not a new value was stored"""
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def _remove(self, key: Hashable) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._nbytes -= entry.size
+        return True
+
+
+class ResultCache:
+    """A size-bounded in-memory cache of query results
+
+    Successful query_datasource responses are kept as received, keyed by the fingerprint of the request, which
+    covers the canonical query and the data source, and by the namespace of the server, site and user, see
+    result_namespace(). Row-level security can give users different rows for the same query, so results are
+    never shared between users, even through a disk cache shared by processes. Each use of a cached result parses it again, so callers never
+    share parsed rows. The least recently used results are evicted once their bodies exceed ``max_bytes``.
+
+    Args:
+        max_bytes: The maximum total size of the cached response bodies.
+        ttl: The number of seconds a result is reused for.
+        datasource_ttls: The number of seconds results are reused for, by data source LUID, instead of ``ttl``.
+            A TTL of 0 disables caching for a data source.
+        disk_cache: A second tier shared with other processes, such as a DiskResultCache. Results missing from
+            memory are looked up there, and every result is written to both.
+        clock: The monotonic clock used to expire results, in seconds.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        *,
+        ttl: float = 60.0,
+        datasource_ttls: Optional[dict[str, float]] = None,
+        disk_cache: Optional["DiskResultCache"] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.datasource_ttls = dict(datasource_ttls or {})
+        self.disk_cache = disk_cache
+        self._cache: TTLCache[httpx.Response] = TTLCache(
+            ttl, max_bytes=max_bytes, clock=clock
+        )
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def ttl(self) -> float:
+        """The number of seconds a result is reused for, unless its data source has its own TTL"""
+        return self._cache.ttl
+
+    @property
+    def nbytes(self) -> int:
+        """The total size of the cached response bodies"""
+        return self._cache.nbytes
+
+    def ttl_for(self, datasource_luid: str) -> float:
+        """Return the number of seconds results of a data source are reused for"""
+        return self.datasource_ttls.get(datasource_luid, self.ttl)
+
+    def get(self, key: str, datasource_luid: str) -> Optional[httpx.Response]:
+        """Return the cached response for a request fingerprint of a data source, or None"""
+        entry = self._cache.get(key)
+        if entry is not None:
+            return entry.value
+        if self.disk_cache is None:
+            return None
+        stored = self.disk_cache.get(key)
+        if stored is None:
+            return None
+        response, ttl = stored
+        self._set_memory(key, datasource_luid, response, ttl)
+        return response
+
+    def set(self, key: str, datasource_luid: str, response: httpx.Response) -> None:
+        """Cache the response to a request of a data source, if its TTL is not 0"""
+        ttl = self.ttl_for(datasource_luid)
+        if ttl > 0:
+            self._set_memory(key, datasource_luid, response, ttl)
+            if self.disk_cache is not None:
+                self.disk_cache.set(key, datasource_luid, response, ttl)
+
+    def _set_memory(
+        self, key: str, datasource_luid: str, response: httpx.Response, ttl: float
+    ) -> None:
+        self._cache.set(
+            key, response, size=len(response.content), ttl=ttl, tag=datasource_luid
+        )
+
+    @staticmethod
+    def key(body: QueryRequest, namespace: str) -> str:
+        """Return the key of the result of a request in a namespace, see result_namespace()"""
+        return f"{fingerprint(body)}:{namespace}"
+
+    def invalidate(self, body: QueryRequest) -> bool:
+        """Remove the cached results of a request for every user, returning whether there were any"""
+        prefix = f"{fingerprint(body)}:"
+        removed = (
+            self._cache.invalidate_where(lambda key: str(key).startswith(prefix)) > 0
+        )
+        if self.disk_cache is not None:
+            removed = self.disk_cache.invalidate_prefix(prefix) > 0 or removed
+        return removed
+
+    def invalidate_datasource(self, datasource_luid: str) -> int:
+        """Remove the cached results of a data source, returning how many there were in memory"""
+        if self.disk_cache is not None:
+            self.disk_cache.invalidate_datasource(datasource_luid)
+        return self._cache.invalidate_tag(datasource_luid)
+
+    def clear(self) -> None:
+        """Remove all cached results"""
+        self._cache.clear()
+        if self.disk_cache is not None:
+            self.disk_cache.clear()
+
+
+def result_namespace(server: TSC.Server, auth: TableauAuth) -> str:
+    """Return the namespace of the results cached for the server, site and user of a client
+
+    The user is the LUID of the signed in user. Before signing in, it is identified by the credentials, including a
+    hash of their secret, as for a TokenCache.
+
+    Args:
+        server: The server of the client.
+        auth: The credentials of the client.
+    """
+    try:
+        user = server.user_id
+    except TSC.NotSignedInError:
+        user = TokenCache.cache_key(server, auth)
+    identity = json.dumps([server.server_address, auth.site_id or "", user])
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def encode_body(body: BaseModel, cache: Optional[EncodedBodyCache] = None) -> bytes:
+    """Encode a request model as the JSON body sent to the server
+
+    Args:
+        body: The request model.
+        cache: The cache to read the encoding from and store it in, if any.
+
+    Returns:
+        bytes: The UTF-8 JSON encoding of the request, without unset optional members.
+    """
+    if cache is not None:
+        return cache.encode(body)
+    return body.model_dump_json(exclude_none=True).encode()
+
+
+__all__ = [
+    "CacheEntry",
+    "EncodedBodyCache",
+    "ResultCache",
+    "TTLCache",
+    "encode_body",
+    "result_namespace",
+]
@@ -0,0 +1,260 @@
+"""
+Circuit Breaker Module
+
+This module provides httpx transports that stop sending requests to a server and site after consecutive failures,
+failing fast for a cooldown instead of waiting on timeouts, and probe the server before sending requests again.
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+import httpx
+
+from .errors import CircuitOpenError
+
+# Failures showing that the server is unavailable rather than that a request is wrong
+FAILURE_ERRORS = (httpx.TimeoutException, httpx.NetworkError)
+FAILURE_STATUSES = frozenset({502, 503, 504})
+
+
+def _is_failure(error: BaseException) -> bool:
+    """Whether an error shows that the server is unavailable
+
+    A PoolTimeout is a timeout waiting for a connection of the local pool, so a busy client does not open the
+    breaker of a healthy server.
+    """
+    return isinstance(error, FAILURE_ERRORS) and not isinstance(
+        error, httpx.PoolTimeout
+    )
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """The circuit breaker of a server and site, shared by every request sent to them
+
+    The breaker is closed while requests succeed. After ``failure_threshold`` consecutive failures it opens, and
+    requests raise errors.CircuitOpenError without being sent. Once ``cooldown`` seconds have passed, it is half
+    open: the next request is a probe, while the others keep failing fast. A successful probe closes the breaker,
+    and a failed probe opens it for another cooldown.
+
+    Args:
+        key: The server and site the breaker protects, used in error messages.
+        failure_threshold: The number of consecutive failures opening the breaker.
+        cooldown: The number of seconds the breaker stays open before probing.
+        clock: The monotonic clock used to time the cooldown, in seconds.
+    """
+
+    def __init__(
+        self,
+        key: str = "",
+        *,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """The state of the breaker: "closed", "open" or "half_open" while a probe is in flight"""
+        return self._state
+
+    def acquire(self) -> bool:
+        """Allow a request, returning whether it is the probe of a half-open breaker
+
+        Raises:
+            errors.CircuitOpenError: If the breaker is open, or half open with a probe in flight.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return False
+            retry_after = self._opened_at + self.cooldown - self.clock()
+            if self._state == OPEN and retry_after <= 0:
+                self._state = HALF_OPEN
+                return True
+            raise CircuitOpenError(self.key, max(0.0, retry_after))
+
+    def record_success(self) -> None:
+        """Record a request that reached a healthy server, closing the breaker"""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the breaker after enough consecutive failures or a failed probe"""
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = self.clock()
+
+    def abandon_probe(self) -> None:
+        """Let the next request probe again, after a probe that ended without an outcome, such as when cancelled"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._state = OPEN
+
+
+class CircuitBreakerRegistry:
+    """The circuit breakers of each server and site, shared by the clients created with the registry
+
+    Args:
+        failure_threshold: The number of consecutive failures opening a breaker.
+        cooldown: The number of seconds a breaker stays open before probing.
+        clock: The monotonic clock used to time cooldowns, in seconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, base_url: str, site: str) -> CircuitBreaker:
+        """Return the breaker of a server and site, creating it on first use
+
+        Args:
+            base_url: The base URL of the VizQL Data Service API of the server.
+            site: The content URL of the site, or "" for the default site.
+        """
+        key = f"{base_url.rstrip('/')} (site {site!r})"
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(
+                    key,
+                    failure_threshold=self.failure_threshold,
+                    cooldown=self.cooldown,
+                    clock=self.clock,
+                )
+            return breaker
+
+
+class CircuitBreakerTransport(httpx.BaseTransport):
+    """A transport sending requests through another transport while the circuit breaker allows it
+
+    Args:
+        transport: The transport sending each request.
+        breaker: The breaker of the server and site of the requests.
+        probe_url: The URL of a health check, such as the simple-request endpoint, sent to probe a half-open
+            breaker before the request. None makes the request itself the probe.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport,
+        breaker: CircuitBreaker,
+        probe_url: Optional[str] = None,
+    ):
+        self.transport = transport
+        self.breaker = breaker
+        self.probe_url = probe_url
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        probe = self.breaker.acquire()
+        try:
+            if probe and self.probe_url is not None:
+                health = self.transport.handle_request(
+                    httpx.Request("GET", self.probe_url)
+                )
+                health.close()
+                if health.status_code != 200:
+                    self.breaker.record_failure()
+                    raise CircuitOpenError(self.breaker.key, self.breaker.cooldown)
+                self.breaker.record_success()
+            response = self.transport.handle_request(request)
+        except BaseException as error:
+            if _is_failure(error):
+                self.breaker.record_failure()
+            elif probe:
+                # Only the probe may reset a half-open breaker, as other requests end while the probe is in flight
+                self.breaker.abandon_probe()
+            raise
+        if response.status_code in FAILURE_STATUSES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncCircuitBreakerTransport(httpx.AsyncBaseTransport):
+    """An async transport sending requests through another transport while the circuit breaker allows it
+
+    Args:
+        transport: The transport sending each request.
+        breaker: The breaker of the server and site of the requests.
+        probe_url: The URL of a health check, such as the simple-request endpoint, sent to probe a half-open
+            breaker before the request. None makes the request itself the probe.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        breaker: CircuitBreaker,
+        probe_url: Optional[str] = None,
+    ):
+        self.transport = transport
+        self.breaker = breaker
+        self.probe_url = probe_url
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        probe = self.breaker.acquire()
+        try:
+            if probe and self.probe_url is not None:
+                health = await self.transport.handle_async_request(
+                    httpx.Request("GET", self.probe_url)
+                )
+                await health.aclose()
+                if health.status_code != 200:
+                    self.breaker.record_failure()
+                    raise CircuitOpenError(self.breaker.key, self.breaker.cooldown)
+                self.breaker.record_success()
+            response = await self.transport.handle_async_request(request)
+        except BaseException as error:
+            if _is_failure(error):
+                self.breaker.record_failure()
+            elif probe:
+                # Only the probe may reset a half-open breaker, as other requests end while the probe is in flight
+                self.breaker.abandon_probe()
+            raise
+        if response.status_code in FAILURE_STATUSES:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+__all__ = [
+    "AsyncCircuitBreakerTransport",
+    "CircuitBreaker",
+    "CircuitBreakerRegistry",
+    "CircuitBreakerTransport",
+    "FAILURE_STATUSES",
+]
@@ -1,4 +1,7 @@
+import asyncio
 import ssl
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from importlib.metadata import version
 from typing import Any, Optional, Union
 
@@ -6,10 +9,41 @@ import httpx
 import tableauserverclient as TSC
 from attrs import define, evolve, field
 
+from .auth import (
+    DEFAULT_REST_API_VERSION,
+    TableauAuth,
+    TokenAuth,
+    TokenProvider,
+    restore_session,
+    sign_in_async,
+)
+from .cache import EncodedBodyCache, ResultCache, TTLCache
+from .circuit_breaker import (
+    AsyncCircuitBreakerTransport,
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitBreakerTransport,
+)
+from .coalesce import SingleFlight
+from .hedging import HedgingPolicy
+from .limiter import AdaptiveLimiter, AsyncLimitTransport
+from .load_balancer import (
+    AsyncLoadBalancingTransport,
+    LoadBalancer,
+    LoadBalancingPolicy,
+    LoadBalancingTransport,
+)
+from .retry import AsyncRetryTransport, RetryPolicy, RetryTransport
+from .token_cache import TokenCache
 from .utils import format_server_url
 
 API_SUBDOMAIN = "/api/v1/vizql-data-service"
 X_TABLEAU_AUTH = "X-Tableau-Auth"
+HEALTH_CHECK_PATH = "/simple-request"
+# The connection pool limits of httpx clients
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=5.0
+)
 VERSION = version("vizql-data-service-py")  # Read version from package metadata
 
 
@@ -35,6 +69,31 @@ class AuthenticatedClient:
 
         ``httpx_args``: A dictionary of additional arguments to be passed to the ``httpx.Client`` and ``httpx.AsyncClient`` constructor.
 
+        ``retry_policy``: The policy used to retry requests that fail with transient errors, or None to send each
+        request once. Retries happen in the transport of the httpx Clients, so every endpoint function uses them.
+
+        ``http2``: Whether to use HTTP/2 when the server supports it, so that concurrent requests share a few
+        multiplexed connections instead of opening one connection per request in flight. Requires the ``h2``
+        package, installed with the ``http2`` extra. It has no effect on a transport passed in ``httpx_args``.
+
+        ``concurrency_limiter``: The AdaptiveLimiter limiting the requests of the httpx.AsyncClient in flight, or
+        None for no limit beyond the connection pool. Each attempt of a retried request is limited separately.
+
+        ``load_balancer``: The LoadBalancer spreading requests over several nodes, whose base URLs replace
+        ``base_url`` in the URL of each request, or None to send every request to ``base_url``. Each attempt of
+        a retried request is balanced separately, so a retry can go to another node.
+
+        ``circuit_breaker``: The CircuitBreaker of the server and site, failing requests fast after consecutive
+        failures, or None to always send requests. A half-open breaker probes the server with the simple-request
+        endpoint. Retries happen inside the breaker, so a request failing after its retries counts once.
+
+        ``limits``: The limits of the connection pools of the httpx Clients, replacing any ``limits`` in
+        ``httpx_args``, or None for the default limits. They have no effect on a transport passed in
+        ``httpx_args``.
+
+        ``auth``: An httpx authentication scheme applied to every request, such as a TokenAuth that replaces the
+        token when it expires.
+
 
     Attributes:
         raise_on_unexpected_status: Whether or not to raise an errors.UnexpectedStatus if the API returns a
@@ -59,6 +118,21 @@ class AuthenticatedClient:
         default=False, kw_only=True, alias="follow_redirects"
     )
     _httpx_args: dict[str, Any] = field(factory=dict, kw_only=True, alias="httpx_args")
+    _retry_policy: Optional[RetryPolicy] = field(
+        default=None, kw_only=True, alias="retry_policy"
+    )
+    _http2: bool = field(default=False, kw_only=True, alias="http2")
+    _concurrency_limiter: Optional[AdaptiveLimiter] = field(
+        default=None, kw_only=True, alias="concurrency_limiter"
+    )
+    _load_balancer: Optional[LoadBalancer] = field(
+        default=None, kw_only=True, alias="load_balancer"
+    )
+    _circuit_breaker: Optional[CircuitBreaker] = field(
+        default=None, kw_only=True, alias="circuit_breaker"
+    )
+    _limits: Optional[httpx.Limits] = field(default=None, kw_only=True, alias="limits")
+    _auth: Optional[httpx.Auth] = field(default=None, kw_only=True, alias="auth")
     _client: Optional[httpx.Client] = field(default=None, init=False)
     _async_client: Optional[httpx.AsyncClient] = field(default=None, init=False)
 
@@ -66,6 +140,17 @@ class AuthenticatedClient:
     prefix: str = "Bearer"
     auth_header_name: str = "Authorization"
 
+    @_http2.validator
+    def _check_http2(self, attribute: Any, value: bool) -> None:
+        if not value:
+            return
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "http2=True requires the h2 package: pip install vizql-data-service-py[http2]"
+            ) from None
+
     def with_headers(self, headers: dict[str, str]) -> "AuthenticatedClient":
         """Get a new client matching this one with additional headers"""
         if self._client is not None:
@@ -90,6 +175,20 @@ class AuthenticatedClient:
             self._async_client.timeout = timeout
         return evolve(self, timeout=timeout)
 
+    def set_token(self, token: str) -> "AuthenticatedClient":
+        """Replace the token sent with every request, including on httpx Clients that were already created
+
+        The httpx Clients keep their connection pools, so a new session does not open new connections.
+        """
+        self.token = token
+        value = f"{self.prefix} {token}" if self.prefix else token
+        self._headers[self.auth_header_name] = value
+        if self._client is not None:
+            self._client.headers[self.auth_header_name] = value
+        if self._async_client is not None:
+            self._async_client.headers[self.auth_header_name] = value
+        return self
+
     def set_httpx_client(self, client: httpx.Client) -> "AuthenticatedClient":
         """Manually set the underlying httpx.Client
 
@@ -109,13 +208,40 @@ class AuthenticatedClient:
                 f"{self._headers['User-Agent']} {sdk_identifier}"
             )
 
+    def _probe_url(self) -> str:
+        """The URL of the health check probing a half-open circuit breaker"""
+        return f"{self._base_url.rstrip('/')}{HEALTH_CHECK_PATH}"
+
     def get_httpx_client(self) -> httpx.Client:
         """Get the underlying httpx.Client, constructing a new one if not previously set"""
         if self._client is None:
-            self._headers[self.auth_header_name] = (
-                f"{self.prefix} {self.token}" if self.prefix else self.token
-            )
+            if self.token:
+                self._headers[self.auth_header_name] = (
+                    f"{self.prefix} {self.token}" if self.prefix else self.token
+                )
             self._update_user_agent()
+            httpx_args = dict(self._httpx_args)
+            if self._limits is not None:
+                httpx_args["limits"] = self._limits
+            if (
+                self._load_balancer is not None
+                or self._retry_policy is not None
+                or self._circuit_breaker is not None
+            ):
+                transport = httpx_args.pop("transport", None) or httpx.HTTPTransport(
+                    verify=self._verify_ssl,
+                    http2=self._http2,
+                    limits=httpx_args.get("limits", DEFAULT_LIMITS),
+                )
+                if self._load_balancer is not None:
+                    transport = LoadBalancingTransport(transport, self._load_balancer)
+                if self._retry_policy is not None:
+                    transport = RetryTransport(transport, self._retry_policy)
+                if self._circuit_breaker is not None:
+                    transport = CircuitBreakerTransport(
+                        transport, self._circuit_breaker, self._probe_url()
+                    )
+                httpx_args["transport"] = transport
             self._client = httpx.Client(
                 base_url=self._base_url,
                 cookies=self._cookies,
@@ -123,7 +249,9 @@ class AuthenticatedClient:
                 timeout=self._timeout,
                 verify=self._verify_ssl,
                 follow_redirects=self._follow_redirects,
-                **self._httpx_args,
+                http2=self._http2,
+                auth=self._auth,
+                **httpx_args,
             )
         return self._client
 
@@ -149,10 +277,42 @@ class AuthenticatedClient:
     def get_async_httpx_client(self) -> httpx.AsyncClient:
         """Get the underlying httpx.AsyncClient, constructing a new one if not previously set"""
         if self._async_client is None:
-            self._headers[self.auth_header_name] = (
-                f"{self.prefix} {self.token}" if self.prefix else self.token
-            )
+            if self.token:
+                self._headers[self.auth_header_name] = (
+                    f"{self.prefix} {self.token}" if self.prefix else self.token
+                )
             self._update_user_agent()
+            httpx_args = dict(self._httpx_args)
+            if self._limits is not None:
+                httpx_args["limits"] = self._limits
+            if (
+                self._concurrency_limiter is not None
+                or self._load_balancer is not None
+                or self._retry_policy is not None
+                or self._circuit_breaker is not None
+            ):
+                transport = httpx_args.pop(
+                    "transport", None
+                ) or httpx.AsyncHTTPTransport(
+                    verify=self._verify_ssl,
+                    http2=self._http2,
+                    limits=httpx_args.get("limits", DEFAULT_LIMITS),
+                )
+                if self._concurrency_limiter is not None:
+                    transport = AsyncLimitTransport(
+                        transport, self._concurrency_limiter
+                    )
+                if self._load_balancer is not None:
+                    transport = AsyncLoadBalancingTransport(
+                        transport, self._load_balancer
+                    )
+                if self._retry_policy is not None:
+                    transport = AsyncRetryTransport(transport, self._retry_policy)
+                if self._circuit_breaker is not None:
+                    transport = AsyncCircuitBreakerTransport(
+                        transport, self._circuit_breaker, self._probe_url()
+                    )
+                httpx_args["transport"] = transport
             self._async_client = httpx.AsyncClient(
                 base_url=self._base_url,
                 cookies=self._cookies,
@@ -160,7 +320,9 @@ class AuthenticatedClient:
                 timeout=self._timeout,
                 verify=self._verify_ssl,
                 follow_redirects=self._follow_redirects,
-                **self._httpx_args,
+                http2=self._http2,
+                auth=self._auth,
+                **httpx_args,
             )
         return self._async_client
 
@@ -179,15 +341,36 @@ class VizQLDataServiceClient:
 
     def __init__(
         self,
-        url: str,
+        url: Union[str, Sequence[str]],
         server: TSC.Server,
         auth: Union[TSC.JWTAuth, TSC.PersonalAccessTokenAuth, TSC.TableauAuth],
         verify_ssl: Union[str, bool, ssl.SSLContext] = True,
+        *,
+        fast_decode: bool = False,
+        fast_decode_sample_rows: int = 0,
+        release_content: bool = False,
+        body_cache_max_bytes: int = 0,
+        metadata_cache: Optional[TTLCache] = None,
+        result_cache: Optional[ResultCache] = None,
+        coalesce_requests: bool = False,
+        retry_policy: Optional[RetryPolicy] = None,
+        token_provider: Optional[TokenProvider] = None,
+        token_cache: Optional[TokenCache] = None,
+        httpx_args: Optional[dict[str, Any]] = None,
+        http2: bool = False,
+        concurrency_limiter: Optional[AdaptiveLimiter] = None,
+        circuit_breakers: Optional[CircuitBreakerRegistry] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        load_balancing: Optional[LoadBalancingPolicy] = None,
+        max_connections: Optional[int] = 100,
+        max_keepalive_connections: Optional[int] = 20,
+        keepalive_expiry: Optional[float] = 5.0,
     ):
         """Initialize the client.
 
         Args:
-            url: The base URL of the server.
+            url: The base URL of the server, or the base URLs of several nodes of the same Tableau deployment to
+                spread requests over, such as the addresses of its nodes behind a load balancer.
             server: The Tableau Server instance.
             auth: The authentication object. Can be one of:
                 - TSC.JWTAuth: JWT authentication (--jwt-token)
@@ -196,13 +379,92 @@ class VizQLDataServiceClient:
             verify_ssl: Whether or not to verify the SSL certificate of the API server.
                 This should be True in production, but can be set to False for testing purposes.
                 Can also be a path to a CA bundle file or an ssl.SSLContext instance.
+            fast_decode: Whether query_datasource decodes query results without running pydantic validation
+                over every row. Only the data/error envelope is validated. Can be overridden per call.
+            fast_decode_sample_rows: The number of rows, spread evenly over the result, whose shape is checked
+                against the first row when fast_decode is used. 0 disables the check.
+            release_content: Whether a response drops its raw content once its parsed value has been
+                computed, so the body is not held twice in memory.
+            body_cache_max_bytes: The maximum total size of the encoded request bodies cached for reuse when
+                the same request object is sent again. 0 disables the cache.
+            metadata_cache: The cache used by read_metadata to reuse responses for the same request, or None to
+                always request metadata from the server.
+            result_cache: The cache used by query_datasource to reuse the results of equivalent queries, or None
+                to always query the server.
+            coalesce_requests: Whether concurrent identical requests made by the sync and asyncio functions of the
+                endpoints share one HTTP request.
+            retry_policy: The policy used to retry requests failing to connect or with a 429, 502, 503 or 504
+                status, or None to send each request once.
+            token_provider: The provider of the session token sent with each request. It signs in again when
+                the token is older than its max_age, and requests rejected with a 401 status are sent again with
+                a new token. None sends the token of the server as it was when the client was created.
+            token_cache: The cache of session tokens used to sign the server in when it is not signed in yet,
+                reusing a cached session of the same server, site and credentials when there is one.
+            httpx_args: Additional arguments passed to the constructors of the httpx.Client and
+                httpx.AsyncClient, such as a custom transport.
+            http2: Whether to use HTTP/2 when the server supports it, multiplexing concurrent requests over a
+                few connections. Requires the h2 package, installed with the http2 extra.
+            concurrency_limiter: The limiter adapting the number of async requests in flight to the latency and
+                overload responses of the server, or None to only limit them by the connection pool and the
+                max_concurrency of batches.
+            circuit_breakers: The registry of circuit breakers the client takes the breaker of its server and
+                site from, so that clients of the same site share it. Once it opens, requests raise
+                errors.CircuitOpenError instead of waiting on a degraded server. None always sends requests.
+            hedging: The policy hedging the asyncio requests of read_metadata, get_datasource_model and
+                query_datasource: a request slower than most recent ones of its endpoint is sent again, and the
+                first successful response is used. Queries are only hedged with hedge_queries and a
+                result_cache. None sends each request once.
+            load_balancing: The policy ejecting failing nodes when several URLs are given. Requests go to the
+                node with fewer requests outstanding of two picked at random, and client.load_balancer reports
+                the health of each node. None uses the default LoadBalancingPolicy.
+            max_connections: The largest number of connections open at once by each of the httpx.Client and
+                httpx.AsyncClient, or None for no limit. Requests beyond it wait for a connection.
+            max_keepalive_connections: The largest number of idle connections kept open for reuse by each
+                client, or None for no limit.
+            keepalive_expiry: The number of seconds an idle connection is kept open, or None to keep it until
+                the server closes it. These three settings replace any limits in httpx_args.
         """
-        self.url = url
+        self.urls = [url] if isinstance(url, str) else list(url)
+        if not self.urls:
+            raise ValueError("At least one URL is required")
+        self.url = self.urls[0]
+        self.load_balancer = (
+            LoadBalancer(
+                [format_server_url(node, API_SUBDOMAIN) for node in self.urls],
+                load_balancing,
+            )
+            if len(self.urls) > 1
+            else None
+        )
         self.server = server
         self.auth = auth
         self.verify_ssl = verify_ssl
+        self.retry_policy = retry_policy
+        self.token_provider = token_provider
+        self.token_cache = token_cache
+        self.httpx_args = httpx_args or {}
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.concurrency_limiter = concurrency_limiter
+        self.circuit_breakers = circuit_breakers
+        if token_cache is not None and not server.is_signed_in():
+            token_cache.sign_in(server, auth)
         self._client = self._create_client()
         self.raise_on_unexpected_status = False
+        self.fast_decode = fast_decode
+        self.fast_decode_sample_rows = fast_decode_sample_rows
+        self.release_content = release_content
+        self.body_cache = (
+            EncodedBodyCache(body_cache_max_bytes) if body_cache_max_bytes > 0 else None
+        )
+        self.metadata_cache = metadata_cache
+        self.result_cache = result_cache
+        self.single_flight = SingleFlight() if coalesce_requests else None
+        self.hedging = hedging
 
     def _create_client(self) -> AuthenticatedClient:
         """Create an authenticated client with proper server URL."""
@@ -211,12 +473,92 @@ class VizQLDataServiceClient:
 
         return AuthenticatedClient(
             base_url=base_url,
-            token=self.server.auth_token,
+            token=self.server.auth_token if self.server.is_signed_in() else "",
             prefix="",
             auth_header_name=X_TABLEAU_AUTH,
             verify_ssl=self.verify_ssl,
+            httpx_args=self.httpx_args,
+            http2=self.http2,
+            limits=self.limits,
+            concurrency_limiter=self.concurrency_limiter,
+            load_balancer=self.load_balancer,
+            circuit_breaker=(
+                self.circuit_breakers.get(base_url, self.auth.site_id or "")
+                if self.circuit_breakers is not None
+                else None
+            ),
+            retry_policy=self.retry_policy,
+            auth=(
+                TokenAuth(self.token_provider, X_TABLEAU_AUTH)
+                if self.token_provider is not None
+                else None
+            ),
         )
 
+    @classmethod
+    async def connect(
+        cls,
+        url: Union[str, Sequence[str]],
+        auth: TableauAuth,
+        verify_ssl: Union[str, bool, ssl.SSLContext] = True,
+        *,
+        api_version: str = DEFAULT_REST_API_VERSION,
+        **options: Any,
+    ) -> "VizQLDataServiceClient":
+        """Create a client and sign in without blocking the event loop
+
+        The sign-in request is sent with a plain httpx.AsyncClient built from verify_ssl and httpx_args, so it
+        is not counted by the concurrency limiter, circuit breaker or retry policy of the VizQL Data Service
+        requests. The session is also set on the client's TSC.Server, whose REST API methods can then be used
+        without signing in again.
+
+        Args:
+            url: The base URL of the server, or the base URLs of several of its nodes, signing in to the first.
+            auth: The password, personal access token or JWT credentials to sign in with.
+            verify_ssl: Whether or not to verify the SSL certificate of the API server.
+            api_version: The version of the REST API used to sign in, also set on the TSC.Server.
+            **options: The keyword arguments of the constructor, such as fast_decode or retry_policy. A
+                token_cache is used to reuse a cached session instead of signing in, and stores the new session.
+
+        Raises:
+            errors.UnexpectedStatus: If the server rejects the credentials.
+            httpx.TimeoutException: If the sign-in takes longer than the timeout of the client.
+
+        Returns:
+            VizQLDataServiceClient: The signed in client.
+        """
+        server = TSC.Server(url if isinstance(url, str) else url[0])
+        server.version = api_version
+        token_cache: Optional[TokenCache] = options.pop("token_cache", None)
+        client = cls(url, server, auth, verify_ssl, **options)
+        client.token_cache = token_cache
+        cached = token_cache.get(server, auth) if token_cache is not None else None
+        if cached is not None:
+            restore_session(
+                server, cached.site_id, cached.user_id, cached.token, cached.site_url
+            )
+        else:
+            async with httpx.AsyncClient(
+                verify=verify_ssl, **client.httpx_args
+            ) as sign_in_client:
+                session = await sign_in_async(
+                    sign_in_client,
+                    server.server_address,
+                    auth,
+                    api_version=api_version,
+                )
+            restore_session(
+                server,
+                session.site_id,
+                session.user_id,
+                session.token,
+                session.site_url,
+            )
+            if token_cache is not None:
+                token_cache.set(server, auth)
+        client.client.set_token(server.auth_token)
+        return client
+
     @property
     def client(self) -> AuthenticatedClient:
         """Get the authenticated client.
@@ -237,5 +579,78 @@ class VizQLDataServiceClient:
         """Get the underlying httpx.AsyncClient."""
         return self.client.get_async_httpx_client()
 
+    def warm_up(self, connections: int) -> None:
+        """Open connections of the httpx.Client ahead of traffic, so that a first burst of requests does not
+        wait on connection setups and TLS handshakes
+
+        Each connection sends a request to the simple-request endpoint, which needs no authentication, from its
+        own thread, so the handshakes happen at once. The connections are kept open until all are, so each
+        request opens its own, and stay in the pool for ``keepalive_expiry`` seconds.
+
+        Args:
+            connections: The number of connections to open, at most max_keepalive_connections since the
+                connections beyond it are closed once idle, and at most max_connections since the pool opens
+                no more. With HTTP/2, one connection carries every request.
+
+        Raises:
+            ValueError: If connections is not between 1 and the smaller of max_keepalive_connections and
+                max_connections.
+            httpx.TimeoutException: If a connection takes longer than the timeout of the client.
+        """
+        self._check_warm_up(connections)
+        httpx_client = self.get_httpx_client()
+        responses: list[httpx.Response] = []
+
+        def open_connection() -> None:
+            request = httpx_client.build_request("GET", HEALTH_CHECK_PATH)
+            responses.append(httpx_client.send(request, auth=None, stream=True))
+
+        try:
+            with ThreadPoolExecutor(connections) as executor:
+                futures = [executor.submit(open_connection) for _ in range(connections)]
+                for future in futures:
+                    future.result()
+            # A streamed response holds its connection until its body is read, which returns it to the pool
+            for response in responses:
+                response.read()
+        finally:
+            for response in responses:
+                response.close()
+
+    async def warm_up_async(self, connections: int) -> None:
+        """Open connections of the httpx.AsyncClient ahead of traffic, so that a first burst of requests does not
+        wait on connection setups and TLS handshakes
+
+        The requests are sent to the simple-request endpoint, which needs no authentication, all at once, so each
+        opens its own connection. The connections stay in the pool for ``keepalive_expiry`` seconds. A
+        concurrency_limiter limits how many requests, and so connections, are opened at once.
+
+        Args:
+            connections: The number of connections to open, at most max_keepalive_connections since the
+                connections beyond it are closed once idle, and at most max_connections since the pool opens
+                no more. With HTTP/2, one connection carries every request.
+
+        Raises:
+            ValueError: If connections is not between 1 and the smaller of max_keepalive_connections and
+                max_connections.
+            httpx.TimeoutException: If a connection takes longer than the timeout of the client.
+        """
+        self._check_warm_up(connections)
+        httpx_client = self.get_async_httpx_client()
+        await asyncio.gather(
+            *(
+                httpx_client.get(HEALTH_CHECK_PATH, auth=None)
+                for _ in range(connections)
+            )
+        )
+
+    def _check_warm_up(self, connections: int) -> None:
+        for name in ("max_keepalive_connections", "max_connections"):
+            maximum = getattr(self.limits, name)
+            if maximum is not None and connections > maximum:
+                raise ValueError(f"connections must be at most {name} ({maximum})")
+        if connections < 1:
+            raise ValueError("connections must be at least 1")
+
     def __str__(self) -> str:
         return f"Client for {self.auth}"
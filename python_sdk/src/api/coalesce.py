@@ -0,0 +1,164 @@
+"""
+Coalescing Module
+
+This module provides single-flight execution of identical requests, so that concurrent callers asking the server for
+the same thing share one HTTP request.
+"""
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Hashable
+from typing import TYPE_CHECKING, Any, Callable, Optional, TypeVar
+
+import httpx
+from attrs import define, field
+from pydantic import BaseModel
+
+from .fingerprint import fingerprint
+from .hedging import hedge
+
+if TYPE_CHECKING:
+    from .client import VizQLDataServiceClient
+
+T = TypeVar("T")
+
+
+@define
+class _Call:
+    done: threading.Event = field(factory=threading.Event)
+    result: Any = None
+    error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time, sharing its outcome with concurrent callers
+
+    A caller asking for a key that is already being computed waits for that call and receives its result, or
+    its exception, instead of starting another. Threads are coalesced by do(), and coroutines running on the
+    same event loop by ado().
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._tasks: dict[tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Task] = {}
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        """Call func, or wait for the call already in flight for the same key
+
+        Args:
+            key: The key identifying equivalent calls.
+            func: The function to call.
+
+        Returns:
+            T: The result of the call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def ado(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Await func, or the call already in flight for the same key
+
+        The call runs in its own task, so cancelling one caller does not cancel it for the others.
+
+        Args:
+            key: The key identifying equivalent calls.
+            func: The coroutine function to await.
+
+        Returns:
+            T: The result of the call.
+        """
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get((loop, key))
+        if task is None:
+
+            async def run() -> T:
+                return await func()
+
+            task = loop.create_task(run())
+            self._tasks[(loop, key)] = task
+            task.add_done_callback(lambda done: self._forget(loop, key, done))
+        return await asyncio.shield(task)
+
+    def _forget(
+        self, loop: asyncio.AbstractEventLoop, key: Hashable, task: asyncio.Task
+    ) -> None:
+        if self._tasks.get((loop, key)) is task:
+            del self._tasks[(loop, key)]
+        if not task.cancelled():
+            # Retrieve the exception so it is not reported as unhandled when every caller was cancelled
+            task.exception()
+
+
+def send_request(
+    client: "VizQLDataServiceClient", body: BaseModel, kwargs: dict[str, Any]
+) -> httpx.Response:
+    """Send a request, sharing it with identical requests in flight when the client coalesces requests
+
+    Args:
+        client: The client to send the request with.
+        body: The request model, whose fingerprint identifies identical requests.
+        kwargs: The arguments of httpx.Client.request().
+
+    Returns:
+        httpx.Response: The response, shared by every coalesced caller.
+    """
+    httpx_client = client.client.get_httpx_client()
+    if client.single_flight is None:
+        return httpx_client.request(**kwargs)
+    return client.single_flight.do(
+        fingerprint(body), lambda: httpx_client.request(**kwargs)
+    )
+
+
+async def asend_request(
+    client: "VizQLDataServiceClient",
+    body: BaseModel,
+    kwargs: dict[str, Any],
+    hedged: bool = False,
+) -> httpx.Response:
+    """Send a request asynchronously, sharing it with identical requests in flight when the client coalesces requests
+
+    Args:
+        client: The client to send the request with.
+        body: The request model, whose fingerprint identifies identical requests.
+        kwargs: The arguments of httpx.AsyncClient.request().
+        hedged: Whether the request is read-only and can be hedged by the hedging policy of the client.
+
+    Returns:
+        httpx.Response: The response, shared by every coalesced caller.
+    """
+    httpx_client = client.client.get_async_httpx_client()
+    policy = client.hedging
+
+    def send() -> Awaitable[httpx.Response]:
+        if hedged and policy is not None:
+            return hedge(policy, kwargs["url"], lambda: httpx_client.request(**kwargs))
+        return httpx_client.request(**kwargs)
+
+    if client.single_flight is None:
+        return await send()
+    return await client.single_flight.ado(fingerprint(body), send)
+
+
+__all__ = ["SingleFlight", "asend_request", "send_request"]
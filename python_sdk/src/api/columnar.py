@@ -0,0 +1,490 @@
+"""
+Columnar Results Module
+
+This module provides a container that stores query results column by column in contiguous typed buffers
+instead of as rows of boxed Python objects. NumPy arrays are used when NumPy is installed, otherwise
+``array.array`` buffers are used.
+"""
+
+import math
+from array import array
+from collections.abc import Iterator, Sequence
+from datetime import date, datetime, timezone
+from typing import Any, Optional
+
+from attrs import define, evolve, field
+
+from .openapi_generated import DataType, Field, FieldMetadata, Function, MetadataOutput
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the numpy extra
+    np = None  # type: ignore
+
+# Column kinds
+INT = "int"
+FLOAT = "float"
+BOOL = "bool"
+STRING = "string"
+OBJECT = "object"
+DATE = "date"
+DATETIME = "datetime"
+_NULL = "null"  # no non-null value seen yet
+
+_TYPECODES = {INT: "q", FLOAT: "d", BOOL: "b", STRING: "i"}
+_DTYPES = {INT: "int64", FLOAT: "float64", BOOL: "int8", STRING: "int32"}
+_FILL: dict[str, Any] = {INT: 0, FLOAT: math.nan, BOOL: 0, STRING: -1}
+
+_INTEGER_FUNCTIONS = {
+    Function.COUNT,
+    Function.COUNTD,
+    Function.YEAR,
+    Function.QUARTER,
+    Function.MONTH,
+    Function.WEEK,
+    Function.DAY,
+}
+_REAL_FUNCTIONS = {Function.AVG, Function.MEDIAN, Function.STDEV, Function.VAR}
+_TYPE_PRESERVING_FUNCTIONS = {
+    None,
+    Function.SUM,
+    Function.MIN,
+    Function.MAX,
+    Function.TRUNC_YEAR,
+    Function.TRUNC_QUARTER,
+    Function.TRUNC_MONTH,
+    Function.TRUNC_WEEK,
+    Function.TRUNC_DAY,
+    Function.NONE,
+    Function.UNSPECIFIED,
+}
+_INTEGER_TYPECODES = ("b", "h", "i", "q")
+
+
+@define
+class Column:
+    """A single result column
+
+    Attributes:
+        name: The column name.
+        kind: One of ``"int"``, ``"float"``, ``"bool"``, ``"string"``, ``"date"``, ``"datetime"`` or ``"object"``.
+        values: A typed buffer of the values. For string columns these are codes into ``categories``.
+            Date and datetime columns are datetime64 arrays, or lists of date and datetime objects without NumPy.
+        categories: The distinct values of a string column, in order of first appearance.
+        valid: A mask that is true where the value is not null, or None if the column has no nulls.
+            Null slots in ``values`` hold 0, NaN or the code -1.
+    """
+
+    name: str
+    kind: str
+    values: Any
+    categories: Optional[list[Any]] = None
+    valid: Optional[Any] = None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def null_count(self) -> int:
+        """Return the number of null values in the column"""
+        if self.valid is None:
+            return 0
+        return len(self.valid) - int(sum(self.valid))
+
+    def to_list(self) -> list[Any]:
+        """Decode the column into a list of Python values, with None for nulls"""
+        if isinstance(self.values, list):
+            return list(self.values)
+
+        values: list[Any] = self.values.tolist()
+        if self.kind == STRING:
+            categories = self.categories or []
+            return [categories[code] if code >= 0 else None for code in values]
+        if self.kind == BOOL:
+            values = [bool(value) for value in values]
+        if self.valid is None:
+            return values
+        return [
+            value if valid else None for value, valid in zip(values, list(self.valid))
+        ]
+
+
+@define
+class ColumnarResult:
+    """Query results stored column by column
+
+    Columns are named and ordered after the fields of the query that produced them.
+    """
+
+    columns: list[Column]
+    row_count: int
+
+    @property
+    def names(self) -> list[str]:
+        """The column names, in query field order"""
+        return [column.name for column in self.columns]
+
+    def column(self, name: str) -> Column:
+        """Get a column by name
+
+        Raises:
+            KeyError: If there is no column with this name.
+        """
+        for column in self.columns:
+            if column.name == name:
+                return column
+        raise KeyError(name)
+
+    def __getitem__(self, name: str) -> Column:
+        return self.column(name)
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def iter_rows(self) -> Iterator[list[Any]]:
+        """Yield the results as rows of Python values, in ARRAYS return format"""
+        decoded = [column.to_list() for column in self.columns]
+        for row in zip(*decoded):
+            yield list(row)
+
+    @classmethod
+    def from_rows(
+        cls, fields: Sequence[Field], rows: Sequence[Any]
+    ) -> "ColumnarResult":
+        """Build a columnar result from already decoded rows
+
+        Args:
+            fields: The fields of the query that produced the rows.
+            rows: Rows in ARRAYS return format, or in OBJECTS return format keyed by column name.
+        """
+        builder = ColumnarBuilder(fields)
+        builder.append(rows)
+        return builder.build()
+
+
+def column_name(query_field: Field) -> str:
+    """Get the column name for a query field: its alias, or its caption qualified by its function"""
+    root = query_field.root
+    if root.fieldAlias:
+        return str(root.fieldAlias)
+    function = getattr(root, "function", None)
+    if function is not None and function not in (Function.NONE, Function.UNSPECIFIED):
+        return f"{function.value}({root.fieldCaption})"
+    return str(root.fieldCaption)
+
+
+def _field_kind(query_field: Field) -> Optional[str]:
+    function = getattr(query_field.root, "function", None)
+    if function in _INTEGER_FUNCTIONS:
+        return INT
+    if function in _REAL_FUNCTIONS:
+        return FLOAT
+    return None
+
+
+def _value_kind(types: set[type]) -> Optional[str]:
+    if not types:
+        return None
+    if types == {bool}:
+        return BOOL
+    if types == {int}:
+        return INT
+    if types <= {int, float}:
+        return FLOAT
+    if types == {str}:
+        return STRING
+    return OBJECT
+
+
+@define
+class _ColumnBuilder:
+    name: str
+    kind: str = _NULL
+    length: int = 0
+    values: Any = None
+    valid: Optional[bytearray] = None
+    index: dict[Any, int] = field(factory=dict)
+
+    def extend(self, values: list[Any]) -> None:
+        types = set(map(type, values))
+        has_null = type(None) in types
+        types.discard(type(None))
+
+        kind = _value_kind(types)
+        if kind is not None and kind != self.kind:
+            # Values of a narrower kind, such as whole numbers in a float column, fit without converting
+            merged = _merge_kinds(self.kind, kind)
+            if merged != self.kind:
+                self._convert(merged)
+
+        if has_null and self.valid is None and self.kind != OBJECT:
+            self.valid = bytearray(b"\x01") * self.length
+        if self.valid is not None:
+            self.valid.extend(value is not None for value in values)
+
+        if self.kind == _NULL:
+            pass
+        elif self.kind == OBJECT:
+            self.values.extend(values)
+        elif self.kind == STRING:
+            index = self.index
+            self.values.extend(
+                -1 if value is None else index.setdefault(value, len(index))
+                for value in values
+            )
+        elif has_null:
+            fill = _FILL[self.kind]
+            self.values.extend(fill if value is None else value for value in values)
+        else:
+            self.values.extend(values)
+        self.length += len(values)
+
+    def _convert(self, kind: str) -> None:
+        """Convert the values seen so far to a wider kind"""
+        if self.kind == _NULL:
+            previous: list[Any] = [None] * self.length
+        else:
+            previous = self._column().to_list()
+
+        self.kind = kind
+        self.index = {}
+        self.valid = None
+        self.length = 0
+        if kind == OBJECT:
+            self.values = []
+        else:
+            self.values = array(_TYPECODES[kind])
+        if previous:
+            self.extend(previous)
+
+    def _column(self) -> Column:
+        if self.kind == _NULL:
+            return Column(self.name, OBJECT, [None] * self.length)
+        categories = list(self.index) if self.kind == STRING else None
+        return Column(self.name, self.kind, self.values, categories, self.valid)
+
+    def build(self) -> Column:
+        column = self._column()
+        if np is None or column.kind == OBJECT:
+            return column
+
+        values = np.frombuffer(column.values, dtype=_DTYPES[column.kind])
+        if column.kind == BOOL:
+            values = values.astype(bool)
+        valid = None
+        if column.valid is not None:
+            valid = np.frombuffer(column.valid, dtype=np.bool_)
+        return Column(column.name, column.kind, values, column.categories, valid)
+
+
+def _merge_kinds(current: str, new: str) -> str:
+    if current == _NULL:
+        return new
+    if {current, new} == {INT, FLOAT}:
+        return FLOAT
+    return OBJECT
+
+
+class ColumnarBuilder:
+    """Incrementally build a ColumnarResult from batches of rows
+
+    Each batch is transposed into the column buffers as soon as it is appended, so the rows of a batch
+    can be released before the next one is decoded.
+
+    Args:
+        fields: The fields of the query that produces the rows. They give the column names and the
+            initial column kinds, which are widened if the values require it.
+    """
+
+    def __init__(self, fields: Sequence[Field]):
+        self._builders: list[_ColumnBuilder] = []
+        seen: dict[str, int] = {}
+        for query_field in fields:
+            name = column_name(query_field)
+            seen[name] = seen.get(name, 0) + 1
+            if seen[name] > 1:
+                name = f"{name} ({seen[name]})"
+            builder = _ColumnBuilder(name)
+            kind = _field_kind(query_field)
+            if kind is not None:
+                builder._convert(kind)
+            self._builders.append(builder)
+        self._row_count = 0
+
+    def append(self, rows: Sequence[Any]) -> None:
+        """Append a batch of rows in ARRAYS return format, or OBJECTS return format keyed by column name"""
+        if not rows:
+            return
+        if isinstance(rows[0], dict):
+            for builder in self._builders:
+                builder.extend([row.get(builder.name) for row in rows])
+        else:
+            for position, builder in enumerate(self._builders):
+                builder.extend([row[position] for row in rows])
+        self._row_count += len(rows)
+
+    def build(self) -> ColumnarResult:
+        """Finish the columns and return the result"""
+        return ColumnarResult(
+            columns=[builder.build() for builder in self._builders],
+            row_count=self._row_count,
+        )
+
+
+def column_data_type(
+    query_field: Field, field_metadata: Optional[FieldMetadata]
+) -> Optional[DataType]:
+    """Get the data type of the column a query field produces
+
+    Counts and date parts are integers and averages and other statistics are reals whatever the field type.
+    Other functions keep the data type of the field, which comes from its metadata.
+    """
+    function = getattr(query_field.root, "function", None)
+    if function in _INTEGER_FUNCTIONS:
+        return DataType.INTEGER
+    if function in _REAL_FUNCTIONS:
+        return DataType.REAL
+    if function in _TYPE_PRESERVING_FUNCTIONS and field_metadata is not None:
+        return field_metadata.dataType
+    return None
+
+
+def apply_data_types(
+    result: ColumnarResult, fields: Sequence[Field], metadata: MetadataOutput
+) -> ColumnarResult:
+    """Decode the columns of a result into the native types given by the data source metadata
+
+    Each column is converted in a single pass over its buffer:
+
+    - INTEGER columns are downcast to the narrowest integer width that holds all of their values.
+    - REAL columns holding only integers are widened to float64.
+    - DATE and DATETIME columns are parsed into datetime64 arrays, or into date and datetime objects
+      without NumPy. Only the distinct strings of the dictionary-encoded column are parsed.
+    - BOOLEAN columns holding the strings "true" and "false" are converted to booleans.
+
+    Columns whose values do not match their data type are left unchanged.
+
+    Args:
+        result: The result to decode.
+        fields: The fields of the query that produced the result.
+        metadata: The metadata of the queried data source, as returned by read_metadata.
+
+    Returns:
+        ColumnarResult: A new result with the decoded columns
+    """
+    by_caption: dict[str, FieldMetadata] = {}
+    for field_metadata in metadata.data or []:
+        if field_metadata.fieldName:
+            by_caption.setdefault(field_metadata.fieldName, field_metadata)
+        if field_metadata.fieldCaption:
+            by_caption[field_metadata.fieldCaption] = field_metadata
+
+    columns = []
+    for column, query_field in zip(result.columns, fields):
+        caption = query_field.root.fieldCaption
+        data_type = column_data_type(query_field, by_caption.get(str(caption)))
+        columns.append(_decode_column(column, data_type))
+    return ColumnarResult(columns=columns, row_count=result.row_count)
+
+
+def _decode_column(column: Column, data_type: Optional[DataType]) -> Column:
+    if data_type == DataType.INTEGER and column.kind == INT:
+        return _downcast(column)
+    if data_type == DataType.REAL and column.kind == INT:
+        if np is not None:
+            return evolve(column, kind=FLOAT, values=column.values.astype(np.float64))
+        return evolve(column, kind=FLOAT, values=array("d", column.values))
+    if data_type == DataType.DATE and column.kind == STRING:
+        return _parse_dates(column, DATE)
+    if data_type == DataType.DATETIME and column.kind == STRING:
+        return _parse_dates(column, DATETIME)
+    if data_type == DataType.BOOLEAN and column.kind == STRING:
+        return _parse_booleans(column)
+    return column
+
+
+def _downcast(column: Column) -> Column:
+    values = column.values
+    if not len(values):
+        low, high = 0, 0
+    elif np is not None:
+        low, high = int(values.min()), int(values.max())
+    else:
+        low, high = min(values), max(values)
+    for typecode in _INTEGER_TYPECODES:
+        bits = array(typecode).itemsize * 8
+        if -(2 ** (bits - 1)) <= low and high < 2 ** (bits - 1):
+            break
+    if np is not None:
+        return evolve(column, values=values.astype(f"int{bits}"))
+    return evolve(column, values=array(typecode, values))
+
+
+def _parse_date(text: str) -> date:
+    return date.fromisoformat(text[:10])
+
+
+def _parse_datetime(text: str) -> datetime:
+    if text.endswith("Z"):
+        text = f"{text[:-1]}+00:00"
+    value = datetime.fromisoformat(text)
+    if np is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _parse_dates(column: Column, kind: str) -> Column:
+    categories = column.categories or []
+    parse = _parse_date if kind == DATE else _parse_datetime
+    try:
+        if np is not None:
+            dtype = "datetime64[D]" if kind == DATE else "datetime64[us]"
+            try:
+                parsed = np.array(categories, dtype=dtype)
+            except ValueError:
+                parsed = np.array([parse(text) for text in categories], dtype=dtype)
+            # Null codes are -1, which selects the NaT appended at the end
+            parsed = np.append(parsed, np.array(["NaT"], dtype=dtype))
+            return evolve(
+                column, kind=kind, values=parsed[column.values], categories=None
+            )
+
+        decoded: list[Any] = [parse(text) for text in categories]
+    except ValueError:
+        return column
+    decoded.append(None)
+    return evolve(
+        column,
+        kind=kind,
+        values=[decoded[code] for code in column.values],
+        categories=None,
+    )
+
+
+def _parse_booleans(column: Column) -> Column:
+    categories = column.categories or []
+    lookup = {"true": 1, "false": 0}
+    if any(text.lower() not in lookup for text in categories):
+        return column
+    decoded = [lookup[text.lower()] for text in categories] + [0]
+    if np is not None:
+        values = np.array(decoded, dtype=bool)[column.values]
+        return evolve(column, kind=BOOL, values=values, categories=None)
+    values = array("b", [decoded[code] for code in column.values])
+    return evolve(column, kind=BOOL, values=values, categories=None)
+
+
+__all__ = [
+    "BOOL",
+    "DATE",
+    "DATETIME",
+    "FLOAT",
+    "INT",
+    "OBJECT",
+    "STRING",
+    "Column",
+    "ColumnarBuilder",
+    "ColumnarResult",
+    "apply_data_types",
+    "column_data_type",
+    "column_name",
+]
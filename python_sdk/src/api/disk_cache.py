@@ -0,0 +1,249 @@
+"""
+Disk Cache Module
+
+This module provides a result cache stored in a SQLite database, so that worker processes on one host can share
+query results.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional
+
+import httpx
+
+# Headers describing the encoding of the body as it was received, which no longer applies to the stored body
+_TRANSPORT_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+_SCHEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    datasource TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at);
+CREATE INDEX IF NOT EXISTS results_datasource ON results (datasource);
+CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER NOT NULL);
+INSERT OR IGNORE INTO totals SELECT 0, COALESCE(SUM(size), 0) FROM results;
+CREATE TRIGGER IF NOT EXISTS results_insert AFTER INSERT ON results BEGIN
+    UPDATE totals SET size = size + NEW.size;
+END;
+CREATE TRIGGER IF NOT EXISTS results_delete AFTER DELETE ON results BEGIN
+    UPDATE totals SET size = size - OLD.size;
+END;
+COMMIT;
+"""
+
+
+class DiskResultCache:
+    """A result cache stored in a SQLite database shared by processes on one host
+
+    Response bodies are stored compressed with zlib, together with their headers, the data source they belong to
+    and their expiry time. Each write is a single transaction, so readers in other processes never see a partly
+    written entry. After each write, expired entries are removed and, if the stored bodies exceed ``max_bytes``,
+    the least recently read entries are removed until they fit. The total size of the bodies is kept up to date
+    by triggers, so writes do not scan the table.
+
+    The database uses write-ahead logging so that readers do not block the writer. Reads do not write: the times
+    they read entries are written in batches of ``touch_batch``, and before entries are evicted, so the
+    eviction order ignores the recent reads of other processes.
+
+    Connections are opened on first use by each thread of each process, so a cache created before the process
+    forks, such as by a server preloading the application, is safe to use in the forked workers.
+
+    Args:
+        path: The path of the SQLite database file, created if it does not exist.
+        max_bytes: The maximum total size of the compressed bodies.
+        timeout: The number of seconds to wait for another process to release a lock on the database.
+        touch_batch: The number of reads whose times are kept in memory before they are written.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int,
+        *,
+        timeout: float = 30.0,
+        touch_batch: int = 100,
+    ):
+        self.path = os.fspath(path)
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.touch_batch = touch_batch
+        self._start_process()
+
+    def _start_process(self) -> None:
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._touches: dict[str, float] = {}
+        self._touches_lock = threading.Lock()
+
+    def _check_fork(self) -> None:
+        # Connections and locks inherited through fork must not be used, so a forked process starts afresh
+        if self._pid != os.getpid():
+            self._start_process()
+
+    def _connect(self) -> sqlite3.Connection:
+        self._check_fork()
+        connection: Optional[sqlite3.Connection] = getattr(
+            self._local, "connection", None
+        )
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def __len__(self) -> int:
+        with self._connect() as connection:
+            return connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    @property
+    def nbytes(self) -> int:
+        """The total size of the stored compressed bodies"""
+        with self._connect() as connection:
+            return connection.execute("SELECT size FROM totals").fetchone()[0]
+
+    def get(self, key: str) -> Optional[tuple[httpx.Response, float]]:
+        """Return a stored response and the number of seconds it remains valid, or None
+
+        Args:
+            key: The fingerprint of the request.
+        """
+        now = time.time()
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT expires_at, headers, body FROM results WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+        if row is None:
+            return None
+        self._touch(key, now)
+        expires_at, headers, body = row
+        response = httpx.Response(
+            200, headers=json.loads(headers), content=zlib.decompress(body)
+        )
+        return response, expires_at - now
+
+    def set(
+        self, key: str, datasource_luid: str, response: httpx.Response, ttl: float
+    ) -> None:
+        """Store a response, then remove expired and least recently read entries as needed
+
+        Args:
+            key: The fingerprint of the request.
+            datasource_luid: The LUID of the queried data source.
+            response: The successful response to store.
+            ttl: The number of seconds the response remains valid.
+        """
+        body = zlib.compress(response.content)
+        if len(body) > self.max_bytes:
+            return
+        headers = [
+            (name, value)
+            for name, value in response.headers.items()
+            if name.lower() not in _TRANSPORT_HEADERS
+        ]
+        now = time.time()
+        with self._connect() as connection:
+            # A replaced row is deleted first, since REPLACE does not fire the trigger keeping the total size
+            connection.execute("DELETE FROM results WHERE key = ?", (key,))
+            connection.execute(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    datasource_luid,
+                    now + ttl,
+                    now,
+                    len(body),
+                    json.dumps(headers),
+                    body,
+                ),
+            )
+        self.sweep()
+
+    def sweep(self) -> None:
+        """Remove expired entries, then the least recently read entries until the bodies fit in max_bytes"""
+        self.flush_touches()
+        with self._connect() as connection:
+            connection.execute(
+                "DELETE FROM results WHERE expires_at <= ?", (time.time(),)
+            )
+            total = connection.execute("SELECT size FROM totals").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            evicted = []
+            for key, size in connection.execute(
+                "SELECT key, size FROM results ORDER BY accessed_at"
+            ):
+                if total <= self.max_bytes:
+                    break
+                evicted.append((key,))
+                total -= size
+            connection.executemany("DELETE FROM results WHERE key = ?", evicted)
+
+    def _touch(self, key: str, accessed_at: float) -> None:
+        self._check_fork()
+        with self._touches_lock:
+            self._touches[key] = accessed_at
+            full = len(self._touches) >= self.touch_batch
+        if full:
+            self.flush_touches()
+
+    def flush_touches(self) -> None:
+        """Write the times entries were read that are still kept in memory"""
+        self._check_fork()
+        with self._touches_lock:
+            touches, self._touches = self._touches, {}
+        if touches:
+            with self._connect() as connection:
+                connection.executemany(
+                    "UPDATE results SET accessed_at = ? WHERE key = ?",
+                    [(accessed_at, key) for key, accessed_at in touches.items()],
+                )
+
+    def invalidate(self, key: str) -> bool:
+        """Remove the stored response for a request fingerprint, returning whether there was one"""
+        with self._connect() as connection:
+            cursor = connection.execute("DELETE FROM results WHERE key = ?", (key,))
+        return cursor.rowcount > 0
+
+    def invalidate_prefix(self, prefix: str) -> int:
+        """Remove the stored responses whose key starts with a prefix, returning how many there were"""
+        with self._connect() as connection:
+            return connection.execute(
+                "DELETE FROM results WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            ).rowcount
+
+    def invalidate_datasource(self, datasource_luid: str) -> int:
+        """Remove the stored responses of a data source, returning how many there were"""
+        with self._connect() as connection:
+            return connection.execute(
+                "DELETE FROM results WHERE datasource = ?", (datasource_luid,)
+            ).rowcount
+
+    def clear(self) -> None:
+        """Remove all stored responses"""
+        with self._connect() as connection:
+            connection.execute("DELETE FROM results")
+
+    def close(self) -> None:
+        """Write the pending read times and close the connection of the calling thread"""
+        self.flush_touches()
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+__all__ = ["DiskResultCache"]
@@ -1,5 +1,7 @@
 """Contains shared errors types that can be raised from API functions"""
 
+from .openapi_generated import TableauError
+
 
 class UnexpectedStatus(Exception):
     """Raised by api functions when the response status an undocumented status and Client.raise_on_unexpected_status is True"""
@@ -13,4 +15,27 @@ class UnexpectedStatus(Exception):
         )
 
 
-__all__ = ["UnexpectedStatus"]
+class QueryError(Exception):
+    """Raised by api functions that stream query results when the server reports an error in the result body"""
+
+    def __init__(self, error: TableauError):
+        self.error = error
+
+        super().__init__(
+            f"Query failed: {error.errorCode or 'unknown error'}\n\n{error.message or ''}"
+        )
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit breaker of its server and site is open"""
+
+    def __init__(self, key: str, retry_after: float):
+        self.key = key
+        self.retry_after = retry_after
+
+        super().__init__(
+            f"Circuit open for {key}: failing fast, retry in {retry_after:.1f}s"
+        )
+
+
+__all__ = ["CircuitOpenError", "QueryError", "UnexpectedStatus"]
@@ -0,0 +1,121 @@
+"""
+Fingerprint Module
+
+This module provides a canonical form and a stable hash of request models, so that requests which ask the
+server for the same thing can share a cache entry or an in-flight request.
+"""
+
+import hashlib
+import json
+from datetime import date, datetime, time
+from enum import Enum
+from typing import Any, Literal, get_origin
+
+from pydantic import BaseModel, RootModel
+
+from .openapi_generated import (
+    Datasource,
+    Query,
+    QueryRequest,
+    ReturnFormat,
+    SetFilter,
+)
+
+
+def _sort_key(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, RootModel):
+        return _canonical(value.root)
+    if isinstance(value, BaseModel):
+        return _canonical_model(value)
+    if isinstance(value, Enum):
+        return _canonical(value.value)
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return value
+
+
+def _canonical_model(model: BaseModel) -> dict[str, Any]:
+    members: dict[str, Any] = {}
+    for name, info in type(model).model_fields.items():
+        value = _canonical(getattr(model, name))
+        if value is None:
+            # Unset members are not sent, so the server applies its own default
+            continue
+        if not info.is_required() and get_origin(info.annotation) is not Literal:
+            # Defaults are dropped, except for the literal tags that tell filter variants apart
+            default = _canonical(info.get_default(call_default_factory=True))
+            if value == default or (default is None and value in ({}, [])):
+                continue
+        members[name] = value
+
+    if isinstance(model, SetFilter):
+        # The values of a set filter are a set, so their order and repetitions do not matter
+        values = {_sort_key(value): value for value in members.get("values", [])}
+        members["values"] = [values[key] for key in sorted(values)]
+    elif isinstance(model, Query):
+        # Filters are combined with AND and parameters are matched by caption, so their order does not matter
+        for name in ("filters", "parameters"):
+            if name in members:
+                members[name] = sorted(members[name], key=_sort_key)
+    elif isinstance(model, Datasource) and "connections" in members:
+        members["connections"] = sorted(members["connections"], key=_sort_key)
+    elif isinstance(model, QueryRequest):
+        return_format = members.get("options", {}).get("returnFormat")
+        fields = members["query"]["fields"]
+        if return_format == ReturnFormat.ARRAYS.value:
+            # Aliases only name the members of object rows
+            for field in fields:
+                field.pop("fieldAlias", None)
+        else:
+            # Object rows are keyed by field name, so the order of the fields does not matter
+            members["query"]["fields"] = sorted(fields, key=_sort_key)
+    return members
+
+
+def canonical_form(request: BaseModel) -> dict[str, Any]:
+    """Return the canonical form of a request model
+
+    Members that are unset or hold their default value are dropped, enums and dates are replaced by their JSON
+    values, and lists whose order does not change the result of a query (filters, parameters, set filter values,
+    data source connections, and the fields of a query returning objects) are sorted.
+
+    Args:
+        request: The request model, such as a QueryRequest or ReadMetadataRequest.
+
+    Returns:
+        dict[str, Any]: A JSON-compatible dictionary that is equal for requests asking for the same result.
+    """
+    return _canonical_model(request)
+
+
+def fingerprint(request: BaseModel) -> str:
+    """Return a stable hash of a request model
+
+    Requests with equal canonical forms, see canonical_form(), have the same fingerprint. The type of the request
+    is part of the fingerprint, so requests to different endpoints never share one.
+
+    Args:
+        request: The request model, such as a QueryRequest or ReadMetadataRequest.
+
+    Returns:
+        str: The hexadecimal SHA-256 digest of the canonical form of the request.
+    """
+    payload = json.dumps(
+        [type(request).__name__, canonical_form(request)],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+__all__ = ["canonical_form", "fingerprint"]
@@ -1,9 +1,12 @@
+from functools import partial
 from http import HTTPStatus
 from typing import Any, Optional
 
 import httpx
 
+from .cache import EncodedBodyCache, encode_body
 from .client import VizQLDataServiceClient
+from .coalesce import asend_request, send_request
 from .errors import UnexpectedStatus
 from .openapi_generated import DatasourceModelOutput, GetDatasourceModelRequest
 from .types import Response
@@ -12,6 +15,7 @@ from .types import Response
 def _get_kwargs(
     *,
     body: GetDatasourceModelRequest,
+    body_cache: Optional[EncodedBodyCache] = None,
 ) -> dict[str, Any]:
     headers: dict[str, Any] = {}
 
@@ -20,8 +24,7 @@ def _get_kwargs(
         "url": "/get-datasource-model",
     }
 
-    _body = body.model_dump(mode="json", exclude_none=True)
-    _kwargs["json"] = _body
+    _kwargs["content"] = encode_body(body, body_cache)
     headers["Content-Type"] = "application/json"
 
     _kwargs["headers"] = headers
@@ -44,11 +47,20 @@ def _parse_response(
 def _build_response(
     *, client: VizQLDataServiceClient, response: httpx.Response
 ) -> Response[DatasourceModelOutput]:
+    if response.status_code != 200:
+        # Unexpected statuses are still raised when the response is built
+        return Response(
+            status_code=HTTPStatus(response.status_code),
+            content=response.content,
+            headers=response.headers,
+            parsed=_parse_response(client=client, response=response),
+        )
     return Response(
         status_code=HTTPStatus(response.status_code),
         content=response.content,
         headers=response.headers,
-        parsed=_parse_response(client=client, response=response),
+        parser=partial(_parse_response, client=client, response=response),
+        release_content=client.release_content,
     )
 
 
@@ -78,11 +90,10 @@ def sync_detailed(
 
     kwargs = _get_kwargs(
         body=body,
+        body_cache=client.body_cache,
     )
 
-    response = client.client.get_httpx_client().request(
-        **kwargs,
-    )
+    response = send_request(client, body, kwargs)
 
     return _build_response(client=client, response=response)
 
@@ -127,6 +138,8 @@ async def asyncio_detailed(
     - Response headers
     - Raw response content
 
+    When the client has a hedging policy, a slow request is sent again and the first response is used.
+
     Args:
         body (GetDatasourceModelRequest): The data source model request parameters.
 
@@ -140,9 +153,10 @@ async def asyncio_detailed(
 
     kwargs = _get_kwargs(
         body=body,
+        body_cache=client.body_cache,
     )
 
-    response = await client.client.get_async_httpx_client().request(**kwargs)
+    response = await asend_request(client, body, kwargs, hedged=True)
 
     return _build_response(client=client, response=response)
 
@@ -0,0 +1,151 @@
+"""
+Hedging Module
+
+This module sends a second copy of a slow read-only request once it has taken longer than most requests of its
+endpoint, and keeps whichever response arrives first, trimming the latency tail caused by slow server nodes.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable
+from typing import Callable, Optional
+
+import httpx
+
+from .circuit_breaker import FAILURE_STATUSES
+
+
+class HedgingPolicy:
+    """When to hedge the async requests of read-only endpoints, and how many hedges to allow
+
+    The latencies of the last ``window`` responses of each endpoint are kept. Once an endpoint has
+    ``min_samples`` of them, a request still without a response after their ``percentile`` latency, but no
+    less than ``min_delay``, is sent again, and the first successful response of the two is used. The request left
+    behind is cancelled, which closes its connection. A 502, 503 or 504 response or a network error of one copy
+    waits for the other, and is returned only if both fail.
+
+    Hedges are limited by a budget: each request adds ``max_hedge_ratio`` tokens, up to ``max_tokens``, and each
+    hedge takes one, so hedges add at most about ``max_hedge_ratio`` of extra load.
+
+    Args:
+        percentile: The percentile of recent latencies after which a request is hedged, between 0 and 1.
+        window: The number of recent latencies of each endpoint kept.
+        min_samples: The number of latencies of an endpoint needed before its requests are hedged.
+        min_delay: The shortest wait in seconds before a request is hedged.
+        max_hedge_ratio: The largest fraction of requests hedged.
+        max_tokens: The largest number of hedges that can be sent in a burst.
+        hedge_queries: Whether query_datasource requests are hedged, for data sources whose results are cached
+            by the result_cache of the client. Queries are read-only but can be expensive for the server.
+        clock: The monotonic clock used to time requests, in seconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        percentile: float = 0.95,
+        window: int = 200,
+        min_samples: int = 20,
+        min_delay: float = 0.0,
+        max_hedge_ratio: float = 0.1,
+        max_tokens: float = 10.0,
+        hedge_queries: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not 0 < percentile < 1:
+            raise ValueError("percentile must be between 0 and 1")
+        if min_samples < 1 or window < min_samples:
+            raise ValueError("min_samples must be at least 1 and at most window")
+        self.percentile = percentile
+        self.window = window
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.max_tokens = max_tokens
+        self.hedge_queries = hedge_queries
+        self.clock = clock
+        self._latencies: dict[str, deque[float]] = {}
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def delay(self, endpoint: str) -> Optional[float]:
+        """Return the wait in seconds before hedging a request to an endpoint, or None if it is not hedged yet"""
+        with self._lock:
+            latencies = sorted(self._latencies.get(endpoint, ()))
+        if len(latencies) < self.min_samples:
+            return None
+        rank = min(len(latencies) - 1, math.ceil(self.percentile * len(latencies)) - 1)
+        return max(self.min_delay, latencies[rank])
+
+    def record(self, endpoint: str, latency: float) -> None:
+        """Record the latency of a response, and the tokens its request adds to the hedge budget"""
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None:
+                latencies = self._latencies[endpoint] = deque(maxlen=self.window)
+            latencies.append(latency)
+            self._tokens = min(self.max_tokens, self._tokens + self.max_hedge_ratio)
+
+    def take_hedge(self) -> bool:
+        """Take a token from the hedge budget, returning whether a hedge may be sent"""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+async def hedge(
+    policy: HedgingPolicy,
+    endpoint: str,
+    send: Callable[[], Awaitable[httpx.Response]],
+) -> httpx.Response:
+    """Send a request, and send it again if it is slow, returning the first response
+
+    Args:
+        policy: The hedging policy.
+        endpoint: The endpoint of the request, whose recent latencies decide when it is hedged.
+        send: The function sending the request, called once more for a hedge.
+
+    Returns:
+        httpx.Response: The first successful response received. A failed response is returned, or an exception
+            raised, only once every copy has failed.
+    """
+
+    # Latencies are measured from the original request, as seen by the caller
+    started = policy.clock()
+    tasks = {asyncio.ensure_future(send())}
+    try:
+        delay = policy.delay(endpoint)
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and policy.take_hedge():
+                tasks.add(asyncio.ensure_future(send()))
+        failed: Optional[httpx.Response] = None
+        error: Optional[BaseException] = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    error = error or task.exception()
+                elif task.result().status_code in FAILURE_STATUSES:
+                    # A fast failure of a sick node must not beat a slower success of the other copy
+                    failed = failed or task.result()
+                else:
+                    policy.record(endpoint, policy.clock() - started)
+                    return task.result()
+        if failed is not None:
+            return failed
+        assert error is not None
+        raise error
+    finally:
+        # The request left behind is cancelled and waited for, so its connection is closed before returning
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks)
+
+
+__all__ = ["HedgingPolicy", "hedge"]
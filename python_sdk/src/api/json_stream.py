@@ -0,0 +1,164 @@
+"""
+Incremental JSON Module
+
+This module provides a decoder that extracts the rows of a ``QueryOutput`` body while it is being received,
+without holding the whole body or the whole row list in memory.
+"""
+
+import codecs
+import json
+from typing import Any, Optional
+
+_WHITESPACE = " \t\n\r"
+
+# Decoder states
+_START = 0  # expecting the opening brace of the body
+_KEY = 1  # expecting a member name or the closing brace
+_COLON = 2  # expecting the colon after a member name
+_VALUE = 3  # expecting a member value that is not the row array
+_ARRAY = 4  # expecting the opening bracket of the row array
+_ROW = 5  # expecting a row or the closing bracket of the row array
+_AFTER_ROW = 6  # expecting a comma or the closing bracket of the row array
+_AFTER_VALUE = 7  # expecting a comma or the closing brace of the body
+_DONE = 8
+
+
+class RowArrayDecoder:
+    """Incrementally decode the ``data`` array of a JSON object fed in byte chunks
+
+    Each row is decoded as soon as its closing character has been received, and only the undecoded tail
+    of the body is buffered. Other members of the object, such as ``error``, are decoded whole and kept in
+    ``members``.
+
+    Args:
+        key: The name of the member holding the row array.
+    """
+
+    def __init__(self, key: str = "data"):
+        self.key = key
+        self.members: dict[str, Any] = {}
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._retry_at = 0
+        self._state = _START
+        self._member: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        """Feed the next chunk of the body and return the rows it completes"""
+        pos = self._pos
+        self._buffer = self._buffer[pos:] + self._utf8.decode(chunk)
+        self._retry_at -= pos
+        self._pos = 0
+        if len(self._buffer) < self._retry_at:
+            return []
+        return self._decode(final=False)
+
+    def close(self) -> list[Any]:
+        """Signal the end of the body and return any remaining rows
+
+        Raises:
+            json.JSONDecodeError: If the body is not a complete JSON object.
+        """
+        pos = self._pos
+        self._buffer = self._buffer[pos:] + self._utf8.decode(b"", final=True)
+        self._pos = 0
+        rows = self._decode(final=True)
+        if self._state != _DONE or self._skip_whitespace() is not None:
+            raise json.JSONDecodeError(
+                "Incomplete JSON body", self._buffer, len(self._buffer)
+            )
+        return rows
+
+    def _skip_whitespace(self) -> Optional[str]:
+        buffer = self._buffer
+        pos = self._pos
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        return buffer[pos] if pos < len(buffer) else None
+
+    def _expect(self, char: str) -> None:
+        raise json.JSONDecodeError(f"Expecting {char}", self._buffer, self._pos)
+
+    def _raw_decode(self, final: bool) -> tuple[bool, Any]:
+        """Decode the value at the current position, reporting False if more input is needed"""
+        start = self._pos
+        try:
+            value, end = self._json.raw_decode(self._buffer, start)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            # Wait for the buffered tail to double before trying again, so a value spanning many
+            # chunks is not re-scanned from its start on every chunk
+            self._retry_at = start + 2 * (len(self._buffer) - start)
+            return False, None
+        if end == len(self._buffer) and not final:
+            # A value ending exactly at the end of the input may be a number that continues in the next chunk
+            return False, None
+        self._pos = end
+        self._retry_at = 0
+        return True, value
+
+    def _decode(self, final: bool) -> list[Any]:
+        rows: list[Any] = []
+        while self._state != _DONE:
+            char = self._skip_whitespace()
+            if char is None:
+                break
+
+            if self._state == _START:
+                if char != "{":
+                    self._expect("'{'")
+                self._pos += 1
+                self._state = _KEY
+            elif self._state == _KEY:
+                if char == "}":
+                    self._pos += 1
+                    self._state = _DONE
+                    continue
+                if char != '"':
+                    self._expect("property name enclosed in double quotes")
+                complete, self._member = self._raw_decode(final)
+                if not complete:
+                    break
+                self._state = _COLON
+            elif self._state == _COLON:
+                if char != ":":
+                    self._expect("':' delimiter")
+                self._pos += 1
+                self._state = _ARRAY if self._member == self.key else _VALUE
+            elif self._state == _ARRAY and char == "[":
+                self._pos += 1
+                self._state = _ROW
+            elif self._state in (_ARRAY, _VALUE):
+                complete, value = self._raw_decode(final)
+                if not complete:
+                    break
+                self.members[self._member or ""] = value
+                self._state = _AFTER_VALUE
+            elif self._state == _ROW:
+                if char == "]":
+                    self._pos += 1
+                    self._state = _AFTER_VALUE
+                    continue
+                complete, value = self._raw_decode(final)
+                if not complete:
+                    break
+                rows.append(value)
+                self._state = _AFTER_ROW
+            elif self._state == _AFTER_ROW:
+                if char not in ",]":
+                    self._expect("',' delimiter")
+                self._pos += 1
+                self._state = _ROW if char == "," else _AFTER_VALUE
+            elif self._state == _AFTER_VALUE:
+                if char not in ",}":
+                    self._expect("',' delimiter")
+                self._pos += 1
+                self._state = _KEY if char == "," else _DONE
+        return rows
+
+
+__all__ = ["RowArrayDecoder"]
@@ -0,0 +1,272 @@
+"""
+Concurrency Limiter Module
+
+This module provides an async transport that limits the number of requests in flight, adapting the limit to the
+latency and overload responses of the server, so that a fan-out of queries neither underuses an idle server nor
+overloads a busy one.
+"""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from typing import Callable, Optional
+
+import httpx
+from attrs import define
+
+# Responses showing that the server is shedding load
+OVERLOAD_STATUSES = frozenset({429, 503})
+
+
+@define
+class Permit:
+    """A slot of an AdaptiveLimiter held by a request
+
+    Attributes:
+        started: The time the request started.
+        in_flight: The number of requests in flight when it started, including itself.
+    """
+
+    started: float
+    in_flight: int
+
+
+@define
+class LimiterStats:
+    """A snapshot of the state of an AdaptiveLimiter
+
+    Attributes:
+        limit: The number of requests allowed in flight.
+        in_flight: The number of requests in flight.
+        queued: The number of requests waiting for a slot.
+        latency: The short-term moving average of response times in seconds, or None before the first response.
+        baseline_latency: The long-term moving average of response times in seconds, or None before the first
+            response.
+    """
+
+    limit: int
+    in_flight: int
+    queued: int
+    latency: Optional[float]
+    baseline_latency: Optional[float]
+
+
+class AdaptiveLimiter:
+    """Limit the requests in flight, adapting the limit to the latency and overload responses of the server
+
+    The limit follows additive increase, multiplicative decrease (AIMD). A response without sign of overload, to
+    a request sent while at least half of the limit was in use, raises the limit by ``1 / limit``, so the limit
+    grows by up to one request per round trip while the server keeps up. The limit is multiplied by ``backoff_ratio``
+    on a response with a status in ``overload_statuses``, on a timeout, or when the short-term average latency
+    exceeds ``latency_tolerance`` times the long-term average. It is reduced at most once per round trip, by
+    ignoring signals from requests sent before the last reduction.
+
+    Requests over the limit wait in first-in, first-out order. The latency of a request is measured when its
+    response headers arrive, but its slot is held until the response is closed, so streamed responses must be
+    closed to free their slot. The limiter is bound to the event loop using it.
+
+    Args:
+        initial_limit: The number of requests allowed in flight before any response is received.
+        min_limit: The lowest limit.
+        max_limit: The highest limit, which should not exceed the connection limit of the client.
+        backoff_ratio: The factor applied to the limit on overload, between 0 and 1.
+        latency_tolerance: The ratio of the short-term to the long-term average latency treated as overload.
+        overload_statuses: The response statuses treated as overload.
+        clock: The monotonic clock used to time responses, in seconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 100,
+        backoff_ratio: float = 0.7,
+        latency_tolerance: float = 2.0,
+        overload_statuses: frozenset[int] = OVERLOAD_STATUSES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError(
+                "Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit"
+            )
+        if not 0 < backoff_ratio < 1:
+            raise ValueError("backoff_ratio must be between 0 and 1")
+        if latency_tolerance <= 1:
+            raise ValueError("latency_tolerance must be greater than 1")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.overload_statuses = overload_statuses
+        self.clock = clock
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._latency: Optional[float] = None
+        self._baseline_latency: Optional[float] = None
+        self._last_decrease = float("-inf")
+
+    @property
+    def limit(self) -> int:
+        """The number of requests allowed in flight"""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """The number of requests in flight"""
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        """The number of requests waiting for a slot"""
+        return sum(not waiter.done() for waiter in self._waiters)
+
+    def stats(self) -> LimiterStats:
+        """Return a snapshot of the limit, the requests in flight and queued, and the latency averages"""
+        return LimiterStats(
+            self.limit,
+            self._in_flight,
+            self.queued,
+            self._latency,
+            self._baseline_latency,
+        )
+
+    async def acquire(self) -> Permit:
+        """Wait for a slot, returning the permit to pass to release()"""
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return Permit(self.clock(), self._in_flight)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over as the request was cancelled, so it goes to the next one
+                self._in_flight -= 1
+                self._wake()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+        return Permit(self.clock(), self._in_flight)
+
+    def release(self, permit: Permit, overloaded: bool = False) -> None:
+        """Free the slot of a request and adapt the limit to its outcome
+
+        Args:
+            permit: The permit returned by acquire().
+            overloaded: Whether the request failed in a way showing that the server is overloaded.
+        """
+        self.observe(permit, overloaded)
+        self.cancel()
+
+    def observe(self, permit: Permit, overloaded: bool = False) -> None:
+        """Adapt the limit to the outcome of a request, keeping its slot until cancel() is called
+
+        Args:
+            permit: The permit returned by acquire().
+            overloaded: Whether the request failed in a way showing that the server is overloaded.
+        """
+        now = self.clock()
+        if overloaded:
+            self._decrease(permit.started, now)
+        else:
+            latency = now - permit.started
+            if self._latency is None or self._baseline_latency is None:
+                self._latency = self._baseline_latency = latency
+            else:
+                self._latency += 0.2 * (latency - self._latency)
+                self._baseline_latency += 0.02 * (latency - self._baseline_latency)
+            if self._latency > self.latency_tolerance * self._baseline_latency:
+                self._decrease(permit.started, now)
+            elif 2 * permit.in_flight >= self._limit:
+                # Only a limit that is in use is raised, so an idle client does not grow it without bound
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+    def cancel(self) -> None:
+        """Free the slot of a request without learning from it, as when it was cancelled or already observed"""
+        self._in_flight -= 1
+        self._wake()
+
+    def _decrease(self, started: float, now: float) -> None:
+        # Requests sent before the last decrease reflect the load before it, so they do not decrease it again
+        if started >= self._last_decrease:
+            self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+            self._last_decrease = now
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """A response stream that calls a function once when it is closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[], None]):
+        self._stream = stream
+        self._on_close: Optional[Callable[[], None]] = on_close
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._on_close is not None:
+                on_close, self._on_close = self._on_close, None
+                on_close()
+
+
+class AsyncLimitTransport(httpx.AsyncBaseTransport):
+    """An async transport sending requests through another transport within the limit of an AdaptiveLimiter
+
+    Args:
+        transport: The transport sending each request.
+        limiter: The limiter shared by the requests of the client.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: AdaptiveLimiter):
+        self.transport = transport
+        self.limiter = limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        permit = await self.limiter.acquire()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except httpx.TimeoutException:
+            self.limiter.release(permit, overloaded=True)
+            raise
+        except BaseException:
+            self.limiter.cancel()
+            raise
+        # The latency ends with the response headers, so a slow reader of a streamed body is not taken for overload
+        self.limiter.observe(
+            permit, response.status_code in self.limiter.overload_statuses
+        )
+        # A response whose body was read by the transport is already closed, so its slot is freed now
+        if not response.is_closed and isinstance(
+            response.stream, httpx.AsyncByteStream
+        ):
+            response.stream = _ReleasingStream(response.stream, self.limiter.cancel)
+        else:
+            self.limiter.cancel()
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+__all__ = [
+    "AdaptiveLimiter",
+    "AsyncLimitTransport",
+    "LimiterStats",
+    "OVERLOAD_STATUSES",
+    "Permit",
+]
@@ -0,0 +1,215 @@
+"""
+Load Balancing Module
+
+This module provides httpx transports that spread requests over several base URLs of the same Tableau deployment,
+such as the addresses of its nodes, choosing the node with fewer requests outstanding and ejecting failing nodes
+for a while.
+"""
+
+import random
+import threading
+import time
+from collections.abc import Sequence
+from typing import Callable, Optional
+
+import httpx
+from attrs import define
+
+from .circuit_breaker import FAILURE_ERRORS, FAILURE_STATUSES
+
+
+@define
+class LoadBalancingPolicy:
+    """When to eject a failing node from load balancing, and for how long
+
+    A node is ejected after ``failure_threshold`` consecutive timeouts, network errors or 502, 503 or 504
+    responses. Its n-th consecutive ejection lasts ``min(max_ejection_time, ejection_time * 2 ** (n - 1))``
+    seconds, and a successful request after it returns resets the count.
+
+    Attributes:
+        failure_threshold: The number of consecutive failures ejecting a node.
+        ejection_time: The number of seconds of the first ejection of a node.
+        max_ejection_time: The longest ejection in seconds.
+    """
+
+    failure_threshold: int = 3
+    ejection_time: float = 30.0
+    max_ejection_time: float = 300.0
+
+    def __attrs_post_init__(self) -> None:
+        if self.failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+
+
+@define
+class Endpoint:
+    """A node of a LoadBalancer and its health
+
+    Attributes:
+        url: The base URL of the node.
+        outstanding: The number of requests sent to the node and awaiting a response.
+        failures: The number of consecutive failures of the node.
+        ejections: The number of consecutive ejections of the node.
+        ejected_until: The time until which the node is ejected.
+    """
+
+    url: str
+    outstanding: int = 0
+    failures: int = 0
+    ejections: int = 0
+    ejected_until: float = float("-inf")
+
+
+class LoadBalancer:
+    """Spread requests over several base URLs with the power of two choices
+
+    Each request goes to the node with fewer requests outstanding out of two nodes picked at random among those
+    not ejected, which keeps the load of the nodes close without tracking them all. When every node is ejected,
+    requests go to the node whose ejection ends first rather than failing.
+
+    The nodes must accept the same session token, so they should belong to the same Tableau deployment.
+
+    Args:
+        urls: The base URLs of the nodes, such as https://node1.example.com/api/v1/vizql-data-service.
+        policy: The policy ejecting failing nodes, or None for the default policy.
+        clock: The monotonic clock used to time ejections, in seconds.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        policy: Optional[LoadBalancingPolicy] = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not urls:
+            raise ValueError("At least one URL is required")
+        self.endpoints = [Endpoint(url.rstrip("/")) for url in urls]
+        self.policy = policy or LoadBalancingPolicy()
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    def healthy(self) -> list[Endpoint]:
+        """Return the nodes that are not ejected"""
+        now = self.clock()
+        return [
+            endpoint for endpoint in self.endpoints if endpoint.ejected_until <= now
+        ]
+
+    def choose(self) -> Endpoint:
+        """Pick the node of the next request and count the request as outstanding on it"""
+        with self._lock:
+            candidates = self.healthy() or [
+                min(self.endpoints, key=lambda endpoint: endpoint.ejected_until)
+            ]
+            if len(candidates) == 1:
+                endpoint = candidates[0]
+            else:
+                first, second = random.sample(candidates, 2)
+                endpoint = first if first.outstanding <= second.outstanding else second
+            endpoint.outstanding += 1
+            return endpoint
+
+    def record(self, endpoint: Endpoint, failed: bool) -> None:
+        """Record the outcome of a request sent to a node, ejecting it after enough consecutive failures"""
+        with self._lock:
+            endpoint.outstanding -= 1
+            if not failed:
+                endpoint.failures = endpoint.ejections = 0
+                return
+            endpoint.failures += 1
+            if endpoint.failures >= self.policy.failure_threshold:
+                endpoint.failures = 0
+                endpoint.ejections += 1
+                endpoint.ejected_until = self.clock() + min(
+                    self.policy.max_ejection_time,
+                    self.policy.ejection_time * 2 ** (endpoint.ejections - 1),
+                )
+
+    def cancel(self, endpoint: Endpoint) -> None:
+        """Stop counting a request that ended without an outcome, such as when cancelled"""
+        with self._lock:
+            endpoint.outstanding -= 1
+
+    def route(self, request: httpx.Request, endpoint: Endpoint) -> bool:
+        """Point a request for any of the nodes at the given node, returning False for a request to another URL"""
+        url = str(request.url)
+        for other in sorted(self.endpoints, key=lambda other: -len(other.url)):
+            if url == other.url or url.startswith(f"{other.url}/"):
+                request.url = httpx.URL(endpoint.url + url.removeprefix(other.url))
+                request.headers["Host"] = request.url.netloc.decode("ascii")
+                return True
+        return False
+
+
+class LoadBalancingTransport(httpx.BaseTransport):
+    """A transport sending each request through another transport to the node chosen by a load balancer
+
+    Args:
+        transport: The transport sending each request.
+        balancer: The load balancer of the nodes.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, balancer: LoadBalancer):
+        self.transport = transport
+        self.balancer = balancer
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = self.balancer.choose()
+        if not self.balancer.route(request, endpoint):
+            self.balancer.cancel(endpoint)
+            return self.transport.handle_request(request)
+        try:
+            response = self.transport.handle_request(request)
+        except FAILURE_ERRORS:
+            self.balancer.record(endpoint, failed=True)
+            raise
+        except BaseException:
+            self.balancer.cancel(endpoint)
+            raise
+        self.balancer.record(endpoint, response.status_code in FAILURE_STATUSES)
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncLoadBalancingTransport(httpx.AsyncBaseTransport):
+    """An async transport sending each request through another transport to the node chosen by a load balancer
+
+    Args:
+        transport: The transport sending each request.
+        balancer: The load balancer of the nodes.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, balancer: LoadBalancer):
+        self.transport = transport
+        self.balancer = balancer
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = self.balancer.choose()
+        if not self.balancer.route(request, endpoint):
+            self.balancer.cancel(endpoint)
+            return await self.transport.handle_async_request(request)
+        try:
+            response = await self.transport.handle_async_request(request)
+        except FAILURE_ERRORS:
+            self.balancer.record(endpoint, failed=True)
+            raise
+        except BaseException:
+            self.balancer.cancel(endpoint)
+            raise
+        self.balancer.record(endpoint, response.status_code in FAILURE_STATUSES)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+__all__ = [
+    "AsyncLoadBalancingTransport",
+    "Endpoint",
+    "LoadBalancer",
+    "LoadBalancingPolicy",
+    "LoadBalancingTransport",
+]
@@ -0,0 +1,400 @@
+"""
+Pagination Module
+
+This module pages through the result of a sorted query with keyset pagination: each page is a query for at most a
+page of rows, filtered to the rows sorted after the last row of the previous page.
+"""
+
+import base64
+import binascii
+import json
+from collections.abc import AsyncIterator, Iterator
+from datetime import date
+from typing import Any, Callable, Optional, Union
+
+from attrs import define
+
+from .client import VizQLDataServiceClient
+from .columnar import column_name
+from .errors import QueryError
+from .fingerprint import fingerprint
+from .openapi_generated import (
+    CalculatedField,
+    CalculatedFilterField,
+    DimensionField,
+    DimensionFilterField,
+    Field,
+    FilterField,
+    Function,
+    MeasureField,
+    MeasureFilterField,
+    QuantitativeDateFilter,
+    QuantitativeFilterType,
+    QuantitativeNumericalFilter,
+    QueryDatasourceOptions,
+    QueryRequest,
+    ReturnFormat,
+    SortDirection,
+    TabFilter,
+    TableauError,
+)
+from .query_datasource import asyncio_detailed, sync_detailed
+from .types import Response
+
+# Kinds of sort key, which decide the filter used to skip the rows of previous pages
+_NUMBER = "number"
+_DATE = "date"
+
+# Phases of an iteration: rows with a sort key, then rows without one
+_ROWS = "rows"
+_NULLS = "nulls"
+_DONE = "done"
+
+
+@define
+class Page:
+    """A page of query results
+
+    Attributes:
+        rows: The rows of the page, in the order of the query.
+        cursor: A token that resumes the iteration after this page when passed to iter_pages().
+    """
+
+    rows: list[Any]
+    cursor: str
+
+
+@define
+class _Cursor:
+    query: str
+    phase: str = _ROWS
+    key: Any = None
+    kind: Optional[str] = None
+    returned: int = 0
+
+    def encode(self) -> str:
+        payload = json.dumps(
+            [self.query, self.phase, self.key, self.kind, self.returned],
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @classmethod
+    def decode(cls, token: str, query: str) -> "_Cursor":
+        try:
+            members = json.loads(base64.urlsafe_b64decode(token.encode()))
+            cursor = cls(*members)
+        except (binascii.Error, TypeError, ValueError) as error:
+            raise ValueError("Invalid pagination cursor") from error
+        if cursor.query != query:
+            raise ValueError("The pagination cursor belongs to a different query")
+        return cursor
+
+
+def _sort_field(body: QueryRequest) -> tuple[int, Field]:
+    sorted_fields = [
+        (field.root.sortPriority, position, field)
+        for position, field in enumerate(body.query.fields)
+        if field.root.sortPriority is not None
+    ]
+    if not sorted_fields:
+        raise ValueError("Keyset pagination needs a query sorted by at least one field")
+    _, position, field = min(sorted_fields, key=lambda item: item[0])
+    return position, field
+
+
+def _filter_field(field: Field) -> FilterField:
+    root = field.root
+    if isinstance(root, DimensionField) or (
+        isinstance(root, MeasureField)
+        and root.function in (Function.NONE, Function.UNSPECIFIED)
+    ):
+        return FilterField(
+            root=DimensionFilterField(fieldCaption=str(root.fieldCaption))
+        )
+    if isinstance(root, MeasureField):
+        return FilterField(
+            root=MeasureFilterField(
+                fieldCaption=str(root.fieldCaption), function=root.function
+            )
+        )
+    if isinstance(root, CalculatedField):
+        return FilterField(root=CalculatedFilterField(calculation=root.calculation))
+    raise ValueError(
+        f"Cannot page on {column_name(field)}, which cannot be filtered on"
+    )
+
+
+def _key_kind(field: Field, value: Any) -> str:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return _NUMBER
+    if isinstance(value, str):
+        try:
+            date.fromisoformat(value)
+            return _DATE
+        except ValueError:
+            pass
+        try:
+            date.fromisoformat(value[:10])
+        except ValueError:
+            pass
+        else:
+            # Date filters only bound a day, so each page would fetch again every earlier row of its day
+            raise ValueError(
+                f"Cannot page on {column_name(field)}: keyset pagination does not support date time sort keys. "
+                "Sort first on a date, such as the field truncated to its day, or on a number"
+            )
+    raise ValueError(
+        f"Cannot page on {column_name(field)}: keyset pagination needs a numeric or date sort key"
+    )
+
+
+class _Pager:
+    """The state of a keyset pagination, independent of how requests are sent
+
+    Each page requests page_size rows sorted after the key of the last returned row. The rows sharing the last
+    key of a full page are held back and requested again with the next page, so that no row is returned twice
+    or skipped. A page whose rows all share a key is requested again with twice as many rows. The rows without a
+    key cannot be told apart by a filter, so they are requested the same way, with twice as many rows until they
+    all fit.
+    """
+
+    def __init__(self, body: QueryRequest, page_size: int, cursor: Optional[str]):
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        self.body = body
+        self.page_size = page_size
+        self.limit = page_size
+        self.position, self.field = _sort_field(body)
+        self.filter_field = _filter_field(self.field)
+        self.descending = self.field.root.sortDirection == SortDirection.DESC
+        self.row_limit = body.options.rowLimit if body.options else None
+        if body.options and body.options.returnFormat == ReturnFormat.ARRAYS:
+            self.get: Callable[[Any], Any] = lambda row: row[self.position]
+        else:
+            name = column_name(self.field)
+            self.get = lambda row: row.get(name)
+        query = fingerprint(body)
+        self.cursor = (
+            _Cursor(query) if cursor is None else _Cursor.decode(cursor, query)
+        )
+
+    @property
+    def done(self) -> bool:
+        return self.cursor.phase == _DONE
+
+    def _key_filter(self) -> Optional[TabFilter]:
+        cursor = self.cursor
+        bounds: dict[str, Any] = {}
+        if cursor.phase == _NULLS:
+            filter_type = QuantitativeFilterType.ONLY_NULL
+        elif cursor.key is not None:
+            filter_type = (
+                QuantitativeFilterType.MAX
+                if self.descending
+                else QuantitativeFilterType.MIN
+            )
+            bound = "max" if self.descending else "min"
+            if cursor.kind == _NUMBER:
+                bounds[bound] = cursor.key
+            else:
+                bounds[f"{bound}Date"] = date.fromisoformat(cursor.key)
+        else:
+            return None
+        key_filter: Union[QuantitativeNumericalFilter, QuantitativeDateFilter]
+        if cursor.kind == _NUMBER:
+            key_filter = QuantitativeNumericalFilter(
+                field=self.filter_field,
+                quantitativeFilterType=filter_type,
+                includeNulls=False,
+                **bounds,
+            )
+        else:
+            key_filter = QuantitativeDateFilter(
+                field=self.filter_field,
+                quantitativeFilterType=filter_type,
+                includeNulls=False,
+                **bounds,
+            )
+        return TabFilter(root=key_filter)
+
+    def request(self) -> QueryRequest:
+        """Return the query for the next page"""
+        key_filter = self._key_filter()
+        filters = list(self.body.query.filters or [])
+        if key_filter is not None:
+            filters.append(key_filter)
+        options = self.body.options or QueryDatasourceOptions()
+        return self.body.model_copy(
+            update={
+                "query": self.body.query.model_copy(
+                    update={"filters": filters or None}
+                ),
+                "options": options.model_copy(update={"rowLimit": self._row_limit()}),
+            }
+        )
+
+    def _row_limit(self) -> int:
+        if self.cursor.phase == _NULLS and self.row_limit is not None:
+            return min(self.limit, self.row_limit - self.cursor.returned)
+        return self.limit
+
+    def _after_cursor(self, key: Any) -> bool:
+        cursor_key = self.cursor.key
+        if key is None:
+            return False
+        if cursor_key is None:
+            return True
+        return key <= cursor_key if self.descending else key >= cursor_key
+
+    def accept(self, rows: list[Any]) -> Optional[Page]:
+        """Advance past the rows of a page, returning the page, or None if it must be requested again"""
+        cursor = self.cursor
+        if cursor.phase == _NULLS:
+            remaining = (
+                None if self.row_limit is None else self.row_limit - cursor.returned
+            )
+            if len(rows) >= self.limit and (remaining is None or len(rows) < remaining):
+                self.limit *= 2
+                return None
+            cursor.phase = _DONE
+            return self._page(rows)
+
+        kept = [row for row in rows if self._after_cursor(self.get(row))]
+        if kept and cursor.kind is None:
+            cursor.kind = _key_kind(self.field, self.get(kept[0]))
+
+        # A short page, or one ending with null keys sorted last, holds every remaining row with a key
+        if len(rows) < self.limit or (kept and self.get(rows[-1]) is None):
+            if cursor.kind is None:
+                # No row has a key, so the rows without one were all returned without a filter
+                cursor.phase = _DONE
+                return self._page(rows)
+            cursor.phase = _NULLS
+            self.limit = self.page_size
+            return self._page(kept)
+
+        last = self.get(kept[-1]) if kept else None
+        returned = [row for row in kept if self.get(row) != last]
+        if not returned:
+            self.limit *= 2
+            return None
+        self.limit = self.page_size
+        cursor.key = last
+        return self._page(returned)
+
+    def _page(self, rows: list[Any]) -> Page:
+        if self.row_limit is not None:
+            rows = rows[: self.row_limit - self.cursor.returned]
+            if self.cursor.returned + len(rows) >= self.row_limit:
+                self.cursor.phase = _DONE
+        self.cursor.returned += len(rows)
+        return Page(rows, self.cursor.encode())
+
+
+def _rows(response: Response) -> Optional[list[Any]]:
+    if response.status_code != 200:
+        # Unexpected statuses were raised when the response was built, if the client raises them
+        return None
+    output = response.parsed
+    if output is None:
+        return None
+    if output.error:
+        raise QueryError(TableauError.model_validate(output.error))
+    return output.data or []
+
+
+def iter_pages(
+    *,
+    client: VizQLDataServiceClient,
+    body: QueryRequest,
+    page_size: int,
+    cursor: Optional[str] = None,
+    fast_decode: Optional[bool] = None,
+) -> Iterator[Page]:
+    """Query data source one page of rows at a time with keyset pagination
+
+     The query must be sorted, and its first sort field must be a number or a date. Date times are rejected,
+     since filters can only bound them by day: sort first on the date, or a number, instead. Each page is
+     requested with a rowLimit of page_size and a filter on that field skipping the rows of previous pages, so
+     memory use is bounded by the size of a page. Rows sharing the sort key of the last row of a full page are
+     returned with the next page, so a page may hold fewer rows than page_size, or more when more than page_size
+     rows share a key. Rows whose sort key is null are returned last, in one page holding all of them, since
+     they share a key. The rowLimit of the query limits the total number of rows.
+
+     Pass the cursor of the last page processed to resume the iteration after it, for example after a failure.
+     The result must not change between pages.
+
+    Args:
+        body (QueryRequest): The sorted query request parameters
+        page_size (int): The number of rows requested for each page
+        cursor (Optional[str]): The cursor of the page to resume after, or None to start from the first page
+        fast_decode (Optional[bool]): Whether to decode the results without validating every row.
+            Defaults to Client.fast_decode.
+
+    Raises:
+        ValueError: If page_size is less than 1, the query cannot be paged through, or the cursor does not belong
+            to the query.
+        errors.QueryError: If the server reports an error in the result body.
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Yields:
+        Page: Each page of rows with its cursor, until the last page or an unsuccessful request
+    """
+    pager = _Pager(body, page_size, cursor)
+    while not pager.done:
+        response = sync_detailed(
+            client=client, body=pager.request(), fast_decode=fast_decode
+        )
+        rows = _rows(response)
+        if rows is None:
+            return
+        page = pager.accept(rows)
+        if page is not None and page.rows:
+            yield page
+
+
+async def iter_pages_async(
+    *,
+    client: VizQLDataServiceClient,
+    body: QueryRequest,
+    page_size: int,
+    cursor: Optional[str] = None,
+    fast_decode: Optional[bool] = None,
+) -> AsyncIterator[Page]:
+    """Query data source asynchronously one page of rows at a time with keyset pagination
+
+     See iter_pages() for how the pages are requested and resumed.
+
+    Args:
+        body (QueryRequest): The sorted query request parameters
+        page_size (int): The number of rows requested for each page
+        cursor (Optional[str]): The cursor of the page to resume after, or None to start from the first page
+        fast_decode (Optional[bool]): Whether to decode the results without validating every row.
+            Defaults to Client.fast_decode.
+
+    Raises:
+        ValueError: If page_size is less than 1, the query cannot be paged through, or the cursor does not belong
+            to the query.
+        errors.QueryError: If the server reports an error in the result body.
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Yields:
+        Page: Each page of rows with its cursor, until the last page or an unsuccessful request
+    """
+    pager = _Pager(body, page_size, cursor)
+    while not pager.done:
+        response = await asyncio_detailed(
+            client=client, body=pager.request(), fast_decode=fast_decode
+        )
+        rows = _rows(response)
+        if rows is None:
+            return
+        page = pager.accept(rows)
+        if page is not None and page.rows:
+            yield page
+
+
+__all__ = ["Page", "iter_pages", "iter_pages_async"]
@@ -0,0 +1,514 @@
+"""
+Partition Module
+
+This module runs a query as several partitions, each restricted to part of the values of one dimension, and merges
+their results into the result of the whole query.
+"""
+
+from collections.abc import Sequence
+from datetime import date, timedelta
+from functools import partial
+from typing import Any, Callable, Optional, Union
+
+from .client import VizQLDataServiceClient
+from .columnar import column_name
+from .errors import UnexpectedStatus
+from .openapi_generated import (
+    CalculatedField,
+    ConditionFilter,
+    DimensionField,
+    DimensionFilterField,
+    Field,
+    FilterField,
+    Function,
+    MeasureField,
+    MeasureFilterField,
+    QuantitativeDateFilter,
+    QuantitativeFilterType,
+    QuantitativeNumericalFilter,
+    Query,
+    QueryOutput,
+    QueryRequest,
+    ReturnFormat,
+    SetFilter,
+    SortDirection,
+    TabFilter,
+    TableCalcField,
+    TopNFilter,
+)
+from .query_datasource import (
+    DEFAULT_BATCH_CONCURRENCY,
+    BatchResult,
+    asyncio,
+    batch_async,
+    batch_sync,
+    sync,
+)
+
+PartitionFilter = Union[SetFilter, QuantitativeDateFilter]
+
+# How each aggregation of a measure is combined across partitions when the partitions share groups
+_COMBINE: dict[Function, Callable[[Any, Any], Any]] = {
+    Function.SUM: lambda a, b: a + b,
+    Function.COUNT: lambda a, b: a + b,
+    Function.MIN: min,
+    Function.MAX: max,
+}
+
+# Functions that turn a field into a grouping key rather than an aggregate
+_GROUPING_FUNCTIONS = {
+    Function.NONE,
+    Function.YEAR,
+    Function.QUARTER,
+    Function.MONTH,
+    Function.WEEK,
+    Function.DAY,
+    Function.TRUNC_YEAR,
+    Function.TRUNC_QUARTER,
+    Function.TRUNC_MONTH,
+    Function.TRUNC_WEEK,
+    Function.TRUNC_DAY,
+}
+
+
+def set_partitions(
+    field_caption: str, values: Sequence[Any], partitions: int
+) -> list[SetFilter]:
+    """Split the values of a dimension into set filters of about the same size
+
+    Null is not sent among the values of a set filter. If the values include it, the nulls get a partition of
+    their own, in addition to the others, excluding every other value.
+
+    Args:
+        field_caption: The caption of the dimension to partition on.
+        values: Every value of the dimension, such as returned by distinct_values().
+        partitions: The number of partitions of the values other than null.
+
+    Raises:
+        ValueError: If partitions is less than 1.
+
+    Returns:
+        list[SetFilter]: One filter per non-empty partition, followed by the filter of the nulls, if any.
+    """
+    if partitions < 1:
+        raise ValueError("partitions must be at least 1")
+    field = FilterField(root=DimensionFilterField(fieldCaption=field_caption))
+    non_null = [value for value in values if value is not None]
+    size = -(-len(non_null) // partitions)
+    filters = [
+        SetFilter(field=field, values=non_null[start:][:size])
+        for start in range(0, len(non_null), size or 1)
+    ]
+    if len(non_null) < len(values):
+        filters.append(SetFilter(field=field, values=non_null, exclude=True))
+    return filters
+
+
+def date_partitions(
+    field_caption: str, start: date, end: date, partitions: int
+) -> list[QuantitativeDateFilter]:
+    """Split a range of dates into consecutive date range filters
+
+    The first partition also includes null dates. Rows dated outside the range are not part of any partition.
+
+    Args:
+        field_caption: The caption of the date dimension to partition on.
+        start: The first date of the range.
+        end: The last date of the range.
+        partitions: The number of partitions.
+
+    Raises:
+        ValueError: If partitions is less than 1 or end is before start.
+
+    Returns:
+        list[QuantitativeDateFilter]: One filter per partition, each covering at least one day.
+    """
+    if partitions < 1:
+        raise ValueError("partitions must be at least 1")
+    if end < start:
+        raise ValueError("end must not be before start")
+    field = FilterField(root=DimensionFilterField(fieldCaption=field_caption))
+    days = (end - start).days + 1
+    partitions = min(partitions, days)
+    bounds = [start + timedelta(days=days * i // partitions) for i in range(partitions)]
+    return [
+        QuantitativeDateFilter(
+            field=field,
+            quantitativeFilterType=QuantitativeFilterType.RANGE,
+            minDate=lower,
+            maxDate=(bounds[i + 1] if i + 1 < partitions else end + timedelta(days=1))
+            - timedelta(days=1),
+            includeNulls=i == 0,
+        )
+        for i, lower in enumerate(bounds)
+    ]
+
+
+def _distinct_values_request(body: QueryRequest, field_caption: str) -> QueryRequest:
+    options = body.options and body.options.model_copy(
+        update={"disaggregate": False, "returnFormat": None, "rowLimit": None}
+    )
+    return QueryRequest(
+        datasource=body.datasource,
+        query=Query(
+            fields=[Field(root=DimensionField(fieldCaption=field_caption))],
+            filters=body.query.filters,
+            parameters=body.query.parameters,
+        ),
+        options=options,
+    )
+
+
+def _values(output: Optional[QueryOutput], field_caption: str) -> list[Any]:
+    return [row[field_caption] for row in (output.data or [])] if output else []
+
+
+def distinct_values(
+    *, client: VizQLDataServiceClient, body: QueryRequest, field_caption: str
+) -> list[Any]:
+    """Get the values of a dimension in the rows selected by the filters of a query
+
+    Args:
+        body (QueryRequest): The query to be partitioned
+        field_caption (str): The caption of the dimension
+
+    Raises:
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Returns:
+        list[Any]: The distinct values of the dimension, or an empty list if the request was unsuccessful
+    """
+    output = sync(client=client, body=_distinct_values_request(body, field_caption))
+    return _values(output, field_caption)
+
+
+async def distinct_values_async(
+    *, client: VizQLDataServiceClient, body: QueryRequest, field_caption: str
+) -> list[Any]:
+    """Get the values of a dimension in the rows selected by the filters of a query asynchronously
+
+    Args:
+        body (QueryRequest): The query to be partitioned
+        field_caption (str): The caption of the dimension
+
+    Raises:
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Returns:
+        list[Any]: The distinct values of the dimension, or an empty list if the request was unsuccessful
+    """
+    output = await asyncio(
+        client=client, body=_distinct_values_request(body, field_caption)
+    )
+    return _values(output, field_caption)
+
+
+def _partition_caption(partitions: Sequence[PartitionFilter]) -> str:
+    if not partitions:
+        raise ValueError("At least one partition is required")
+    captions = set()
+    for partition in partitions:
+        root = partition.field.root
+        if not isinstance(root, DimensionFilterField):
+            raise ValueError("Partitions must filter on a dimension")
+        captions.add(root.fieldCaption)
+    if len(captions) != 1:
+        raise ValueError("Every partition must filter on the same dimension")
+    return captions.pop()
+
+
+def _groups_are_disjoint(body: QueryRequest, caption: str) -> bool:
+    """Whether every row of the result comes from a single partition"""
+    if body.options and body.options.disaggregate:
+        return True
+    return any(
+        isinstance(field.root, DimensionField) and field.root.fieldCaption == caption
+        for field in body.query.fields
+    )
+
+
+def _check_partitionable(body: QueryRequest, caption: str) -> bool:
+    """Raise if partitioning would change the result, and return whether rows need no re-aggregation"""
+    filters = [tab_filter.root for tab_filter in body.query.filters or []]
+    for query_filter in filters:
+        if isinstance(query_filter, (TopNFilter, ConditionFilter)):
+            raise ValueError(
+                f"A {query_filter.filterType.value} filter is computed over every partition and cannot be split"
+            )
+    for field in body.query.fields:
+        if isinstance(field.root, TableCalcField):
+            raise ValueError(
+                f"Table calculation {column_name(field)} is computed across partitions and cannot be split"
+            )
+
+    if _groups_are_disjoint(body, caption):
+        return True
+
+    # Rows of the same group come from several partitions and their measures must be combined
+    if body.options and body.options.rowLimit is not None:
+        raise ValueError(
+            "rowLimit cannot be applied to partitions that share groups; add the partition dimension to the query"
+        )
+    for query_filter in filters:
+        if isinstance(query_filter, QuantitativeNumericalFilter) and isinstance(
+            query_filter.field.root, MeasureFilterField
+        ):
+            raise ValueError(
+                "A filter on an aggregate cannot be split over partitions that share groups"
+            )
+    for field in body.query.fields:
+        root = field.root
+        if isinstance(root, CalculatedField):
+            raise ValueError(
+                f"Calculation {column_name(field)} cannot be combined across partitions"
+            )
+        if isinstance(root, MeasureField) and not (
+            root.function in _COMBINE or root.function in _GROUPING_FUNCTIONS
+        ):
+            raise ValueError(
+                f"{column_name(field)} cannot be combined across partitions; "
+                "add the partition dimension to the query"
+            )
+    return False
+
+
+def partition_query(
+    body: QueryRequest, partitions: Sequence[PartitionFilter]
+) -> list[QueryRequest]:
+    """Split a query into one query per partition
+
+    Each partition query is the original query with the partition filter added. When the partition dimension is
+    one of the query fields, or the query is disaggregated, every result row comes from a single partition.
+    Otherwise rows of the same group are combined, which is only possible for SUM, COUNT, MIN and MAX measures.
+
+    Args:
+        body: The query to split.
+        partitions: The partition filters, such as returned by set_partitions() or date_partitions(). They must
+            all filter on the same dimension, and together select every row of the query.
+
+    Raises:
+        ValueError: If the partitions do not filter on one dimension, or if splitting the query would change its
+            result, for example because it counts distinct values, has a top N or condition filter, or has a
+            table calculation.
+
+    Returns:
+        list[QueryRequest]: One query per partition.
+    """
+    caption = _partition_caption(partitions)
+    _check_partitionable(body, caption)
+    return [
+        body.model_copy(
+            update={
+                "query": body.query.model_copy(
+                    update={
+                        "filters": [
+                            *(body.query.filters or []),
+                            TabFilter(root=partition),
+                        ]
+                    }
+                )
+            }
+        )
+        for partition in partitions
+    ]
+
+
+def _row_getter(body: QueryRequest) -> Callable[[Any, int], Any]:
+    if body.options and body.options.returnFormat == ReturnFormat.ARRAYS:
+        return lambda row, position: row[position]
+    names = [column_name(field) for field in body.query.fields]
+    return lambda row, position: row.get(names[position])
+
+
+def _combine_groups(body: QueryRequest, rows: list[Any]) -> list[Any]:
+    get = _row_getter(body)
+    arrays = body.options and body.options.returnFormat == ReturnFormat.ARRAYS
+    names = [column_name(field) for field in body.query.fields]
+    measures = {
+        position: _COMBINE[field.root.function]
+        for position, field in enumerate(body.query.fields)
+        if isinstance(field.root, MeasureField) and field.root.function in _COMBINE
+    }
+    keys = [position for position in range(len(names)) if position not in measures]
+
+    groups: dict[tuple, Any] = {}
+    for row in rows:
+        key = tuple(get(row, position) for position in keys)
+        merged = groups.get(key)
+        if merged is None:
+            groups[key] = list(row) if arrays else dict(row)
+            continue
+        for position, combine in measures.items():
+            slot: Union[int, str] = position if arrays else names[position]
+            value = get(row, position)
+            if value is not None:
+                current = merged[slot]
+                merged[slot] = value if current is None else combine(current, value)
+    return list(groups.values())
+
+
+def _null_last(get: Callable[[Any, int], Any], position: int, row: Any) -> tuple:
+    value = get(row, position)
+    return value is None, value
+
+
+def _sort_rows(body: QueryRequest, rows: list[Any]) -> list[Any]:
+    get = _row_getter(body)
+    sorted_fields = sorted(
+        (
+            (field.root.sortPriority, position, field.root.sortDirection)
+            for position, field in enumerate(body.query.fields)
+            if field.root.sortPriority is not None
+        ),
+        key=lambda item: item[0],
+    )
+    # Sorting by each key in turn, from the last to the first, is stable and gives the combined order
+    for _, position, direction in reversed(sorted_fields):
+        rows.sort(
+            key=partial(_null_last, get, position),
+            reverse=direction == SortDirection.DESC,
+        )
+    return rows
+
+
+def merge_results(
+    body: QueryRequest, outputs: Sequence[QueryOutput], field_caption: str
+) -> QueryOutput:
+    """Merge the results of the partitions of a query into the result of the query
+
+    Rows are concatenated, or combined by group when partitions share groups, then sorted by the fields with a
+    sortPriority and cut to the rowLimit of the query.
+
+    Args:
+        body: The query that was partitioned, without the partition filters.
+        outputs: The results of its partition queries.
+        field_caption: The caption of the dimension the query was partitioned on.
+
+    Raises:
+        ValueError: If the query cannot be partitioned, see partition_query().
+
+    Returns:
+        QueryOutput: The result of the query.
+    """
+    rows = [row for output in outputs for row in output.data or []]
+    if not _check_partitionable(body, field_caption):
+        rows = _combine_groups(body, rows)
+    rows = _sort_rows(body, rows)
+    if body.options and body.options.rowLimit is not None:
+        rows = rows[: body.options.rowLimit]
+    return QueryOutput(data=rows)
+
+
+def _merge_batch(
+    client: VizQLDataServiceClient,
+    body: QueryRequest,
+    field_caption: str,
+    results: list[BatchResult],
+) -> Optional[QueryOutput]:
+    outputs = []
+    for result in results:
+        if result.error is not None:
+            raise result.error
+        assert result.response is not None
+        output = result.response.parsed
+        if result.response.status_code != 200 or output is None:
+            if client.raise_on_unexpected_status:
+                raise UnexpectedStatus(
+                    result.response.status_code, result.response.content
+                )
+            return None
+        outputs.append(output)
+    return merge_results(body, outputs, field_caption)
+
+
+def sync_partitioned(
+    *,
+    client: VizQLDataServiceClient,
+    body: QueryRequest,
+    partitions: Sequence[PartitionFilter],
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    fast_decode: Optional[bool] = None,
+) -> Optional[QueryOutput]:
+    """Run a query as concurrent partition queries on a pool of threads and merge their results
+
+     See partition_query() for which queries can be partitioned, and batch_sync() for how the partition queries
+     are run.
+
+    Args:
+        body (QueryRequest): The query to run
+        partitions (Sequence[PartitionFilter]): The partition filters, such as returned by set_partitions() or
+            date_partitions()
+        max_concurrency (int): The maximum number of partition queries in flight at once
+        fast_decode (Optional[bool]): Whether to decode the results without validating every row.
+            Defaults to Client.fast_decode.
+
+    Raises:
+        ValueError: If the query cannot be partitioned or max_concurrency is less than 1.
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Returns:
+        Optional[QueryOutput]: The merged result, or None if a partition query was unsuccessful
+    """
+    requests = partition_query(body, partitions)
+    results = batch_sync(
+        client=client,
+        requests=requests,
+        max_concurrency=max_concurrency,
+        fast_decode=fast_decode,
+    )
+    return _merge_batch(client, body, _partition_caption(partitions), results)
+
+
+async def asyncio_partitioned(
+    *,
+    client: VizQLDataServiceClient,
+    body: QueryRequest,
+    partitions: Sequence[PartitionFilter],
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    fast_decode: Optional[bool] = None,
+) -> Optional[QueryOutput]:
+    """Run a query as concurrent partition queries and merge their results
+
+     See partition_query() for which queries can be partitioned, and batch_async() for how the partition queries
+     are run.
+
+    Args:
+        body (QueryRequest): The query to run
+        partitions (Sequence[PartitionFilter]): The partition filters, such as returned by set_partitions() or
+            date_partitions()
+        max_concurrency (int): The maximum number of partition queries in flight at once
+        fast_decode (Optional[bool]): Whether to decode the results without validating every row.
+            Defaults to Client.fast_decode.
+
+    Raises:
+        ValueError: If the query cannot be partitioned or max_concurrency is less than 1.
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Returns:
+        Optional[QueryOutput]: The merged result, or None if a partition query was unsuccessful
+    """
+    requests = partition_query(body, partitions)
+    results = await batch_async(
+        client=client,
+        requests=requests,
+        max_concurrency=max_concurrency,
+        fast_decode=fast_decode,
+    )
+    return _merge_batch(client, body, _partition_caption(partitions), results)
+
+
+__all__ = [
+    "PartitionFilter",
+    "asyncio_partitioned",
+    "date_partitions",
+    "distinct_values",
+    "distinct_values_async",
+    "merge_results",
+    "partition_query",
+    "set_partitions",
+    "sync_partitioned",
+]
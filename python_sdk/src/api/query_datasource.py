@@ -1,17 +1,47 @@
+import asyncio as asyncio_module
+import json
+from collections.abc import AsyncIterator, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from http import HTTPStatus
 from typing import Any, Optional
 
 import httpx
+from attrs import define
 
+from .cache import EncodedBodyCache, encode_body, result_namespace
 from .client import VizQLDataServiceClient
-from .errors import UnexpectedStatus
-from .openapi_generated import QueryOutput, QueryRequest
+from .coalesce import asend_request, send_request
+from .columnar import ColumnarBuilder, ColumnarResult, apply_data_types
+from .errors import QueryError, UnexpectedStatus
+from .json_stream import RowArrayDecoder
+from .openapi_generated import (
+    MetadataOutput,
+    QueryDatasourceOptions,
+    QueryOutput,
+    QueryRequest,
+    ReturnFormat,
+    SseDataEvent,
+    SseErrorEvent,
+    SseResultStream,
+    TableauError,
+)
+from .sse import SSE_CONTENT_TYPE, ServerSentEvent, aiter_sse, iter_sse
 from .types import Response
 
+try:
+    from pydantic_core import from_json
+except ImportError:  # pragma: no cover - pydantic-core older than pydantic 2.5
+    from_json = json.loads  # type: ignore
+
+DEFAULT_COLUMNAR_CHUNK_SIZE = 10_000
+DEFAULT_BATCH_CONCURRENCY = 8
+
 
 def _get_kwargs(
     *,
     body: QueryRequest,
+    body_cache: Optional[EncodedBodyCache] = None,
 ) -> dict[str, Any]:
     headers: dict[str, Any] = {}
 
@@ -20,19 +50,55 @@ def _get_kwargs(
         "url": "/query-datasource",
     }
 
-    _body = body.model_dump(mode="json", exclude_none=True)
-
-    _kwargs["json"] = _body
+    _kwargs["content"] = encode_body(body, body_cache)
     headers["Content-Type"] = "application/json"
 
     _kwargs["headers"] = headers
     return _kwargs
 
 
+def _sample_positions(length: int, count: int) -> list[int]:
+    """Return at most count distinct positions of rows, spread evenly from the first row to the last"""
+    count = min(count, length)
+    if count <= 1:
+        return [0] if count == 1 else []
+    # Consecutive positions are at least one row apart, since count is not more than length
+    return [i * (length - 1) // (count - 1) for i in range(count)]
+
+
+def _fast_parse_output(content: bytes, sample_rows: int) -> QueryOutput:
+    payload = from_json(content)
+    data = payload.get("data") if isinstance(payload, dict) else None
+    if not isinstance(data, list):
+        return QueryOutput.model_validate(payload)
+
+    # Validate the envelope only, then attach the decoded rows without walking them
+    response_200 = QueryOutput.model_validate({**payload, "data": []})
+    response_200.data = data
+
+    if sample_rows > 0 and data:
+        first = data[0]
+        for position in _sample_positions(len(data), sample_rows):
+            row = data[position]
+            if not isinstance(first, (list, dict)) or not isinstance(row, (list, dict)):
+                # Rows that are neither arrays nor objects have no shape to check and are left to the model
+                return QueryOutput.model_validate(payload)
+            if type(row) is not type(first) or len(row) != len(first):
+                raise ValueError(
+                    f"Row {position} of the query results does not have the shape of the first row"
+                )
+    return response_200
+
+
 def _parse_response(
-    *, client: VizQLDataServiceClient, response: httpx.Response
+    *,
+    client: VizQLDataServiceClient,
+    response: httpx.Response,
+    fast_decode: bool = False,
 ) -> Optional[QueryOutput]:
     if response.status_code == 200:
+        if fast_decode:
+            return _fast_parse_output(response.content, client.fast_decode_sample_rows)
         response_200 = QueryOutput.model_validate_json(response.content)
 
         return response_200
@@ -42,21 +108,138 @@ def _parse_response(
         return None
 
 
-def _build_response(
+def _with_options(body: QueryRequest, **options: Any) -> QueryRequest:
+    current = body.options or QueryDatasourceOptions()
+    return body.model_copy(update={"options": current.model_copy(update=options)})
+
+
+def _get_stream_kwargs(
+    *,
+    body: QueryRequest,
+) -> dict[str, Any]:
+    body = _with_options(body, returnServerSentEvents=True)
+
+    _kwargs = _get_kwargs(body=body)
+    _kwargs["headers"]["Accept"] = f"{SSE_CONTENT_TYPE}, application/json"
+    return _kwargs
+
+
+def _is_hedged(client: VizQLDataServiceClient, body: QueryRequest) -> bool:
+    """Whether a query may be hedged: queries are read-only, but only hedged when their results are cached"""
+    if client.hedging is None or not client.hedging.hedge_queries:
+        return False
+    cache = client.result_cache
+    return cache is not None and cache.ttl_for(body.datasource.datasourceLuid) > 0
+
+
+def _is_event_stream(response: httpx.Response) -> bool:
+    return response.headers.get("Content-Type", "").startswith(SSE_CONTENT_TYPE)
+
+
+def _parse_event(event: ServerSentEvent) -> Optional[list[Any]]:
+    payload = json.loads(event.data)
+    if not (isinstance(payload, dict) and "event" in payload):
+        payload = {"event": event.event, "data": payload}
+
+    parsed = SseResultStream.model_validate(payload).root
+    if isinstance(parsed, SseErrorEvent):
+        raise QueryError(parsed.data)
+    if isinstance(parsed, SseDataEvent):
+        return parsed.data
+    return None
+
+
+def _parse_buffered_rows(
     *, client: VizQLDataServiceClient, response: httpx.Response
+) -> Optional[list[Any]]:
+    parsed = _parse_response(client=client, response=response)
+    if parsed is None:
+        return None
+    if parsed.error:
+        raise QueryError(TableauError.model_validate(parsed.error))
+    return parsed.data or None
+
+
+def _raise_for_error(decoder: RowArrayDecoder) -> None:
+    error = decoder.members.get("error")
+    if error:
+        raise QueryError(TableauError.model_validate(error))
+
+
+def _iter_response_rows(response: httpx.Response) -> Iterator[Any]:
+    if _is_event_stream(response):
+        for event in iter_sse(response.iter_lines()):
+            yield from _parse_event(event) or ()
+        return
+
+    decoder = RowArrayDecoder()
+    for chunk in response.iter_bytes():
+        yield from decoder.feed(chunk)
+        _raise_for_error(decoder)
+    yield from decoder.close()
+    _raise_for_error(decoder)
+
+
+async def _aiter_response_rows(response: httpx.Response) -> AsyncIterator[Any]:
+    if _is_event_stream(response):
+        async for event in aiter_sse(response.aiter_lines()):
+            for row in _parse_event(event) or ():
+                yield row
+        return
+
+    decoder = RowArrayDecoder()
+    async for chunk in response.aiter_bytes():
+        for row in decoder.feed(chunk):
+            yield row
+        _raise_for_error(decoder)
+    for row in decoder.close():
+        yield row
+    _raise_for_error(decoder)
+
+
+def _build_response(
+    *,
+    client: VizQLDataServiceClient,
+    response: httpx.Response,
+    fast_decode: Optional[bool] = None,
 ) -> Response[QueryOutput]:
+    if fast_decode is None:
+        fast_decode = client.fast_decode
+    if response.status_code != 200:
+        # Unexpected statuses are still raised when the response is built
+        return Response(
+            status_code=HTTPStatus(response.status_code),
+            content=response.content,
+            headers=response.headers,
+            parsed=_parse_response(client=client, response=response),
+        )
     return Response(
         status_code=HTTPStatus(response.status_code),
         content=response.content,
         headers=response.headers,
-        parsed=_parse_response(client=client, response=response),
+        parser=partial(
+            _parse_response, client=client, response=response, fast_decode=fast_decode
+        ),
+        release_content=client.release_content,
     )
 
 
+def _build_cached_response(
+    *,
+    client: VizQLDataServiceClient,
+    response: httpx.Response,
+    fast_decode: Optional[bool] = None,
+) -> Response[QueryOutput]:
+    cached = _build_response(client=client, response=response, fast_decode=fast_decode)
+    cached.cache_hit = True
+    return cached
+
+
 def sync_detailed(
     *,
     client: VizQLDataServiceClient,
     body: QueryRequest,
+    fast_decode: Optional[bool] = None,
 ) -> Response[QueryOutput]:
     """Query data source with detailed response information
 
@@ -66,8 +249,13 @@ def sync_detailed(
      - Response headers
      - Raw response content
 
+     When the client has a result_cache, the response to an equivalent request is reused while it is cached,
+     and is marked with cache_hit.
+
     Args:
         body (QueryRequest): The query request parameters
+        fast_decode (Optional[bool]): Whether to decode the results without validating every row.
+            Defaults to Client.fast_decode.
 
     Raises:
         errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
@@ -77,21 +265,33 @@ def sync_detailed(
         Response[QueryOutput]: A response object containing both the query results and response metadata
     """
 
+    cache = client.result_cache
+    key = ""
+    if cache is not None:
+        key = cache.key(body, result_namespace(client.server, client.auth))
+        cached = cache.get(key, body.datasource.datasourceLuid)
+        if cached is not None:
+            return _build_cached_response(
+                client=client, response=cached, fast_decode=fast_decode
+            )
+
     kwargs = _get_kwargs(
         body=body,
+        body_cache=client.body_cache,
     )
 
-    response = client.client.get_httpx_client().request(
-        **kwargs,
-    )
+    response = send_request(client, body, kwargs)
 
-    return _build_response(client=client, response=response)
+    if cache is not None and response.status_code == 200:
+        cache.set(key, body.datasource.datasourceLuid, response)
+    return _build_response(client=client, response=response, fast_decode=fast_decode)
 
 
 def sync(
     *,
     client: VizQLDataServiceClient,
     body: QueryRequest,
+    fast_decode: Optional[bool] = None,
 ) -> Optional[QueryOutput]:
     """Query data source and get only the query results
 
@@ -100,6 +300,8 @@ def sync(
 
     Args:
         body (QueryRequest): The query request parameters
+        fast_decode (Optional[bool]): Whether to decode the results without validating every row.
+            Defaults to Client.fast_decode.
 
     Raises:
         errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
@@ -112,6 +314,7 @@ def sync(
     return sync_detailed(
         client=client,
         body=body,
+        fast_decode=fast_decode,
     ).parsed
 
 
@@ -119,6 +322,7 @@ async def asyncio_detailed(
     *,
     client: VizQLDataServiceClient,
     body: QueryRequest,
+    fast_decode: Optional[bool] = None,
 ) -> Response[QueryOutput]:
     """Query data source asynchronously with detailed response information
 
@@ -128,8 +332,14 @@ async def asyncio_detailed(
      - Response headers
      - Raw response content
 
+     When the client has a result_cache, the response to an equivalent request is reused while it is cached,
+     and is marked with cache_hit. When the client has a hedging policy with hedge_queries and a result_cache
+     with a TTL above 0 for the data source, a slow query is sent again and the first successful response is used.
+
     Args:
         body (QueryRequest): The query request parameters
+        fast_decode (Optional[bool]): Whether to decode the results without validating every row.
+            Defaults to Client.fast_decode.
 
     Raises:
         errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
@@ -139,19 +349,35 @@ async def asyncio_detailed(
         Response[QueryOutput]: A response object containing both the query results and response metadata
     """
 
+    cache = client.result_cache
+    key = ""
+    if cache is not None:
+        key = cache.key(body, result_namespace(client.server, client.auth))
+        cached = cache.get(key, body.datasource.datasourceLuid)
+        if cached is not None:
+            return _build_cached_response(
+                client=client, response=cached, fast_decode=fast_decode
+            )
+
     kwargs = _get_kwargs(
         body=body,
+        body_cache=client.body_cache,
     )
 
-    response = await client.client.get_async_httpx_client().request(**kwargs)
+    response = await asend_request(
+        client, body, kwargs, hedged=_is_hedged(client, body)
+    )
 
-    return _build_response(client=client, response=response)
+    if cache is not None and response.status_code == 200:
+        cache.set(key, body.datasource.datasourceLuid, response)
+    return _build_response(client=client, response=response, fast_decode=fast_decode)
 
 
 async def asyncio(
     *,
     client: VizQLDataServiceClient,
     body: QueryRequest,
+    fast_decode: Optional[bool] = None,
 ) -> Optional[QueryOutput]:
     """Query data source asynchronously and get only the query results
 
@@ -160,6 +386,8 @@ async def asyncio(
 
     Args:
         body (QueryRequest): The query request parameters
+        fast_decode (Optional[bool]): Whether to decode the results without validating every row.
+            Defaults to Client.fast_decode.
 
     Raises:
         errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
@@ -173,13 +401,601 @@ async def asyncio(
         await asyncio_detailed(
             client=client,
             body=body,
+            fast_decode=fast_decode,
         )
     ).parsed
 
 
+def stream(
+    *,
+    client: VizQLDataServiceClient,
+    body: QueryRequest,
+) -> Iterator[list[Any]]:
+    """Query data source and stream the query results as they arrive
+
+     Requests the results as Server-Sent Events and yields each batch of rows as its DATA event is
+     received, so the first rows are available before the server has finished sending the result and
+     the full body is never held in memory. METADATA events are consumed without being yielded.
+     If the server answers with a buffered JSON body instead, its rows are yielded as a single batch.
+
+    Args:
+        body (QueryRequest): The query request parameters. returnServerSentEvents is always enabled.
+
+    Raises:
+        errors.QueryError: If the server reports an error in the result stream.
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Yields:
+        list[Any]: The rows of each DATA event, in the order they were received
+    """
+
+    kwargs = _get_stream_kwargs(
+        body=body,
+    )
+
+    with client.client.get_httpx_client().stream(**kwargs) as response:
+        if response.status_code != 200 or not _is_event_stream(response):
+            response.read()
+            rows = _parse_buffered_rows(client=client, response=response)
+            if rows is not None:
+                yield rows
+            return
+
+        for event in iter_sse(response.iter_lines()):
+            rows = _parse_event(event)
+            if rows is not None:
+                yield rows
+
+
+async def stream_async(
+    *,
+    client: VizQLDataServiceClient,
+    body: QueryRequest,
+) -> AsyncIterator[list[Any]]:
+    """Query data source asynchronously and stream the query results as they arrive
+
+     Asynchronously requests the results as Server-Sent Events and yields each batch of rows as its DATA
+     event is received, so the first rows are available before the server has finished sending the result
+     and the full body is never held in memory. METADATA events are consumed without being yielded.
+     If the server answers with a buffered JSON body instead, its rows are yielded as a single batch.
+
+    Args:
+        body (QueryRequest): The query request parameters. returnServerSentEvents is always enabled.
+
+    Raises:
+        errors.QueryError: If the server reports an error in the result stream.
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Yields:
+        list[Any]: The rows of each DATA event, in the order they were received
+    """
+
+    kwargs = _get_stream_kwargs(
+        body=body,
+    )
+
+    async with client.client.get_async_httpx_client().stream(**kwargs) as response:
+        if response.status_code != 200 or not _is_event_stream(response):
+            await response.aread()
+            rows = _parse_buffered_rows(client=client, response=response)
+            if rows is not None:
+                yield rows
+            return
+
+        async for event in aiter_sse(response.aiter_lines()):
+            rows = _parse_event(event)
+            if rows is not None:
+                yield rows
+
+
+def iter_rows(
+    *,
+    client: VizQLDataServiceClient,
+    body: QueryRequest,
+) -> Iterator[Any]:
+    """Query data source and decode the result rows one at a time while the response is received
+
+     The response body is decoded incrementally, so memory use is bounded by the size of a single row
+     rather than the size of the result. Neither the raw body nor a QueryOutput is ever built.
+     Event stream responses (returnServerSentEvents) are also supported.
+
+    Args:
+        body (QueryRequest): The query request parameters
+
+    Raises:
+        errors.QueryError: If the server reports an error in the result body.
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+        json.JSONDecodeError: If the response body is not a complete JSON object.
+
+    Yields:
+        Any: Each row of the query results, in the order they were received
+    """
+
+    kwargs = _get_kwargs(
+        body=body,
+        body_cache=client.body_cache,
+    )
+
+    with client.client.get_httpx_client().stream(**kwargs) as response:
+        if response.status_code != 200:
+            response.read()
+            _parse_response(client=client, response=response)
+            return
+
+        yield from _iter_response_rows(response)
+
+
+def iter_row_chunks(
+    *,
+    client: VizQLDataServiceClient,
+    body: QueryRequest,
+    chunk_size: int,
+) -> Iterator[list[Any]]:
+    """Query data source and decode the result rows in fixed-size chunks while the response is received
+
+     This is a convenience wrapper around iter_rows() that groups the rows into lists of chunk_size rows.
+     The last chunk may be shorter.
+
+    Args:
+        body (QueryRequest): The query request parameters
+        chunk_size (int): The number of rows in each chunk
+
+    Raises:
+        ValueError: If chunk_size is less than 1.
+        errors.QueryError: If the server reports an error in the result body.
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Yields:
+        list[Any]: Consecutive chunks of the query results
+    """
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    chunk: list[Any] = []
+    for row in iter_rows(client=client, body=body):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def iter_rows_async(
+    *,
+    client: VizQLDataServiceClient,
+    body: QueryRequest,
+) -> AsyncIterator[Any]:
+    """Query data source asynchronously and decode the result rows one at a time while the response is received
+
+     The response body is decoded incrementally, so memory use is bounded by the size of a single row
+     rather than the size of the result. Neither the raw body nor a QueryOutput is ever built.
+     Event stream responses (returnServerSentEvents) are also supported.
+
+    Args:
+        body (QueryRequest): The query request parameters
+
+    Raises:
+        errors.QueryError: If the server reports an error in the result body.
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+        json.JSONDecodeError: If the response body is not a complete JSON object.
+
+    Yields:
+        Any: Each row of the query results, in the order they were received
+    """
+
+    kwargs = _get_kwargs(
+        body=body,
+        body_cache=client.body_cache,
+    )
+
+    async with client.client.get_async_httpx_client().stream(**kwargs) as response:
+        if response.status_code != 200:
+            await response.aread()
+            _parse_response(client=client, response=response)
+            return
+
+        async for row in _aiter_response_rows(response):
+            yield row
+
+
+async def iter_row_chunks_async(
+    *,
+    client: VizQLDataServiceClient,
+    body: QueryRequest,
+    chunk_size: int,
+) -> AsyncIterator[list[Any]]:
+    """Query data source asynchronously and decode the result rows in fixed-size chunks while the response is received
+
+     This is a convenience wrapper around iter_rows_async() that groups the rows into lists of chunk_size rows.
+     The last chunk may be shorter.
+
+    Args:
+        body (QueryRequest): The query request parameters
+        chunk_size (int): The number of rows in each chunk
+
+    Raises:
+        ValueError: If chunk_size is less than 1.
+        errors.QueryError: If the server reports an error in the result body.
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Yields:
+        list[Any]: Consecutive chunks of the query results
+    """
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    chunk: list[Any] = []
+    async for row in iter_rows_async(client=client, body=body):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def sync_columnar(
+    *,
+    client: VizQLDataServiceClient,
+    body: QueryRequest,
+    chunk_size: int = DEFAULT_COLUMNAR_CHUNK_SIZE,
+    metadata: Optional[MetadataOutput] = None,
+) -> Optional[ColumnarResult]:
+    """Query data source and get the query results as typed columns
+
+     Requests the results in ARRAYS return format and transposes them into one contiguous typed buffer per
+     queried field while the response is decoded, so at most chunk_size rows exist as Python objects at once.
+     Column names and initial types come from body.query.fields. String columns are dictionary-encoded.
+
+    Args:
+        body (QueryRequest): The query request parameters. returnFormat is always ARRAYS.
+        chunk_size (int): The number of rows decoded before they are moved into the column buffers
+        metadata (Optional[MetadataOutput]): The data source metadata returned by read_metadata. When provided,
+            the columns are decoded into the native types of the fields with columnar.apply_data_types().
+
+    Raises:
+        ValueError: If chunk_size is less than 1.
+        errors.QueryError: If the server reports an error in the result body.
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Returns:
+        Optional[ColumnarResult]: The query results, or None if the request was unsuccessful
+    """
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    body = _with_options(body, returnFormat=ReturnFormat.ARRAYS)
+    kwargs = _get_kwargs(
+        body=body,
+    )
+
+    builder = ColumnarBuilder(body.query.fields)
+    with client.client.get_httpx_client().stream(**kwargs) as response:
+        if response.status_code != 200:
+            response.read()
+            _parse_response(client=client, response=response)
+            return None
+
+        rows: list[Any] = []
+        for row in _iter_response_rows(response):
+            rows.append(row)
+            if len(rows) == chunk_size:
+                builder.append(rows)
+                rows = []
+        builder.append(rows)
+
+    result = builder.build()
+    if metadata is not None:
+        result = apply_data_types(result, body.query.fields, metadata)
+    return result
+
+
+async def asyncio_columnar(
+    *,
+    client: VizQLDataServiceClient,
+    body: QueryRequest,
+    chunk_size: int = DEFAULT_COLUMNAR_CHUNK_SIZE,
+    metadata: Optional[MetadataOutput] = None,
+) -> Optional[ColumnarResult]:
+    """Query data source asynchronously and get the query results as typed columns
+
+     Asynchronously requests the results in ARRAYS return format and transposes them into one contiguous typed
+     buffer per queried field while the response is decoded, so at most chunk_size rows exist as Python objects
+     at once. Column names and initial types come from body.query.fields. String columns are dictionary-encoded.
+
+    Args:
+        body (QueryRequest): The query request parameters. returnFormat is always ARRAYS.
+        chunk_size (int): The number of rows decoded before they are moved into the column buffers
+        metadata (Optional[MetadataOutput]): The data source metadata returned by read_metadata. When provided,
+            the columns are decoded into the native types of the fields with columnar.apply_data_types().
+
+    Raises:
+        ValueError: If chunk_size is less than 1.
+        errors.QueryError: If the server reports an error in the result body.
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Returns:
+        Optional[ColumnarResult]: The query results, or None if the request was unsuccessful
+    """
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    body = _with_options(body, returnFormat=ReturnFormat.ARRAYS)
+    kwargs = _get_kwargs(
+        body=body,
+    )
+
+    builder = ColumnarBuilder(body.query.fields)
+    async with client.client.get_async_httpx_client().stream(**kwargs) as response:
+        if response.status_code != 200:
+            await response.aread()
+            _parse_response(client=client, response=response)
+            return None
+
+        rows: list[Any] = []
+        async for row in _aiter_response_rows(response):
+            rows.append(row)
+            if len(rows) == chunk_size:
+                builder.append(rows)
+                rows = []
+        builder.append(rows)
+
+    result = builder.build()
+    if metadata is not None:
+        result = apply_data_types(result, body.query.fields, metadata)
+    return result
+
+
+@define
+class BatchResult:
+    """The outcome of one request of a batch
+
+    Attributes:
+        index: The position of the request in the batch.
+        request: The request.
+        response: The response, or None if the request raised.
+        error: The exception raised by the request, or None if it completed.
+    """
+
+    index: int
+    request: QueryRequest
+    response: Optional[Response[QueryOutput]] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the request completed with a 200 response"""
+        return (
+            self.error is None
+            and self.response is not None
+            and self.response.status_code == 200
+        )
+
+
+def _run_batch_item(
+    client: VizQLDataServiceClient,
+    index: int,
+    body: QueryRequest,
+    fast_decode: Optional[bool],
+) -> BatchResult:
+    try:
+        response = sync_detailed(client=client, body=body, fast_decode=fast_decode)
+    except Exception as error:
+        return BatchResult(index, body, error=error)
+    return BatchResult(index, body, response=response)
+
+
+async def _arun_batch_item(
+    client: VizQLDataServiceClient,
+    index: int,
+    body: QueryRequest,
+    fast_decode: Optional[bool],
+) -> BatchResult:
+    try:
+        response = await asyncio_detailed(
+            client=client, body=body, fast_decode=fast_decode
+        )
+    except Exception as error:
+        return BatchResult(index, body, error=error)
+    return BatchResult(index, body, response=response)
+
+
+def _check_concurrency(max_concurrency: int) -> None:
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+
+def batch_sync_as_completed(
+    *,
+    client: VizQLDataServiceClient,
+    requests: Iterable[QueryRequest],
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    fast_decode: Optional[bool] = None,
+) -> Iterator[BatchResult]:
+    """Run many queries on a pool of threads and yield their results as they complete
+
+     The requests share the client's connection pool, so max_concurrency should not exceed its connection limit.
+     An exception raised by one request is returned in its result instead of stopping the batch.
+
+    Args:
+        requests (Iterable[QueryRequest]): The query requests to run
+        max_concurrency (int): The maximum number of requests in flight at once
+        fast_decode (Optional[bool]): Whether to decode the results without validating every row.
+            Defaults to Client.fast_decode.
+
+    Raises:
+        ValueError: If max_concurrency is less than 1.
+
+    Yields:
+        BatchResult: The result of each request, in the order they complete
+    """
+    _check_concurrency(max_concurrency)
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        futures = [
+            executor.submit(_run_batch_item, client, index, body, fast_decode)
+            for index, body in enumerate(requests)
+        ]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def batch_sync(
+    *,
+    client: VizQLDataServiceClient,
+    requests: Iterable[QueryRequest],
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    fast_decode: Optional[bool] = None,
+) -> list[BatchResult]:
+    """Run many queries on a pool of threads and return their results in input order
+
+     See batch_sync_as_completed() for how the requests are run.
+
+    Args:
+        requests (Iterable[QueryRequest]): The query requests to run
+        max_concurrency (int): The maximum number of requests in flight at once
+        fast_decode (Optional[bool]): Whether to decode the results without validating every row.
+            Defaults to Client.fast_decode.
+
+    Raises:
+        ValueError: If max_concurrency is less than 1.
+
+    Returns:
+        list[BatchResult]: The result of each request, in the order of the requests
+    """
+    results = batch_sync_as_completed(
+        client=client,
+        requests=requests,
+        max_concurrency=max_concurrency,
+        fast_decode=fast_decode,
+    )
+    return sorted(results, key=lambda result: result.index)
+
+
+async def batch_async_as_completed(
+    *,
+    client: VizQLDataServiceClient,
+    requests: Iterable[QueryRequest],
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    fast_decode: Optional[bool] = None,
+) -> AsyncIterator[BatchResult]:
+    """Run many queries concurrently and yield their results as they complete
+
+     The requests share the client's connection pool, so max_concurrency should not exceed its connection limit.
+     An exception raised by one request is returned in its result instead of stopping the batch. Requests are
+     taken from the iterable as capacity frees up, and closing the iterator cancels the requests in flight.
+     With a concurrency_limiter on the client, max_concurrency is an upper bound and the limiter sets how many
+     requests are in flight, the others waiting in its queue.
+
+    Args:
+        requests (Iterable[QueryRequest]): The query requests to run
+        max_concurrency (int): The maximum number of requests in flight at once
+        fast_decode (Optional[bool]): Whether to decode the results without validating every row.
+            Defaults to Client.fast_decode.
+
+    Raises:
+        ValueError: If max_concurrency is less than 1.
+
+    Yields:
+        BatchResult: The result of each request, in the order they complete
+    """
+    _check_concurrency(max_concurrency)
+    pending = enumerate(requests)
+    results: asyncio_module.Queue[Optional[BatchResult]] = asyncio_module.Queue()
+
+    async def worker() -> None:
+        try:
+            for index, body in pending:
+                results.put_nowait(
+                    await _arun_batch_item(client, index, body, fast_decode)
+                )
+        finally:
+            results.put_nowait(None)
+
+    workers = [asyncio_module.ensure_future(worker()) for _ in range(max_concurrency)]
+    try:
+        running = len(workers)
+        while running:
+            result = await results.get()
+            if result is None:
+                running -= 1
+            else:
+                yield result
+        for task in workers:
+            # Surface an exception raised while iterating the requests
+            task.result()
+    finally:
+        for task in workers:
+            task.cancel()
+
+
+async def batch_async(
+    *,
+    client: VizQLDataServiceClient,
+    requests: Iterable[QueryRequest],
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    fast_decode: Optional[bool] = None,
+) -> list[BatchResult]:
+    """Run many queries concurrently and return their results in input order
+
+     See batch_async_as_completed() for how the requests are run.
+
+    Args:
+        requests (Iterable[QueryRequest]): The query requests to run
+        max_concurrency (int): The maximum number of requests in flight at once
+        fast_decode (Optional[bool]): Whether to decode the results without validating every row.
+            Defaults to Client.fast_decode.
+
+    Raises:
+        ValueError: If max_concurrency is less than 1.
+
+    Returns:
+        list[BatchResult]: The result of each request, in the order of the requests
+    """
+    results = [
+        result
+        async for result in batch_async_as_completed(
+            client=client,
+            requests=requests,
+            max_concurrency=max_concurrency,
+            fast_decode=fast_decode,
+        )
+    ]
+    return sorted(results, key=lambda result: result.index)
+
+
 __all__ = [
     "sync",
     "sync_detailed",
     "asyncio",
     "asyncio_detailed",
+    "stream",
+    "stream_async",
+    "iter_rows",
+    "iter_row_chunks",
+    "iter_rows_async",
+    "iter_row_chunks_async",
+    "sync_columnar",
+    "asyncio_columnar",
+    "BatchResult",
+    "batch_sync",
+    "batch_sync_as_completed",
+    "batch_async",
+    "batch_async_as_completed",
 ]
@@ -1,10 +1,16 @@
+import asyncio as asyncio_module
+import threading
+from functools import partial
 from http import HTTPStatus
 from typing import Any, Optional
 
 import httpx
 
+from .cache import EncodedBodyCache, TTLCache, encode_body, result_namespace
 from .client import VizQLDataServiceClient
+from .coalesce import asend_request, send_request
 from .errors import UnexpectedStatus
+from .fingerprint import fingerprint
 from .openapi_generated import MetadataOutput, ReadMetadataRequest
 from .types import Response
 
@@ -12,6 +18,7 @@ from .types import Response
 def _get_kwargs(
     *,
     body: ReadMetadataRequest,
+    body_cache: Optional[EncodedBodyCache] = None,
 ) -> dict[str, Any]:
     headers: dict[str, Any] = {}
 
@@ -20,8 +27,7 @@ def _get_kwargs(
         "url": "/read-metadata",
     }
 
-    _body = body.model_dump(mode="json", exclude_none=True)
-    _kwargs["json"] = _body
+    _kwargs["content"] = encode_body(body, body_cache)
     headers["Content-Type"] = "application/json"
 
     _kwargs["headers"] = headers
@@ -44,13 +50,108 @@ def _parse_response(
 def _build_response(
     *, client: VizQLDataServiceClient, response: httpx.Response
 ) -> Response[MetadataOutput]:
+    if response.status_code != 200:
+        # Unexpected statuses are still raised when the response is built
+        return Response(
+            status_code=HTTPStatus(response.status_code),
+            content=response.content,
+            headers=response.headers,
+            parsed=_parse_response(client=client, response=response),
+        )
     return Response(
         status_code=HTTPStatus(response.status_code),
         content=response.content,
         headers=response.headers,
-        parsed=_parse_response(client=client, response=response),
+        parser=partial(_parse_response, client=client, response=response),
+        release_content=client.release_content,
+    )
+
+
+def _build_cached_response(
+    *, client: VizQLDataServiceClient, response: httpx.Response
+) -> Response[MetadataOutput]:
+    # Each hit gets its own Response, so releasing its content does not empty the response of other callers
+    cached = _build_response(client=client, response=response)
+    cached.cache_hit = True
+    return cached
+
+
+def _send(
+    *, client: VizQLDataServiceClient, body: ReadMetadataRequest
+) -> httpx.Response:
+    kwargs = _get_kwargs(
+        body=body,
+        body_cache=client.body_cache,
     )
 
+    return send_request(client, body, kwargs)
+
+
+async def _asend(
+    *, client: VizQLDataServiceClient, body: ReadMetadataRequest
+) -> httpx.Response:
+    kwargs = _get_kwargs(
+        body=body,
+        body_cache=client.body_cache,
+    )
+
+    return await asend_request(client, body, kwargs, hedged=True)
+
+
+def _bypasses_cache(body: ReadMetadataRequest) -> bool:
+    return bool(body.options and body.options.bypassMetadataCache)
+
+
+def _cache_key(client: VizQLDataServiceClient, body: ReadMetadataRequest) -> str:
+    """Return the cache key of a request, scoped to the server, site and user of the client"""
+    if body.options and body.options.bypassMetadataCache:
+        # A request bypassing the cache refreshes the entry of the same request without the option
+        options = body.options.model_copy(update={"bypassMetadataCache": False})
+        body = body.model_copy(update={"options": options})
+    return f"{result_namespace(client.server, client.auth)}:{fingerprint(body)}"
+
+
+def _store(
+    cache: TTLCache[httpx.Response],
+    key: str,
+    response: httpx.Response,
+) -> httpx.Response:
+    if response.status_code == 200:
+        cache.set(key, response, size=len(response.content))
+    return response
+
+
+def _refresh(
+    client: VizQLDataServiceClient,
+    body: ReadMetadataRequest,
+    cache: TTLCache[httpx.Response],
+    key: str,
+) -> None:
+    try:
+        _store(cache, key, _send(client=client, body=body))
+    except Exception:
+        # The stale entry keeps being served until it expires, and the next request after that retries
+        pass
+    finally:
+        cache.finish_refresh(key)
+
+
+async def _arefresh(
+    client: VizQLDataServiceClient,
+    body: ReadMetadataRequest,
+    cache: TTLCache[httpx.Response],
+    key: str,
+) -> None:
+    try:
+        _store(cache, key, await _asend(client=client, body=body))
+    except Exception:
+        pass
+    finally:
+        cache.finish_refresh(key)
+
+
+_refresh_tasks: set["asyncio_module.Task[None]"] = set()
+
 
 def sync_detailed(
     *,
@@ -67,6 +168,10 @@ def sync_detailed(
 
      The metadata provides information about the data fields, such as field names, data types, and descriptions.
 
+     When the client has a metadata_cache, a fresh cached response is returned without a request, and is marked
+     with cache_hit. A stale one is returned while it is refreshed in the background. Requests with
+     options.bypassMetadataCache set always go to the server and replace the cached response.
+
     Args:
         body (ReadMetadataRequest): The metadata request parameters
 
@@ -78,16 +183,23 @@ def sync_detailed(
         Response[MetadataOutput]: A response object containing both the metadata and response metadata
     """
 
-    kwargs = _get_kwargs(
-        body=body,
+    cache = client.metadata_cache
+    if cache is None:
+        return _build_response(client=client, response=_send(client=client, body=body))
+
+    key = _cache_key(client, body)
+    if not _bypasses_cache(body):
+        entry = cache.get(key)
+        if entry is not None:
+            if entry.stale and cache.start_refresh(key):
+                threading.Thread(
+                    target=_refresh, args=(client, body, cache, key), daemon=True
+                ).start()
+            return _build_cached_response(client=client, response=entry.value)
+    return _build_response(
+        client=client, response=_store(cache, key, _send(client=client, body=body))
     )
 
-    response = client.client.get_httpx_client().request(
-        **kwargs,
-    )
-
-    return _build_response(client=client, response=response)
-
 
 def sync(
     *,
@@ -133,6 +245,11 @@ async def asyncio_detailed(
 
      The metadata provides information about the data fields, such as field names, data types, and descriptions.
 
+     When the client has a metadata_cache, a fresh cached response is returned without a request, and is marked
+     with cache_hit. A stale one is returned while it is refreshed in the background. Requests with
+     options.bypassMetadataCache set always go to the server and replace the cached response. When the client has
+     a hedging policy, a slow request is sent again and the first response is used.
+
     Args:
         body (ReadMetadataRequest): The metadata request parameters
 
@@ -144,13 +261,27 @@ async def asyncio_detailed(
         Response[MetadataOutput]: A response object containing both the metadata and response metadata
     """
 
-    kwargs = _get_kwargs(
-        body=body,
-    )
-
-    response = await client.client.get_async_httpx_client().request(**kwargs)
+    cache = client.metadata_cache
+    if cache is None:
+        return _build_response(
+            client=client, response=await _asend(client=client, body=body)
+        )
 
-    return _build_response(client=client, response=response)
+    key = _cache_key(client, body)
+    if not _bypasses_cache(body):
+        entry = cache.get(key)
+        if entry is not None:
+            if entry.stale and cache.start_refresh(key):
+                task = asyncio_module.get_running_loop().create_task(
+                    _arefresh(client, body, cache, key)
+                )
+                _refresh_tasks.add(task)
+                task.add_done_callback(_refresh_tasks.discard)
+            return _build_cached_response(client=client, response=entry.value)
+    return _build_response(
+        client=client,
+        response=_store(cache, key, await _asend(client=client, body=body)),
+    )
 
 
 async def asyncio(
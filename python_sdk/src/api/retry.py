@@ -0,0 +1,218 @@
+"""
+Retry Module
+
+This module provides httpx transports that retry requests failing with transient errors, with jittered exponential
+backoff and a retry budget shared by all requests.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+from attrs import define, field
+
+# Errors raised before the request reached the server, so sending it again cannot repeat its effect
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+RETRYABLE_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class RetryBudget:
+    """A budget limiting retries to a fraction of requests, shared by every request of a client
+
+    The budget holds up to ``max_tokens`` tokens and starts full. Each failure about to be retried takes a token and each
+    successful request gives back ``token_ratio`` tokens. Retries are only allowed while more than half of the
+    tokens are left, so when most requests fail, as during an overload, retries stop instead of adding to the
+    load.
+
+    Args:
+        max_tokens: The number of tokens of a full budget.
+        token_ratio: The number of tokens given back by each successful request.
+    """
+
+    def __init__(self, max_tokens: float = 10.0, token_ratio: float = 0.1):
+        if max_tokens <= 0 or token_ratio <= 0:
+            raise ValueError("max_tokens and token_ratio must be positive")
+        self.max_tokens = max_tokens
+        self.token_ratio = token_ratio
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> float:
+        """The number of tokens left"""
+        return self._tokens
+
+    def record_success(self) -> None:
+        """Give back tokens for a successful request"""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.token_ratio)
+
+    def record_failure(self) -> bool:
+        """Take a token for a failure about to be retried, returning whether the request may be retried"""
+        with self._lock:
+            self._tokens = max(0.0, self._tokens - 1)
+            return self._tokens > self.max_tokens / 2
+
+
+@define
+class RetryPolicy:
+    """When and how long to wait before sending a failed request again
+
+    Requests are retried when they fail to connect or receive a status in ``retry_statuses``. The n-th retry
+    waits a random time between 0 and ``min(backoff_max, backoff_base * 2 ** (n - 1))`` seconds, or for the
+    time given by the Retry-After header of the response if it is longer. A response asking to wait more than
+    ``max_retry_after`` seconds is returned without retrying.
+
+    Attributes:
+        max_attempts: The maximum number of times a request is sent, including the first.
+        backoff_base: The upper bound in seconds of the wait before the first retry.
+        backoff_max: The largest upper bound in seconds of the wait before a retry.
+        max_retry_after: The longest wait in seconds requested by a Retry-After header that is honoured.
+        retry_statuses: The response statuses that are retried.
+        budget: The retry budget shared by the requests of the client, or None for no budget.
+    """
+
+    max_attempts: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    max_retry_after: float = 60.0
+    retry_statuses: frozenset[int] = RETRYABLE_STATUSES
+    budget: Optional[RetryBudget] = field(factory=RetryBudget)
+
+    def __attrs_post_init__(self) -> None:
+        if self.max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+
+    def backoff(self, retry: int) -> float:
+        """Return a random wait in seconds before a retry, counting retries from 1"""
+        return random.uniform(
+            0, min(self.backoff_max, self.backoff_base * 2 ** (retry - 1))
+        )
+
+    def delay(
+        self, retry: int, response: Optional[httpx.Response] = None
+    ) -> Optional[float]:
+        """Return the wait in seconds before a retry, or None if the request must not be retried
+
+        Args:
+            retry: The number of the retry, from 1.
+            response: The response to the failed attempt, or None if it raised a connection error.
+        """
+        if response is not None and response.status_code not in self.retry_statuses:
+            return None
+        if retry >= self.max_attempts:
+            return None
+        delay = self.backoff(retry)
+        retry_after = _retry_after(response) if response is not None else None
+        if retry_after is not None:
+            if retry_after > self.max_retry_after:
+                return None
+            delay = max(delay, retry_after)
+        # Only failures that would be retried take a token, so requests never retried do not drain the budget
+        if self.budget is not None and not self.budget.record_failure():
+            return None
+        return delay
+
+    def record_success(self) -> None:
+        """Record a request that did not need to be retried in the retry budget"""
+        if self.budget is not None:
+            self.budget.record_success()
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Return the wait in seconds requested by the Retry-After header of a response, if any"""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryTransport(httpx.BaseTransport):
+    """A transport sending requests through another transport and retrying them as set by a retry policy
+
+    Args:
+        transport: The transport sending each attempt.
+        policy: The retry policy.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, policy: RetryPolicy):
+        self.transport = transport
+        self.policy = policy
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        retry = 1
+        while True:
+            try:
+                response = self.transport.handle_request(request)
+            except RETRYABLE_ERRORS:
+                delay = self.policy.delay(retry)
+                if delay is None:
+                    raise
+            else:
+                if response.status_code not in self.policy.retry_statuses:
+                    self.policy.record_success()
+                    return response
+                delay = self.policy.delay(retry, response)
+                if delay is None:
+                    return response
+                response.close()
+            time.sleep(delay)
+            retry += 1
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """An async transport sending requests through another transport and retrying them as set by a retry policy
+
+    Args:
+        transport: The transport sending each attempt.
+        policy: The retry policy.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, policy: RetryPolicy):
+        self.transport = transport
+        self.policy = policy
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        retry = 1
+        while True:
+            try:
+                response = await self.transport.handle_async_request(request)
+            except RETRYABLE_ERRORS:
+                delay = self.policy.delay(retry)
+                if delay is None:
+                    raise
+            else:
+                if response.status_code not in self.policy.retry_statuses:
+                    self.policy.record_success()
+                    return response
+                delay = self.policy.delay(retry, response)
+                if delay is None:
+                    return response
+                await response.aclose()
+            await asyncio.sleep(delay)
+            retry += 1
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+__all__ = [
+    "AsyncRetryTransport",
+    "RetryBudget",
+    "RetryPolicy",
+    "RetryTransport",
+]
@@ -0,0 +1,141 @@
+from http import HTTPStatus
+from typing import Any, Optional
+
+import httpx
+
+from .client import VizQLDataServiceClient
+from .errors import UnexpectedStatus
+from .types import Response
+
+SIMPLE_REQUEST_PATH = "/simple-request"
+
+
+def _get_kwargs() -> dict[str, Any]:
+    _kwargs: dict[str, Any] = {
+        "method": "get",
+        "url": SIMPLE_REQUEST_PATH,
+    }
+
+    return _kwargs
+
+
+def _parse_response(
+    *, client: VizQLDataServiceClient, response: httpx.Response
+) -> Optional[str]:
+    if response.status_code == 200:
+        response_200 = response.json()
+
+        return str(response_200)
+    if client.raise_on_unexpected_status:
+        raise UnexpectedStatus(response.status_code, response.content)
+    else:
+        return None
+
+
+def _build_response(
+    *, client: VizQLDataServiceClient, response: httpx.Response
+) -> Response[str]:
+    return Response(
+        status_code=HTTPStatus(response.status_code),
+        content=response.content,
+        headers=response.headers,
+        parsed=_parse_response(client=client, response=response),
+    )
+
+
+def sync_detailed(
+    *,
+    client: VizQLDataServiceClient,
+) -> Response[str]:
+    """Send a simple request with detailed response information
+
+    Sends a request that needs no authentication and does no work on the server, for testing the connection or
+    checking the health of the server, and returns a detailed response containing:
+    - The message of the server
+    - HTTP status code
+    - Response headers
+    - Raw response content
+
+    Raises:
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Returns:
+        Response[str]: A response object containing both the message and response metadata.
+    """
+
+    response = client.client.get_httpx_client().request(**_get_kwargs())
+
+    return _build_response(client=client, response=response)
+
+
+def sync(
+    *,
+    client: VizQLDataServiceClient,
+) -> Optional[str]:
+    """Send a simple request and get only the message
+
+    This is a convenience wrapper around sync_detailed() that returns only the message of the server.
+
+    Raises:
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Returns:
+        Optional[str]: The message of the server, or None if the request was unsuccessful.
+    """
+
+    return sync_detailed(client=client).parsed
+
+
+async def asyncio_detailed(
+    *,
+    client: VizQLDataServiceClient,
+) -> Response[str]:
+    """Send a simple request asynchronously with detailed response information
+
+    Asynchronously sends a request that needs no authentication and does no work on the server, for testing the
+    connection or checking the health of the server, and returns a detailed response containing:
+    - The message of the server
+    - HTTP status code
+    - Response headers
+    - Raw response content
+
+    Raises:
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Returns:
+        Response[str]: A response object containing both the message and response metadata.
+    """
+
+    response = await client.client.get_async_httpx_client().request(**_get_kwargs())
+
+    return _build_response(client=client, response=response)
+
+
+async def asyncio(
+    *,
+    client: VizQLDataServiceClient,
+) -> Optional[str]:
+    """Send a simple request asynchronously and get only the message
+
+    This is a convenience wrapper around asyncio_detailed() that returns only the message of the server.
+
+    Raises:
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Returns:
+        Optional[str]: The message of the server, or None if the request was unsuccessful.
+    """
+
+    return (await asyncio_detailed(client=client)).parsed
+
+
+__all__ = [
+    "sync",
+    "sync_detailed",
+    "asyncio",
+    "asyncio_detailed",
+]
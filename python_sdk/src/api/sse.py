@@ -0,0 +1,97 @@
+"""
+Server-Sent Events Module
+
+This module provides an incremental decoder for ``text/event-stream`` response bodies.
+"""
+
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from typing import Optional
+
+from attrs import define, field
+
+SSE_CONTENT_TYPE = "text/event-stream"
+
+
+@define
+class ServerSentEvent:
+    """A single event dispatched from an event stream"""
+
+    event: str = "message"
+    data: str = ""
+    id: Optional[str] = None
+
+
+@define
+class SSEDecoder:
+    """Decode an event stream line by line, as described by the WHATWG HTML specification
+
+    Lines must be passed without their trailing line terminator, as produced by
+    ``httpx.Response.iter_lines``. An event is returned once the blank line terminating it is seen.
+    """
+
+    _event: str = field(default="", init=False)
+    _data: list[str] = field(factory=list, init=False)
+    _last_event_id: Optional[str] = field(default=None, init=False)
+
+    def decode(self, line: str) -> Optional[ServerSentEvent]:
+        """Feed one line into the decoder and return the event it completes, if any"""
+        if not line:
+            if not self._data:
+                self._event = ""
+                return None
+            sse = ServerSentEvent(
+                event=self._event or "message",
+                data="\n".join(self._data),
+                id=self._last_event_id,
+            )
+            self._event = ""
+            self._data = []
+            return sse
+
+        if line.startswith(":"):
+            return None
+
+        name, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+
+        if name == "event":
+            self._event = value
+        elif name == "data":
+            self._data.append(value)
+        elif name == "id":
+            if "\0" not in value:
+                self._last_event_id = value
+        return None
+
+    def flush(self) -> None:
+        """Discard the pending event, if any, once the stream has ended
+
+        An event not terminated by a blank line is incomplete and is not dispatched, as the specification
+        requires.
+        """
+        self._event = ""
+        self._data = []
+
+
+def iter_sse(lines: Iterable[str]) -> Iterator[ServerSentEvent]:
+    """Yield events from an iterable of event stream lines"""
+    decoder = SSEDecoder()
+    for line in lines:
+        sse = decoder.decode(line.rstrip("\r"))
+        if sse is not None:
+            yield sse
+    decoder.flush()
+
+
+async def aiter_sse(lines: AsyncIterable[str]) -> AsyncIterator[ServerSentEvent]:
+    """Yield events from an async iterable of event stream lines"""
+    decoder = SSEDecoder()
+    async for line in lines:
+        sse = decoder.decode(line.rstrip("\r"))
+        if sse is not None:
+            yield sse
+    decoder.flush()
+
+
+__all__ = ["SSE_CONTENT_TYPE", "SSEDecoder", "ServerSentEvent", "aiter_sse", "iter_sse"]
@@ -0,0 +1,248 @@
+"""
+Token Cache Module
+
+This module stores Tableau session tokens in an encrypted file, so that new clients and processes can reuse a valid
+session instead of signing in again. It requires the optional ``cryptography`` package, installed with the
+``crypto`` extra.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import tableauserverclient as TSC
+from attrs import asdict, define
+
+from .auth import TableauAuth, restore_session
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:  # pragma: no cover - exercised only without the crypto extra
+    Fernet = None  # type: ignore
+
+
+@define
+class CachedSession:
+    """A session token stored in a TokenCache
+
+    Attributes:
+        token: The session token.
+        site_id: The LUID of the site signed in to.
+        user_id: The LUID of the signed in user.
+        expires_at: The Unix time after which the session is no longer reused.
+        site_url: The content URL of the site signed in to, None in files written without it.
+    """
+
+    token: str
+    site_id: str
+    user_id: str
+    expires_at: float
+    site_url: Optional[str] = None
+
+
+def principal(auth: TableauAuth) -> str:
+    """Return the identity that a set of credentials signs in as
+
+    This is the user name, the name of the personal access token, or the subject of the JWT, followed by the
+    user impersonated, if any.
+
+    Args:
+        auth: The credentials.
+    """
+    if isinstance(auth, TSC.TableauAuth):
+        identity = f"user:{auth.username}"
+    elif isinstance(auth, TSC.PersonalAccessTokenAuth):
+        identity = f"pat:{auth.token_name}"
+    elif isinstance(auth, TSC.JWTAuth):
+        identity = f"jwt:{_jwt_subject(auth.jwt)}"
+    else:
+        raise TypeError(f"Unsupported credentials: {type(auth).__name__}")
+    if auth.user_id_to_impersonate:
+        identity += f"/{auth.user_id_to_impersonate}"
+    return identity
+
+
+def _jwt_subject(jwt: str) -> str:
+    """Return the issuer and subject of a JWT, read without verifying it"""
+    try:
+        payload = jwt.split(".")[1]
+        claims = json.loads(
+            base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+        )
+        return f"{claims.get('iss', '')}:{claims['sub']}"
+    except (IndexError, KeyError, TypeError, ValueError):
+        # Without a readable subject, the session can only be reused with the same JWT
+        return hashlib.sha256(jwt.encode()).hexdigest()
+
+
+def _secret(auth: TableauAuth) -> Optional[str]:
+    """Return the password or personal access token secret of a set of credentials
+
+    JWTs have no lasting secret: each sign-in uses a newly issued JWT, so their sessions are keyed by the issuer
+    and subject of the JWT alone.
+    """
+    if isinstance(auth, TSC.TableauAuth):
+        return auth.password
+    if isinstance(auth, TSC.PersonalAccessTokenAuth):
+        return auth.personal_access_token
+    return None
+
+
+class TokenCache:
+    """Session tokens stored in a file encrypted with Fernet, keyed by server, site, principal and credentials
+
+    A session is reused for ``ttl`` seconds after signing in, which should be shorter than the session timeout of
+    the server. Each write replaces the file atomically, so processes sharing the file never read a partly
+    written one, but concurrent writers may drop each other's new sessions. A file that cannot be decrypted with
+    the key is treated as empty.
+
+    For passwords and personal access tokens the key includes a hash of the secret, so a session is only reused
+    with the credentials that signed it in. Personal access token names are only unique per user, and a
+    changed or revoked secret must not restore a session. JWT sessions are keyed by the issuer and subject of
+    the JWT, so that newly issued JWTs of the same subject reuse the session.
+
+    Args:
+        path: The path of the cache file, created with owner-only permissions if it does not exist.
+        key: The Fernet key encrypting the file, such as returned by generate_key().
+        ttl: The number of seconds a session is reused for after signing in.
+        clock: The clock used to expire sessions, in Unix time.
+
+    Raises:
+        ImportError: If the cryptography package is not installed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        key: bytes,
+        *,
+        ttl: float = 3600.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        if Fernet is None:
+            raise ImportError(
+                "TokenCache requires the cryptography package: pip install vizql-data-service-py[crypto]"
+            )
+        self.path = os.fspath(path)
+        self.ttl = ttl
+        self.clock = clock
+        self._fernet = Fernet(key)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def generate_key() -> bytes:
+        """Return a new random key for a cache file"""
+        if Fernet is None:
+            raise ImportError(
+                "TokenCache requires the cryptography package: pip install vizql-data-service-py[crypto]"
+            )
+        return Fernet.generate_key()
+
+    @staticmethod
+    def cache_key(server: TSC.Server, auth: TableauAuth) -> str:
+        """Return the key of the sessions of a server, site, principal and credentials"""
+        parts = [server.server_address, auth.site_id or "", principal(auth)]
+        secret = _secret(auth)
+        if secret is not None:
+            parts.append(hashlib.sha256(secret.encode()).hexdigest())
+        identity = json.dumps(parts)
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+    def _read(self) -> dict[str, Any]:
+        try:
+            with open(self.path, "rb") as file:
+                return json.loads(self._fernet.decrypt(file.read()))
+        except (FileNotFoundError, InvalidToken, ValueError):
+            return {}
+
+    def _write(self, sessions: dict[str, Any]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".tokens-")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(self._fernet.encrypt(json.dumps(sessions).encode()))
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def get(self, server: TSC.Server, auth: TableauAuth) -> Optional[CachedSession]:
+        """Return the unexpired session of a server, site and principal, or None"""
+        with self._lock:
+            stored = self._read().get(self.cache_key(server, auth))
+        if stored is None:
+            return None
+        session = CachedSession(**stored)
+        return session if session.expires_at > self.clock() else None
+
+    def set(self, server: TSC.Server, auth: TableauAuth) -> CachedSession:
+        """Store the session that a server has just signed in to with a set of credentials"""
+        now = self.clock()
+        session = CachedSession(
+            server.auth_token,
+            server.site_id,
+            server.user_id,
+            now + self.ttl,
+            server.site_url,
+        )
+        with self._lock:
+            sessions = {
+                key: stored
+                for key, stored in self._read().items()
+                if stored["expires_at"] > now
+            }
+            sessions[self.cache_key(server, auth)] = asdict(session)
+            self._write(sessions)
+        return session
+
+    def invalidate(
+        self, server: TSC.Server, auth: TableauAuth, token: Optional[str] = None
+    ) -> bool:
+        """Remove the session of a server, site and principal, returning whether there was one
+
+        Args:
+            server: The server.
+            auth: The credentials.
+            token: If given, the session is only removed if it has this token, so that a session stored by
+                another process since this token was read is kept.
+        """
+        key = self.cache_key(server, auth)
+        with self._lock:
+            sessions = self._read()
+            stored = sessions.get(key)
+            if stored is None or (token is not None and stored["token"] != token):
+                return False
+            del sessions[key]
+            self._write(sessions)
+        return True
+
+    def sign_in(self, server: TSC.Server, auth: TableauAuth) -> str:
+        """Restore a cached session on a server, or sign in and cache the new session
+
+        Args:
+            server: The server to sign in to.
+            auth: The credentials to sign in with.
+
+        Returns:
+            str: The session token, also set on the server.
+        """
+        session = self.get(server, auth)
+        if session is not None:
+            restore_session(
+                server,
+                session.site_id,
+                session.user_id,
+                session.token,
+                session.site_url,
+            )
+            return session.token
+        server.auth.sign_in(auth)
+        return self.set(server, auth).token
+
+
+__all__ = ["CachedSession", "TokenCache", "principal"]
@@ -2,9 +2,9 @@
 
 from collections.abc import MutableMapping
 from http import HTTPStatus
-from typing import BinaryIO, Generic, Literal, Optional, TypeVar
+from typing import BinaryIO, Callable, Generic, Literal, Optional, TypeVar
 
-from attrs import define
+from attrs import define, field
 
 
 class Unset:
@@ -35,12 +35,45 @@ T = TypeVar("T")
 
 @define
 class Response(Generic[T]):
-    """A response from an endpoint"""
+    """A response from an endpoint
+
+    When a ``parser`` is given, ``parsed`` is computed from the response on first access and cached, so
+    callers that only read ``status_code`` and ``content`` pay no decode cost.
+
+    Attributes:
+        status_code: The HTTP status code of the response.
+        content: The raw response body. Empty once it has been released.
+        headers: The response headers.
+        parsed: The parsed response body.
+        release_content: Whether ``content`` is released once ``parsed`` has been computed, so the raw body
+            and the parsed value are not both held in memory.
+        cache_hit: Whether the response was served from a cache instead of the server.
+    """
 
     status_code: HTTPStatus
-    content: bytes
+    _content: bytes = field(alias="content")
     headers: MutableMapping[str, str]
-    parsed: Optional[T]
+    _parsed: Optional[T] = field(default=None, alias="parsed")
+    _parser: Optional[Callable[[], Optional[T]]] = field(
+        default=None, kw_only=True, alias="parser"
+    )
+    release_content: bool = field(default=False, kw_only=True)
+    cache_hit: bool = field(default=False, kw_only=True)
+
+    @property
+    def content(self) -> bytes:
+        """The raw response body"""
+        return self._content
+
+    @property
+    def parsed(self) -> Optional[T]:
+        """The parsed response body, computed on first access"""
+        if self._parser is not None:
+            self._parsed = self._parser()
+            self._parser = None
+            if self.release_content:
+                self._content = b""
+        return self._parsed
 
 
 __all__ = ["UNSET", "File", "FileJsonType", "Response", "Unset"]
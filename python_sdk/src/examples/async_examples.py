@@ -1,8 +1,6 @@
 import os
 import sys
 
-import tableauserverclient as TSC
-
 # Add project root to sys.path
 root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 sys.path.insert(0, root_dir)
@@ -17,6 +15,7 @@ if is_development:
         query_datasource,
         read_metadata,
     )
+    from src.api.auth import sign_out_async
     from src.api.client import VizQLDataServiceClient
     from src.api.openapi_generated import (
         GetDatasourceModelRequest,
@@ -31,6 +30,7 @@ else:
         query_datasource,
         read_metadata,
     )
+    from vizql_data_service_py.api.auth import sign_out_async  # type: ignore
     from vizql_data_service_py.api.client import VizQLDataServiceClient  # type: ignore
     from vizql_data_service_py.api.openapi_generated import (  # type: ignore
         GetDatasourceModelRequest,
@@ -51,10 +51,11 @@ async def execute(args):
         site_id=args.site,
     )
 
-    server = TSC.Server(server_url)
+    # Sign in over the client's own connection, without blocking the event loop
+    client = await VizQLDataServiceClient.connect(server_url, auth)
+    server = client.server
 
-    with server.auth.sign_in(auth):
-        client = VizQLDataServiceClient(server_url, server, auth)
+    try:
         datasource_luid = common.list_datasources_and_get_luid(server, args.verbose)
         datasource = common.create_datasource(datasource_luid)
 
@@ -73,27 +74,26 @@ async def execute(args):
         except Exception as e:
             common.handle_error(e, "ReadMetadata Query", args.verbose)
 
-        # Query data source examples
-        async def execute_query(query_func):
-            try:
-                query_request = QueryRequest(query=query_func(), datasource=datasource)
-                print(f"\n=== ExecuteQuery: {query_func.__name__} ===")
-                if args.verbose:
-                    print(f"Request Body: {query_request}")
-
-                response = await query_datasource.asyncio_detailed(
-                    client=client, body=query_request
+        # Query data source examples, run concurrently
+        query_requests = [
+            QueryRequest(query=query_func(), datasource=datasource)
+            for query_func in QUERY_FUNCTIONS
+        ]
+        results = await query_datasource.batch_async(
+            client=client, requests=query_requests, max_concurrency=8
+        )
+        for query_func, result in zip(QUERY_FUNCTIONS, results):
+            print(f"\n=== ExecuteQuery: {query_func.__name__} ===")
+            if args.verbose:
+                print(f"Request Body: {result.request}")
+            if result.error is not None:
+                common.handle_error(
+                    result.error, f"Query {query_func.__name__}", args.verbose
                 )
+            else:
                 common.handle_response(
-                    response, f"Query {query_func.__name__}", args.verbose
+                    result.response, f"Query {query_func.__name__}", args.verbose
                 )
-            except Exception as e:
-                print(f"\n=== ExecuteQuery: {query_func.__name__} ===")
-                common.handle_error(e, f"Query {query_func.__name__}", args.verbose)
-
-        # Execute queries sequentially
-        for query_func in QUERY_FUNCTIONS:
-            await execute_query(query_func)
 
         # Get datasource model example
         try:
@@ -110,3 +110,7 @@ async def execute(args):
             )
         except Exception as e:
             common.handle_error(e, "GetDatasourceModel", args.verbose)
+    finally:
+        await sign_out_async(
+            client.get_async_httpx_client(), server_url, server.auth_token
+        )
@@ -0,0 +1,80 @@
+from typing import Callable
+from unittest.mock import Mock
+
+import httpx
+import pytest
+import tableauserverclient as TSC
+
+from src.api.client import VizQLDataServiceClient
+from src.api.openapi_generated import (
+    Datasource,
+    DimensionField,
+    Field,
+    Query,
+    QueryRequest,
+)
+
+
+class FakeClock:
+    """A clock that only moves when a test sets its time"""
+
+    def __init__(self, now: float = 0.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def make_client() -> Callable[..., VizQLDataServiceClient]:
+    """Return a factory of signed in clients whose requests are answered by a handler"""
+
+    def make(handler, **options) -> VizQLDataServiceClient:
+        server = TSC.Server("http://localhost")
+        server._auth_token = "mock-token"  # type: ignore
+        return VizQLDataServiceClient(
+            "http://localhost",
+            server,
+            TSC.TableauAuth("test-user", "test-password"),
+            httpx_args={"transport": httpx.MockTransport(handler)},
+            **options,
+        )
+
+    return make
+
+
+@pytest.fixture
+def make_mock_client() -> Callable[[], Mock]:
+    """Return a factory of mock clients whose options are off, as in a client created with the defaults"""
+
+    def make() -> Mock:
+        client = Mock(spec=VizQLDataServiceClient)
+        client.release_content = False
+        client.body_cache = None
+        client.metadata_cache = None
+        client.result_cache = None
+        client.single_flight = None
+        client.hedging = None
+        client.fast_decode = False
+        client.fast_decode_sample_rows = 0
+        return client
+
+    return make
+
+
+@pytest.fixture
+def make_query_request() -> Callable[..., QueryRequest]:
+    """Return a factory of queries of one dimension of a test datasource"""
+
+    def make(caption: str = "Category") -> QueryRequest:
+        return QueryRequest(
+            datasource=Datasource(datasourceLuid="test-datasource"),
+            query=Query(fields=[Field(root=DimensionField(fieldCaption=caption))]),
+        )
+
+    return make
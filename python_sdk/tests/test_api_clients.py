@@ -6,7 +6,7 @@ import pytest
 import tableauserverclient as TSC
 from httpx import Response
 
-from src.api import query_datasource, read_metadata
+from src.api import query_datasource, read_metadata, simple_request
 from src.api.client import VizQLDataServiceClient
 from src.api.openapi_generated import (
     Datasource,
@@ -246,3 +246,37 @@ async def test_async_query_request(
     assert data[0] == ["Furniture", 10.459905215419496]
     assert data[1] == ["Office Supplies", 32.73404617851419]
     assert data[2] == ["Technology", 94.20657260362681]
+
+
+def test_sync_simple_request(
+    client: VizQLDataServiceClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test synchronous simple request"""
+    requests = []
+
+    def mock_request(*args: Any, **kwargs: Any) -> Response:
+        requests.append(kwargs)
+        return Response(status_code=200, json="Hello from VizQL Data Service")
+
+    monkeypatch.setattr(httpx.Client, "request", mock_request)
+
+    response = simple_request.sync_detailed(client=client)
+
+    assert requests == [{"method": "get", "url": "/simple-request"}]
+    assert response.parsed == "Hello from VizQL Data Service"
+
+
+@pytest.mark.asyncio
+async def test_async_simple_request(
+    client: VizQLDataServiceClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test asynchronous simple request"""
+
+    async def mock_request(*args: Any, **kwargs: Any) -> Response:
+        return Response(status_code=503, content=b"unavailable")
+
+    monkeypatch.setattr(httpx.AsyncClient, "request", mock_request)
+
+    assert await simple_request.asyncio(client=client) is None
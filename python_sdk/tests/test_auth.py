@@ -0,0 +1,120 @@
+from typing import Optional
+from unittest.mock import Mock
+
+import httpx
+import pytest
+import tableauserverclient as TSC
+
+from src.api.auth import TokenAuth, TokenProvider
+from src.api.client import X_TABLEAU_AUTH, AuthenticatedClient, VizQLDataServiceClient
+
+
+def _server(token: Optional[str] = "token-0") -> Mock:
+    """Return a server whose every sign-in issues the next numbered token"""
+    server = Mock()
+    server.auth_token = token
+    server.is_signed_in.side_effect = lambda: server.auth_token is not None
+    sign_ins = []
+
+    def sign_in(auth):
+        sign_ins.append(auth)
+        server.auth_token = f"token-{len(sign_ins)}"
+
+    server.auth.sign_in.side_effect = sign_in
+    server.sign_ins = sign_ins
+    return server
+
+
+def _client(provider: TokenProvider, valid: str) -> tuple[AuthenticatedClient, list]:
+    tokens = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        tokens.append(request.headers[X_TABLEAU_AUTH])
+        status = 200 if request.headers[X_TABLEAU_AUTH] == valid else 401
+        return httpx.Response(status, json={})
+
+    client = AuthenticatedClient(
+        base_url="http://test.com",
+        token="token-0",
+        prefix="",
+        auth_header_name=X_TABLEAU_AUTH,
+        httpx_args={"transport": httpx.MockTransport(handler)},
+        auth=TokenAuth(provider, X_TABLEAU_AUTH),
+    )
+    return client, tokens
+
+
+def test_token_auth_signs_in_again_on_401():
+    """Test that a rejected request is replayed once with a new token"""
+    server = _server()
+    provider = TokenProvider(server, TSC.TableauAuth("user", "password"))
+    client, tokens = _client(provider, valid="token-1")
+
+    response = client.get_httpx_client().post("/query", content=b"{}")
+
+    assert response.status_code == 200
+    assert tokens == ["token-0", "token-1"]
+    assert len(server.sign_ins) == 1
+
+    client.get_httpx_client().post("/query")
+    assert tokens[-1] == "token-1" and len(server.sign_ins) == 1
+
+
+def test_token_provider_refreshes_before_max_age(clock):
+    """Test that a token older than max_age is replaced before it is sent"""
+    server = _server()
+    provider = TokenProvider(server, Mock(), max_age=100, clock=clock)
+
+    assert provider.get_token() == "token-0"
+    clock.now = 100
+    assert provider.expired
+    assert provider.get_token() == "token-1"
+    assert not provider.expired and len(server.sign_ins) == 1
+
+
+def test_token_provider_shares_refresh_of_rejected_token():
+    """Test that callers rejecting the same token share one sign-in"""
+    server = _server()
+    provider = TokenProvider(server, Mock())
+
+    assert provider.refresh("token-0") == "token-1"
+    assert provider.refresh("token-0") == "token-1"
+    assert len(server.sign_ins) == 1
+
+
+def test_token_provider_calls_auth_factory_for_each_sign_in():
+    """Test that new credentials are created for each sign-in"""
+    server = _server(token=None)
+    factory = Mock(side_effect=lambda: TSC.JWTAuth("jwt"))
+    provider = TokenProvider(server, factory)
+
+    assert provider.get_token() == "token-1"
+    provider.refresh("token-1")
+
+    assert factory.call_count == 2
+    assert all(isinstance(auth, TSC.JWTAuth) for auth in server.sign_ins)
+
+
+@pytest.mark.asyncio
+async def test_token_auth_async_signs_in_again_on_401():
+    """Test that the async client replays a rejected request with a new token"""
+    server = _server()
+    provider = TokenProvider(server, Mock())
+    client, tokens = _client(provider, valid="token-1")
+
+    response = await client.get_async_httpx_client().post("/query")
+
+    assert response.status_code == 200 and tokens == ["token-0", "token-1"]
+
+
+def test_vizql_client_uses_token_provider():
+    """Test that the client sends requests with the token of its provider"""
+    server = _server()
+    provider = TokenProvider(server, Mock())
+
+    client = VizQLDataServiceClient(
+        "http://localhost", server, Mock(), token_provider=provider
+    )
+
+    auth = client.client.get_httpx_client().auth
+    assert isinstance(auth, TokenAuth) and auth.provider is provider
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.api import query_datasource
+from src.api.openapi_generated import (
+    QueryRequest,
+)
+
+
+def _caption(request: httpx.Request) -> str:
+    return json.loads(request.content)["query"]["fields"][0]["fieldCaption"]
+
+
+@pytest.fixture
+def query_requests(make_query_request) -> list[QueryRequest]:
+    return [make_query_request(f"Field {i}") for i in range(10)]
+
+
+@pytest.mark.asyncio
+async def test_batch_async_returns_results_in_input_order(make_client, query_requests):
+    """Test that results are returned in input order with per-item errors"""
+    in_flight = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        caption = _caption(request)
+        # Later requests finish first
+        await asyncio.sleep(0.001 * (10 - int(caption.split()[-1])))
+        in_flight -= 1
+        if caption == "Field 3":
+            raise httpx.ConnectError("connection reset", request=request)
+        return httpx.Response(200, json={"data": [[caption]]})
+
+    results = await query_datasource.batch_async(
+        client=make_client(handler), requests=query_requests, max_concurrency=3
+    )
+
+    assert [result.index for result in results] == list(range(10))
+    assert peak == 3
+    assert isinstance(results[3].error, httpx.ConnectError) and not results[3].ok
+    assert results[5].ok and results[5].response.parsed.data == [["Field 5"]]
+    assert results[5].request is query_requests[5]
+
+
+@pytest.mark.asyncio
+async def test_batch_async_as_completed_yields_in_completion_order(
+    make_client, query_requests
+):
+    """Test that results are yielded as soon as each request completes"""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.02 if _caption(request) == "Field 0" else 0)
+        return httpx.Response(200, json={"data": []})
+
+    indexes = [
+        result.index
+        async for result in query_datasource.batch_async_as_completed(
+            client=make_client(handler), requests=query_requests[:3], max_concurrency=3
+        )
+    ]
+
+    assert indexes[-1] == 0 and sorted(indexes) == [0, 1, 2]
+
+
+def test_batch_sync_runs_on_threads(make_client, query_requests):
+    """Test that batch_sync runs requests concurrently and keeps input order"""
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return httpx.Response(200, json={"data": [[_caption(request)]]})
+
+    results = query_datasource.batch_sync(
+        client=make_client(handler), requests=query_requests, max_concurrency=4
+    )
+
+    assert [result.response.parsed.data[0][0] for result in results] == [
+        f"Field {i}" for i in range(10)
+    ]
+    assert 1 < peak <= 4
+
+
+def test_batch_rejects_invalid_concurrency(make_client, query_requests):
+    """Test that max_concurrency must be positive"""
+    with pytest.raises(ValueError):
+        query_datasource.batch_sync(
+            client=make_client(lambda request: httpx.Response(200)),
+            requests=query_requests,
+            max_concurrency=0,
+        )
@@ -0,0 +1,417 @@
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+import tableauserverclient as TSC
+
+from src.api import query_datasource, read_metadata
+from src.api.cache import EncodedBodyCache, ResultCache, TTLCache, encode_body
+from src.api.client import VizQLDataServiceClient
+from src.api.openapi_generated import (
+    Datasource,
+    DimensionField,
+    Field,
+    Query,
+    QueryOptions,
+    QueryRequest,
+    ReadMetadataRequest,
+)
+
+
+def test_encode_body_matches_model_dump(make_query_request):
+    """Test that the encoded body is the JSON of the model without unset members"""
+    body = make_query_request("Category")
+
+    assert json.loads(encode_body(body)) == body.model_dump(
+        mode="json", exclude_none=True
+    )
+
+
+def test_cache_reuses_encoding_for_same_request(make_query_request):
+    """Test that the same request object is only encoded once"""
+    cache = EncodedBodyCache(max_bytes=10_000)
+    body = make_query_request("Category")
+
+    first = cache.encode(body)
+
+    assert cache.encode(body) is first
+    assert cache.get(make_query_request("Category")) is None
+    assert len(cache) == 1 and cache.nbytes == len(first)
+
+
+def test_cache_evicts_least_recently_used(make_query_request):
+    """Test that the oldest entries are evicted once the size limit is exceeded"""
+    bodies = [make_query_request(f"Field {i}") for i in range(3)]
+    size = len(encode_body(bodies[0]))
+    cache = EncodedBodyCache(max_bytes=2 * size)
+
+    cache.encode(bodies[0])
+    cache.encode(bodies[1])
+    cache.encode(bodies[0])
+    cache.encode(bodies[2])
+
+    assert cache.get(bodies[0]) is not None
+    assert cache.get(bodies[1]) is None
+    assert cache.get(bodies[2]) is not None
+    assert cache.nbytes == 2 * size
+
+
+def test_cache_skips_bodies_larger_than_limit(make_query_request):
+    """Test that a body larger than the whole cache is not cached"""
+    cache = EncodedBodyCache(max_bytes=10)
+    body = make_query_request("Category")
+
+    assert cache.encode(body) == encode_body(body)
+    assert len(cache) == 0
+
+
+def test_client_sends_encoded_body():
+    """Test that requests are sent as pre-encoded JSON through the client's cache"""
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["Content-Type"] == "application/json"
+        sent.append(request.content)
+        return httpx.Response(200, json={"data": []})
+
+    server = TSC.Server("http://localhost")
+    server._auth_token = "mock-token"  # type: ignore
+    client = VizQLDataServiceClient(
+        "http://localhost",
+        server,
+        TSC.TableauAuth("test-user", "test-password"),
+        body_cache_max_bytes=10_000,
+    )
+    client.client.set_httpx_client(
+        httpx.Client(
+            base_url="http://localhost", transport=httpx.MockTransport(handler)
+        )
+    )
+    body = ReadMetadataRequest(datasource=Datasource(datasourceLuid="test-datasource"))
+
+    read_metadata.sync(client=client, body=body)
+    read_metadata.sync(client=client, body=body)
+
+    assert json.loads(sent[0]) == {"datasource": {"datasourceLuid": "test-datasource"}}
+    assert sent[1] == sent[0]
+    assert client.body_cache is not None and len(client.body_cache) == 1
+
+
+def test_ttl_cache_expires_entries(clock):
+    """Test that entries are fresh for their TTL, then stale, then gone"""
+    cache: TTLCache[str] = TTLCache(10, stale_ttl=5, clock=clock)
+    cache.set("key", "value")
+
+    entry = cache.get("key")
+    assert entry is not None and entry.value == "value" and not entry.stale
+    clock.now = 12
+    entry = cache.get("key")
+    assert entry is not None and entry.stale
+    clock.now = 15
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test that entries are evicted by count and by size, least recently used first"""
+    by_count: TTLCache[int] = TTLCache(60, max_entries=2)
+    by_count.set("a", 1)
+    by_count.set("b", 2)
+    by_count.get("a")
+    by_count.set("c", 3)
+    assert by_count.get("b") is None and len(by_count) == 2
+
+    by_size: TTLCache[int] = TTLCache(60, max_bytes=10)
+    by_size.set("a", 1, size=4)
+    by_size.set("b", 2, size=4)
+    by_size.set("c", 3, size=4)
+    by_size.set("d", 4, size=11)
+    assert by_size.get("a") is None and by_size.get("d") is None
+    assert by_size.nbytes == 8
+
+
+def test_ttl_cache_refresh_is_claimed_once():
+    """Test that only one caller is told to refresh a key"""
+    cache: TTLCache[int] = TTLCache(60)
+
+    assert cache.start_refresh("key")
+    assert not cache.start_refresh("key")
+    cache.set("key", 1)
+    assert cache.start_refresh("key")
+    cache.finish_refresh("key")
+    assert cache.invalidate("key") and not cache.invalidate("key")
+
+
+@pytest.fixture
+def metadata_client(clock):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(
+            200, json={"data": [{"fieldName": f"field {len(requests)}"}]}
+        )
+
+    server = TSC.Server("http://localhost")
+    server._auth_token = "mock-token"  # type: ignore
+    client = VizQLDataServiceClient(
+        "http://localhost",
+        server,
+        TSC.TableauAuth("test-user", "test-password"),
+        metadata_cache=TTLCache(60, stale_ttl=600, clock=clock),
+    )
+    transport = httpx.MockTransport(handler)
+    client.client.set_httpx_client(
+        httpx.Client(base_url="http://localhost", transport=transport)
+    )
+    client.client.set_async_httpx_client(
+        httpx.AsyncClient(base_url="http://localhost", transport=transport)
+    )
+    return client, clock, requests
+
+
+def _field_name(metadata) -> str:
+    return metadata.data[0].fieldName
+
+
+def test_read_metadata_uses_cache(metadata_client):
+    """Test that repeated metadata requests are answered from the cache"""
+    client, _, requests = metadata_client
+    body = ReadMetadataRequest(datasource=Datasource(datasourceLuid="test-datasource"))
+
+    first = read_metadata.sync(client=client, body=body)
+    second = read_metadata.sync(
+        client=client,
+        body=ReadMetadataRequest(
+            datasource=Datasource(datasourceLuid="test-datasource")
+        ),
+    )
+
+    assert len(requests) == 1
+    assert second == first
+
+
+def test_read_metadata_cache_is_not_shared_between_users(metadata_client):
+    """Test that clients of other users or servers sharing a metadata cache request their own metadata"""
+    client, _, requests = metadata_client
+    body = ReadMetadataRequest(datasource=Datasource(datasourceLuid="test-datasource"))
+    read_metadata.sync(client=client, body=body)
+
+    def other_client(
+        user: str, url: str = "http://localhost"
+    ) -> VizQLDataServiceClient:
+        server = TSC.Server(url)
+        server._set_auth("site-luid", user, "other-token")
+        other = VizQLDataServiceClient(
+            url,
+            server,
+            TSC.TableauAuth(user, "password"),
+            metadata_cache=client.metadata_cache,
+        )
+        other.client.set_httpx_client(client.get_httpx_client())
+        return other
+
+    alice = other_client("alice")
+    first = read_metadata.sync(client=alice, body=body)
+    assert read_metadata.sync(client=alice, body=body) == first
+    read_metadata.sync(client=other_client("bob"), body=body)
+    read_metadata.sync(client=other_client("alice", "http://other"), body=body)
+
+    assert len(requests) == 4
+
+
+def test_read_metadata_cache_hits_get_their_own_response(metadata_client):
+    """Test that releasing the content of a cached response does not empty it for later hits"""
+    client, _, requests = metadata_client
+    client.release_content = True
+    body = ReadMetadataRequest(datasource=Datasource(datasourceLuid="test-datasource"))
+    read_metadata.sync_detailed(client=client, body=body)
+
+    first = read_metadata.sync_detailed(client=client, body=body)
+    second = read_metadata.sync_detailed(client=client, body=body)
+    assert _field_name(first.parsed) == "field 1"
+
+    assert first is not second
+    assert first.cache_hit and second.cache_hit
+    assert first.content == b"" and second.content != b""
+    assert _field_name(second.parsed) == "field 1"
+    assert len(requests) == 1
+
+
+def test_read_metadata_bypass_refreshes_cache(metadata_client):
+    """Test that bypassMetadataCache goes to the server and replaces the cached response"""
+    client, _, requests = metadata_client
+    body = ReadMetadataRequest(datasource=Datasource(datasourceLuid="test-datasource"))
+    bypass = ReadMetadataRequest(
+        datasource=Datasource(datasourceLuid="test-datasource"),
+        options=QueryOptions(bypassMetadataCache=True),
+    )
+
+    read_metadata.sync(client=client, body=body)
+    refreshed = read_metadata.sync(client=client, body=bypass)
+
+    assert len(requests) == 2
+    assert requests[1]["options"]["bypassMetadataCache"] is True
+    assert _field_name(refreshed) == "field 2"
+    assert _field_name(read_metadata.sync(client=client, body=body)) == "field 2"
+
+
+def test_read_metadata_revalidates_stale_entries(metadata_client):
+    """Test that a stale response is returned while it is refreshed in the background"""
+    client, clock, requests = metadata_client
+    body = ReadMetadataRequest(datasource=Datasource(datasourceLuid="test-datasource"))
+    read_metadata.sync(client=client, body=body)
+    clock.now = 120
+
+    stale = read_metadata.sync(client=client, body=body)
+    for thread in threading.enumerate():
+        if thread is not threading.current_thread() and thread.daemon:
+            thread.join(timeout=5)
+
+    assert _field_name(stale) == "field 1"
+    assert len(requests) == 2
+    assert _field_name(read_metadata.sync(client=client, body=body)) == "field 2"
+
+
+@pytest.mark.asyncio
+async def test_read_metadata_revalidates_stale_entries_async(metadata_client):
+    """Test that a stale response is refreshed by a background task"""
+    client, clock, requests = metadata_client
+    body = ReadMetadataRequest(datasource=Datasource(datasourceLuid="test-datasource"))
+    await read_metadata.asyncio(client=client, body=body)
+    clock.now = 120
+
+    stale = await read_metadata.asyncio(client=client, body=body)
+    await asyncio.gather(*read_metadata._refresh_tasks)
+
+    assert _field_name(stale) == "field 1"
+    assert _field_name(await read_metadata.asyncio(client=client, body=body)) == (
+        "field 2"
+    )
+    assert len(requests) == 2
+
+
+@pytest.fixture
+def result_client(clock):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json={"data": [{"Category": len(requests)}]})
+
+    server = TSC.Server("http://localhost")
+    server._auth_token = "mock-token"  # type: ignore
+    client = VizQLDataServiceClient(
+        "http://localhost",
+        server,
+        TSC.TableauAuth("test-user", "test-password"),
+        result_cache=ResultCache(
+            10_000, ttl=60, datasource_ttls={"live-datasource": 0}, clock=clock
+        ),
+    )
+    transport = httpx.MockTransport(handler)
+    client.client.set_httpx_client(
+        httpx.Client(base_url="http://localhost", transport=transport)
+    )
+    client.client.set_async_httpx_client(
+        httpx.AsyncClient(base_url="http://localhost", transport=transport)
+    )
+    return client, clock, requests
+
+
+def test_query_results_are_cached(result_client, make_query_request):
+    """Test that equivalent queries are answered from the cache and marked as hits"""
+    client, _, requests = result_client
+
+    first = query_datasource.sync_detailed(
+        client=client, body=make_query_request("Category")
+    )
+    second = query_datasource.sync_detailed(
+        client=client, body=make_query_request("Category")
+    )
+
+    assert len(requests) == 1
+    assert not first.cache_hit and second.cache_hit
+    assert second.content == first.content
+    assert second.parsed == first.parsed and second.parsed is not first.parsed
+
+
+def test_query_results_expire_per_datasource(result_client, make_query_request):
+    """Test that results expire after their data source's TTL"""
+    client, clock, requests = result_client
+    live = QueryRequest(
+        datasource=Datasource(datasourceLuid="live-datasource"),
+        query=Query(fields=[Field(root=DimensionField(fieldCaption="Category"))]),
+    )
+
+    query_datasource.sync(client=client, body=live)
+    query_datasource.sync(client=client, body=live)
+    assert len(requests) == 2
+
+    query_datasource.sync(client=client, body=make_query_request("Category"))
+    clock.now = 61
+    query_datasource.sync(client=client, body=make_query_request("Category"))
+    assert len(requests) == 4
+
+
+def test_query_results_are_not_shared_between_users(result_client, make_query_request):
+    """Test that clients of other users or sites sharing a result cache query the server"""
+    client, _, requests = result_client
+    query_datasource.sync(client=client, body=make_query_request("Category"))
+
+    def other_client(user: str, site: str = "") -> VizQLDataServiceClient:
+        server = TSC.Server("http://localhost")
+        server._set_auth("site-luid", user, "other-token")
+        other = VizQLDataServiceClient(
+            "http://localhost",
+            server,
+            TSC.TableauAuth(user, "password", site_id=site),
+            result_cache=client.result_cache,
+        )
+        other.client.set_httpx_client(client.get_httpx_client())
+        return other
+
+    alice = other_client("alice")
+    query_datasource.sync(client=alice, body=make_query_request("Category"))
+    query_datasource.sync(client=alice, body=make_query_request("Category"))
+    query_datasource.sync(
+        client=other_client("bob"), body=make_query_request("Category")
+    )
+    query_datasource.sync(
+        client=other_client("alice", site="other"), body=make_query_request("Category")
+    )
+
+    assert len(requests) == 4
+    assert client.result_cache.invalidate(make_query_request("Category"))
+    assert len(client.result_cache) == 0
+
+
+def test_query_results_can_be_invalidated(result_client, make_query_request):
+    """Test that cached results are removed by request and by data source"""
+    client, _, requests = result_client
+    cache = client.result_cache
+
+    query_datasource.sync(client=client, body=make_query_request("Category"))
+    query_datasource.sync(client=client, body=make_query_request("Region"))
+    assert cache.invalidate(make_query_request("Category"))
+    assert cache.invalidate_datasource("test-datasource") == 1
+    assert len(cache) == 0 and cache.nbytes == 0
+
+    query_datasource.sync(client=client, body=make_query_request("Region"))
+    assert len(requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_query_results_are_cached_async(result_client, make_query_request):
+    """Test that asynchronous queries share the result cache"""
+    client, _, requests = result_client
+
+    query_datasource.sync(client=client, body=make_query_request("Category"))
+    response = await query_datasource.asyncio_detailed(
+        client=client, body=make_query_request("Category")
+    )
+
+    assert response.cache_hit
+    assert len(requests) == 1
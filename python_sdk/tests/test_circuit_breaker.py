@@ -0,0 +1,173 @@
+import httpx
+import pytest
+import tableauserverclient as TSC
+
+from src.api.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitBreakerTransport,
+)
+from src.api.client import AuthenticatedClient, VizQLDataServiceClient
+from src.api.errors import CircuitOpenError
+
+
+class FakeNode:
+    """A server failing or succeeding on demand, recording the paths it received"""
+
+    def __init__(self) -> None:
+        self.healthy = True
+        self.paths: list[str] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.paths.append(request.url.path)
+        if not self.healthy:
+            raise httpx.ReadTimeout("timed out", request=request)
+        if request.url.path.endswith("/simple-request"):
+            return httpx.Response(200, json="ok")
+        return httpx.Response(200, json={"data": []})
+
+
+def _client(node: FakeNode, breaker: CircuitBreaker) -> AuthenticatedClient:
+    return AuthenticatedClient(
+        base_url="http://test.com/api/v1/vizql-data-service",
+        token="token",
+        httpx_args={"transport": httpx.MockTransport(node)},
+        circuit_breaker=breaker,
+    )
+
+
+def test_breaker_opens_after_consecutive_failures_and_fails_fast(clock):
+    """Test that requests are not sent while the breaker is open"""
+    node = FakeNode()
+    breaker = CircuitBreaker("node", failure_threshold=2, cooldown=10, clock=clock)
+    client = _client(node, breaker).get_httpx_client()
+    node.healthy = False
+
+    for _ in range(2):
+        with pytest.raises(httpx.ReadTimeout):
+            client.post("/query-datasource")
+    with pytest.raises(CircuitOpenError) as error:
+        client.post("/query-datasource")
+
+    assert breaker.state == "open" and len(node.paths) == 2
+    assert error.value.retry_after == 10
+
+
+def test_success_resets_consecutive_failures():
+    """Test that only consecutive failures open the breaker"""
+    breaker = CircuitBreaker(failure_threshold=2)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == "closed"
+
+
+def test_half_open_breaker_probes_simple_request(clock):
+    """Test that after the cooldown a health check probes the server before requests are sent again"""
+    node = FakeNode()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=10, clock=clock)
+    client = _client(node, breaker).get_httpx_client()
+    node.healthy = False
+    with pytest.raises(httpx.ReadTimeout):
+        client.post("/query-datasource")
+
+    clock.now = 10
+    with pytest.raises(httpx.ReadTimeout):
+        client.post("/query-datasource")
+    assert breaker.state == "open"
+    assert node.paths[-1] == "/api/v1/vizql-data-service/simple-request"
+
+    clock.now = 20
+    node.healthy = True
+    assert client.post("/query-datasource").status_code == 200
+    assert breaker.state == "closed"
+    assert node.paths[-2:] == [
+        "/api/v1/vizql-data-service/simple-request",
+        "/api/v1/vizql-data-service/query-datasource",
+    ]
+
+
+def test_half_open_breaker_allows_a_single_probe(clock):
+    """Test that requests fail fast while a probe is in flight"""
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+
+    assert breaker.acquire() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    breaker.abandon_probe()
+    assert breaker.acquire() is True
+
+
+def test_pool_timeouts_do_not_open_breaker():
+    """Test that waiting on the local connection pool is not counted as a server failure"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.PoolTimeout("no connection available", request=request)
+
+    breaker = CircuitBreaker(failure_threshold=1)
+    client = AuthenticatedClient(
+        base_url="http://test.com",
+        token="token",
+        httpx_args={"transport": httpx.MockTransport(handler)},
+        circuit_breaker=breaker,
+    )
+
+    with pytest.raises(httpx.PoolTimeout):
+        client.get_httpx_client().post("/query-datasource")
+
+    assert breaker.state == "closed"
+
+
+def test_cancelled_request_does_not_reset_probe_in_flight(clock):
+    """Test that a request ending without an outcome leaves the probe started meanwhile in flight"""
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=10, clock=clock)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        # Other requests open the breaker and start a probe while this one is in flight
+        breaker.record_failure()
+        clock.now += 10
+        assert breaker.acquire()
+        raise RuntimeError("cancelled")
+
+    transport = CircuitBreakerTransport(httpx.MockTransport(handler), breaker)
+
+    with pytest.raises(RuntimeError):
+        transport.handle_request(httpx.Request("POST", "http://test.com/query"))
+
+    assert breaker.state == "half_open"
+
+
+@pytest.mark.asyncio
+async def test_async_client_fails_fast_on_open_breaker():
+    """Test that the async client shares the breaker of the sync client"""
+    node = FakeNode()
+    breaker = CircuitBreaker(failure_threshold=1)
+    client = _client(node, breaker)
+    node.healthy = False
+
+    with pytest.raises(httpx.ReadTimeout):
+        client.get_httpx_client().post("/query-datasource")
+    with pytest.raises(CircuitOpenError):
+        await client.get_async_httpx_client().post("/query-datasource")
+
+
+def test_registry_shares_breakers_by_server_and_site():
+    """Test that clients of the same server and site share a breaker, and other sites do not"""
+    registry = CircuitBreakerRegistry(failure_threshold=1)
+    server = TSC.Server("http://localhost")
+    server._auth_token = "token"  # type: ignore
+
+    def breaker(site: str) -> CircuitBreaker:
+        auth = TSC.TableauAuth("user", "password", site_id=site)
+        client = VizQLDataServiceClient(
+            "http://localhost", server, auth, circuit_breakers=registry
+        )
+        assert client.client._circuit_breaker is not None
+        return client.client._circuit_breaker
+
+    assert breaker("a") is breaker("a")
+    assert breaker("a") is not breaker("b")
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+from types import ModuleType
+from typing import Any
+
+import httpx
+import pytest
+
+from src.api import get_datasource_model, query_datasource, read_metadata
+from src.api.coalesce import SingleFlight
+from src.api.openapi_generated import (
+    Datasource,
+    GetDatasourceModelRequest,
+    ReadMetadataRequest,
+)
+
+ENDPOINTS: list[tuple[ModuleType, dict[str, Any]]] = [
+    (query_datasource, {"data": []}),
+    (read_metadata, {"data": []}),
+    (get_datasource_model, {"logicalTables": []}),
+]
+
+
+def _body(module: ModuleType, make_query_request) -> Any:
+    """Return a request of the test datasource for the endpoint of a module"""
+    if module is query_datasource:
+        return make_query_request()
+    if module is read_metadata:
+        return ReadMetadataRequest(
+            datasource=Datasource(datasourceLuid="test-datasource")
+        )
+    return GetDatasourceModelRequest(
+        datasource=Datasource(datasourceLuid="test-datasource")
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("module, payload", ENDPOINTS)
+async def test_concurrent_identical_requests_are_coalesced(
+    module, payload, make_client, make_query_request
+):
+    """Test that concurrent identical requests share one HTTP request"""
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json=payload)
+
+    client = make_client(handler, coalesce_requests=True)
+
+    results = await asyncio.gather(
+        *(
+            module.asyncio(client=client, body=_body(module, make_query_request))
+            for _ in range(20)
+        )
+    )
+
+    assert len(requests) == 1
+    assert all(result == results[0] for result in results)
+    assert len(client.single_flight._tasks) == 0
+
+
+@pytest.mark.asyncio
+async def test_different_requests_are_not_coalesced(make_client, make_query_request):
+    """Test that requests with different fingerprints are sent separately"""
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"data": []})
+
+    client = make_client(handler, coalesce_requests=True)
+
+    await asyncio.gather(
+        query_datasource.asyncio(client=client, body=make_query_request("Category")),
+        query_datasource.asyncio(client=client, body=make_query_request("Region")),
+    )
+
+    assert len(requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared(make_client, make_query_request):
+    """Test that every coalesced caller receives the error of the shared request"""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    client = make_client(handler, coalesce_requests=True)
+
+    results = await asyncio.gather(
+        *(
+            query_datasource.asyncio(client=client, body=make_query_request())
+            for _ in range(3)
+        ),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, httpx.ConnectError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_caller_does_not_cancel_the_others(
+    make_client, make_query_request
+):
+    """Test that the shared request survives the cancellation of one caller"""
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await release.wait()
+        return httpx.Response(200, json={"data": [["Furniture"]]})
+
+    client = make_client(handler, coalesce_requests=True)
+    first = asyncio.ensure_future(
+        query_datasource.asyncio(client=client, body=make_query_request())
+    )
+    second = asyncio.ensure_future(
+        query_datasource.asyncio(client=client, body=make_query_request())
+    )
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    result = await second
+
+    assert first.cancelled()
+    assert result is not None and result.data == [["Furniture"]]
+
+
+def test_concurrent_threads_are_coalesced(make_client, make_query_request):
+    """Test that threads making the same request concurrently share one HTTP request"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        time.sleep(0.2)
+        return httpx.Response(200, json={"data": [["Furniture"]]})
+
+    client = make_client(handler, coalesce_requests=True)
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                query_datasource.sync(client=client, body=make_query_request())
+            )
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(requests) == 1
+    assert len(results) == 8 and all(result == results[0] for result in results)
+
+
+def test_single_flight_runs_again_after_completion():
+    """Test that a key is only coalesced while its call is in flight"""
+    flight = SingleFlight()
+    calls = []
+
+    assert flight.do("key", lambda: calls.append(1) or len(calls)) == 1
+    assert flight.do("key", lambda: calls.append(1) or len(calls)) == 2
@@ -0,0 +1,227 @@
+import json
+import math
+from array import array
+from datetime import date, datetime
+
+import httpx
+import pytest
+import tableauserverclient as TSC
+
+from src.api import columnar, query_datasource
+from src.api.client import VizQLDataServiceClient
+from src.api.columnar import ColumnarBuilder, ColumnarResult, apply_data_types
+from src.api.openapi_generated import (
+    Datasource,
+    DataType,
+    DimensionField,
+    Field,
+    FieldMetadata,
+    Function,
+    MeasureField,
+    MetadataOutput,
+    Query,
+    QueryRequest,
+)
+
+FIELDS = [
+    Field(root=DimensionField(fieldCaption="Category")),
+    Field(root=MeasureField(fieldCaption="Sales", function=Function.SUM)),
+    Field(root=MeasureField(fieldCaption="Order ID", function=Function.COUNTD)),
+    Field(root=DimensionField(fieldCaption="Returned", fieldAlias="Is Returned")),
+]
+
+ROWS = [
+    ["Furniture", 741999.7953, 1764, False],
+    ["Office Supplies", 719047, 3742, True],
+    ["Furniture", None, 1, None],
+]
+
+
+@pytest.fixture(params=["numpy", "array"])
+def backend(request, monkeypatch):
+    if request.param == "array":
+        monkeypatch.setattr(columnar, "np", None)
+    elif columnar.np is None:
+        pytest.skip("numpy is not installed")
+    return request.param
+
+
+def test_column_names_and_kinds(backend):
+    """Test that columns are named after the query fields and typed from their values"""
+    result = ColumnarResult.from_rows(FIELDS, ROWS)
+
+    assert result.names == ["Category", "SUM(Sales)", "COUNTD(Order ID)", "Is Returned"]
+    assert [column.kind for column in result.columns] == [
+        "string",
+        "float",
+        "int",
+        "bool",
+    ]
+    assert len(result) == 3
+
+
+def test_string_columns_are_dictionary_encoded(backend):
+    """Test that repeated strings share one category"""
+    category = ColumnarResult.from_rows(FIELDS, ROWS)["Category"]
+
+    assert category.categories == ["Furniture", "Office Supplies"]
+    assert list(category.values) == [0, 1, 0]
+    assert category.to_list() == ["Furniture", "Office Supplies", "Furniture"]
+
+
+def test_numeric_columns_use_typed_buffers(backend):
+    """Test that numbers are stored in contiguous typed buffers with a null mask"""
+    result = ColumnarResult.from_rows(FIELDS, ROWS)
+    sales = result["SUM(Sales)"]
+
+    if backend == "numpy":
+        assert str(sales.values.dtype) == "float64"
+        assert str(result["COUNTD(Order ID)"].values.dtype) == "int64"
+    else:
+        assert isinstance(sales.values, array) and sales.values.typecode == "d"
+    assert math.isnan(sales.values[2])
+    assert sales.null_count() == 1
+    assert sales.to_list() == [741999.7953, 719047.0, None]
+    assert result["Is Returned"].to_list() == [False, True, None]
+
+
+def test_builder_widens_kinds_across_batches(backend):
+    """Test that a column is widened when a later batch needs a wider type"""
+    builder = ColumnarBuilder([Field(root=DimensionField(fieldCaption="Value"))])
+    builder.append([[None], [1]])
+    builder.append([[2.5]])
+    builder.append([["three"]])
+    result = builder.build()
+
+    assert result["Value"].kind == "object"
+    assert result["Value"].to_list() == [None, 1, 2.5, "three"]
+
+
+def test_whole_numbers_do_not_convert_float_column(backend, monkeypatch):
+    """Test that batches of whole numbers are appended to a float column without converting it"""
+    builder = ColumnarBuilder(
+        [Field(root=MeasureField(fieldCaption="Profit", function=Function.AVG))]
+    )
+    conversions = []
+    original = columnar._ColumnBuilder._convert
+    monkeypatch.setattr(
+        columnar._ColumnBuilder,
+        "_convert",
+        lambda self, kind: conversions.append(kind) or original(self, kind),
+    )
+    for batch in range(100):
+        builder.append([[batch], [batch + 1]])
+    result = builder.build()
+
+    assert conversions == []
+    assert result["AVG(Profit)"].kind == "float"
+    assert result["AVG(Profit)"].to_list()[:4] == [0.0, 1.0, 1.0, 2.0]
+
+
+def test_iter_rows_round_trip(backend):
+    """Test that the columns decode back into the original rows"""
+    result = ColumnarResult.from_rows(FIELDS, ROWS)
+
+    assert list(result.iter_rows()) == ROWS
+
+
+def test_sync_columnar_requests_arrays():
+    """Test that sync_columnar requests ARRAYS and builds columns from the response"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["options"]["returnFormat"] == "ARRAYS"
+        return httpx.Response(200, json={"data": ROWS})
+
+    server = TSC.Server("http://localhost")
+    server._auth_token = "mock-token"  # type: ignore
+    client = VizQLDataServiceClient(
+        "http://localhost", server, TSC.TableauAuth("test-user", "test-password")
+    )
+    client.client.set_httpx_client(
+        httpx.Client(
+            base_url="http://localhost", transport=httpx.MockTransport(handler)
+        )
+    )
+    body = QueryRequest(
+        datasource=Datasource(datasourceLuid="test-datasource"),
+        query=Query(fields=FIELDS),
+    )
+
+    result = query_datasource.sync_columnar(client=client, body=body, chunk_size=2)
+
+    assert result is not None
+    assert result.names == ["Category", "SUM(Sales)", "COUNTD(Order ID)", "Is Returned"]
+    assert list(result.iter_rows()) == ROWS
+
+
+TYPED_FIELDS = [
+    Field(root=DimensionField(fieldCaption="Order Date")),
+    Field(root=DimensionField(fieldCaption="Ship Time")),
+    Field(root=MeasureField(fieldCaption="Quantity", function=Function.SUM)),
+    Field(root=MeasureField(fieldCaption="Discount", function=Function.MAX)),
+    Field(root=MeasureField(fieldCaption="Order Date", function=Function.YEAR)),
+]
+
+METADATA = MetadataOutput(
+    data=[
+        FieldMetadata(
+            fieldName="Order Date", fieldCaption="Order Date", dataType=DataType.DATE
+        ),
+        FieldMetadata(
+            fieldName="Ship Time", fieldCaption="Ship Time", dataType=DataType.DATETIME
+        ),
+        FieldMetadata(
+            fieldName="Quantity", fieldCaption="Quantity", dataType=DataType.INTEGER
+        ),
+        FieldMetadata(
+            fieldName="Discount", fieldCaption="Discount", dataType=DataType.REAL
+        ),
+    ]
+)
+
+TYPED_ROWS = [
+    ["2024-01-05", "2024-01-07 10:30:00", 120, 0, 2024],
+    ["2024-01-05", "2024-01-08T08:00:00", 70000, 1, 2024],
+    [None, None, 3, 0, None],
+]
+
+
+def test_apply_data_types(backend):
+    """Test that columns are decoded into the types given by the metadata"""
+    result = apply_data_types(
+        ColumnarResult.from_rows(TYPED_FIELDS, TYPED_ROWS), TYPED_FIELDS, METADATA
+    )
+
+    assert [column.kind for column in result.columns] == [
+        "date",
+        "datetime",
+        "int",
+        "float",
+        "int",
+    ]
+    assert result["Order Date"].to_list() == [date(2024, 1, 5), date(2024, 1, 5), None]
+    assert result["Ship Time"].to_list() == [
+        datetime(2024, 1, 7, 10, 30),
+        datetime(2024, 1, 8, 8, 0),
+        None,
+    ]
+    assert result["SUM(Quantity)"].to_list() == [120, 70000, 3]
+    assert result["MAX(Discount)"].to_list() == [0.0, 1.0, 0.0]
+    if backend == "numpy":
+        assert str(result["Order Date"].values.dtype) == "datetime64[D]"
+        assert str(result["SUM(Quantity)"].values.dtype) == "int32"
+        assert str(result["YEAR(Order Date)"].values.dtype) == "int16"
+    else:
+        assert result["SUM(Quantity)"].values.itemsize == 4
+        assert result["YEAR(Order Date)"].values.itemsize == 2
+
+
+def test_apply_data_types_leaves_unparseable_columns(backend):
+    """Test that a column whose values do not match its data type is left unchanged"""
+    fields = [Field(root=DimensionField(fieldCaption="Order Date"))]
+    result = apply_data_types(
+        ColumnarResult.from_rows(fields, [["not a date"]]), fields, METADATA
+    )
+
+    assert result["Order Date"].kind == "string"
+    assert result["Order Date"].to_list() == ["not a date"]
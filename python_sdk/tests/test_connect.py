@@ -0,0 +1,158 @@
+import json
+
+import httpx
+import pytest
+import tableauserverclient as TSC
+
+from src.api.auth import restore_session, sign_in_async
+from src.api.client import X_TABLEAU_AUTH, VizQLDataServiceClient
+from src.api.errors import UnexpectedStatus
+from src.api.retry import RetryPolicy
+
+
+def _transport(status: int = 200):
+    """Return a transport answering sign-ins and VizQL Data Service requests, and the requests it received"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.endswith("/auth/signin"):
+            body = {
+                "credentials": {
+                    "token": "session-token",
+                    "site": {"id": "site-luid", "contentUrl": "site"},
+                    "user": {"id": "user-luid"},
+                }
+            }
+            return httpx.Response(status, json=body if status == 200 else {})
+        return httpx.Response(200, json={"data": []})
+
+    return httpx.MockTransport(handler), requests
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "auth, credentials",
+    [
+        (
+            TSC.PersonalAccessTokenAuth("pat", "secret", site_id="site"),
+            {"personalAccessTokenName": "pat", "personalAccessTokenSecret": "secret"},
+        ),
+        (TSC.JWTAuth("jwt", site_id="site"), {"jwt": "jwt"}),
+        (
+            TSC.TableauAuth("alice", "password", site_id="site"),
+            {"name": "alice", "password": "password"},
+        ),
+    ],
+)
+async def test_connect_signs_in_with_rest_api(auth, credentials):
+    """Test that each kind of credentials is sent to the REST sign-in endpoint"""
+    transport, requests = _transport()
+
+    client = await VizQLDataServiceClient.connect(
+        "http://tableau.example.com", auth, httpx_args={"transport": transport}
+    )
+
+    assert str(requests[0].url) == "http://tableau.example.com/api/3.24/auth/signin"
+    assert json.loads(requests[0].content) == {
+        "credentials": {**credentials, "site": {"contentUrl": "site"}}
+    }
+    assert client.server.auth_token == "session-token"
+    assert client.server.site_id == "site-luid"
+    assert client.server.user_id == "user-luid"
+    assert client.server.site_url == "site"
+
+
+@pytest.mark.asyncio
+async def test_connect_reuses_async_client_with_new_token():
+    """Test that requests after connecting use the same httpx client with the session token"""
+    transport, requests = _transport()
+    client = await VizQLDataServiceClient.connect(
+        "http://tableau.example.com",
+        TSC.TableauAuth("alice", "password"),
+        httpx_args={"transport": transport},
+    )
+    httpx_client = client.get_async_httpx_client()
+
+    await httpx_client.post("/query-datasource", json={})
+
+    assert client.get_async_httpx_client() is httpx_client
+    assert X_TABLEAU_AUTH not in requests[0].headers
+    assert requests[1].headers[X_TABLEAU_AUTH] == "session-token"
+    assert client.get_httpx_client().headers[X_TABLEAU_AUTH] == "session-token"
+
+
+@pytest.mark.asyncio
+async def test_sign_in_async_impersonates_and_requests_uat():
+    """Test that impersonation and unified access tokens are part of the sign-in request"""
+    transport, requests = _transport()
+    auth = TSC.JWTAuth("jwt", isUat=True, user_id_to_impersonate="other-luid")
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        session = await sign_in_async(client, "http://tableau.example.com/", auth)
+
+    assert session.token == "session-token" and session.site_url == "site"
+    assert json.loads(requests[0].content)["credentials"] == {
+        "jwt": "jwt",
+        "isUat": True,
+        "site": {"contentUrl": ""},
+        "user": {"id": "other-luid"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_connect_raises_on_rejected_credentials():
+    """Test that a failed sign-in raises UnexpectedStatus"""
+    transport, _ = _transport(status=401)
+
+    with pytest.raises(UnexpectedStatus) as error:
+        await VizQLDataServiceClient.connect(
+            "http://tableau.example.com",
+            TSC.TableauAuth("alice", "wrong"),
+            httpx_args={"transport": transport},
+        )
+
+    assert error.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_connect_signs_in_without_vizql_data_service_transports():
+    """Test that the sign-in is sent once with a plain client, not retried or counted by the VDS client"""
+    transport, requests = _transport(status=503)
+
+    with pytest.raises(UnexpectedStatus):
+        await VizQLDataServiceClient.connect(
+            "http://tableau.example.com",
+            TSC.TableauAuth("alice", "password"),
+            httpx_args={"transport": transport},
+            retry_policy=RetryPolicy(backoff_base=0),
+        )
+
+    assert len(requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_connect_does_not_open_async_client():
+    """Test that signing in leaves the async client of the VDS requests unopened"""
+    transport, _ = _transport()
+
+    client = await VizQLDataServiceClient.connect(
+        "http://tableau.example.com",
+        TSC.TableauAuth("alice", "password"),
+        httpx_args={"transport": transport},
+    )
+
+    assert client.client._async_client is None
+
+
+def test_restore_session_signs_in_server():
+    """Test that restore_session sets the session on a TSC.Server as its sign-in would"""
+    server = TSC.Server("http://tableau.example.com")
+
+    restore_session(server, "site-luid", "user-luid", "session-token", "site")
+
+    assert server.is_signed_in()
+    assert server.site_url == "site"
+    assert server.auth_token == "session-token"
+    assert server.site_id == "site-luid"
+    assert server.user_id == "user-luid"
@@ -0,0 +1,195 @@
+import json
+import os
+import threading
+
+import httpx
+import pytest
+import tableauserverclient as TSC
+
+from src.api import query_datasource
+from src.api.cache import ResultCache
+from src.api.client import VizQLDataServiceClient
+from src.api.disk_cache import DiskResultCache
+from src.api.openapi_generated import (
+    Datasource,
+    DimensionField,
+    Field,
+    Query,
+    QueryRequest,
+)
+
+
+def _response(body: dict) -> httpx.Response:
+    return httpx.Response(
+        200, json=body, headers={"X-Request-Id": "abc", "Content-Length": "99"}
+    )
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "results.sqlite")
+
+
+def test_round_trip(path):
+    """Test that a stored response is read back with its body and headers"""
+    cache = DiskResultCache(path, max_bytes=1_000_000)
+    cache.set("key", "test-datasource", _response({"data": [[1, "a"]]}), ttl=60)
+
+    stored = cache.get("key")
+
+    assert stored is not None
+    response, ttl = stored
+    assert json.loads(response.content) == {"data": [[1, "a"]]}
+    assert response.headers["X-Request-Id"] == "abc"
+    assert response.headers["Content-Length"] == str(len(response.content))
+    assert 0 < ttl <= 60
+    assert cache.get("missing") is None
+
+
+def test_expired_entries_are_not_returned(path):
+    """Test that entries past their TTL are neither returned nor kept"""
+    cache = DiskResultCache(path, max_bytes=1_000_000)
+    cache.set("key", "test-datasource", _response({"data": []}), ttl=0)
+
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_sweep_evicts_least_recently_read(path):
+    """Test that the least recently read entries are removed once the bodies exceed max_bytes"""
+    cache = DiskResultCache(path, max_bytes=1_000_000)
+    for key in ("a", "b"):
+        cache.set(key, "test-datasource", _response({"data": [key] * 100}), ttl=60)
+    size = cache.nbytes // 2
+    cache.max_bytes = 2 * size
+    cache.get("a")
+    cache.set("c", "test-datasource", _response({"data": ["c"] * 100}), ttl=60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.nbytes <= cache.max_bytes
+
+
+def test_entries_are_shared_between_instances(path):
+    """Test that caches opened on the same file, as by separate processes, share entries"""
+    writer = DiskResultCache(path, max_bytes=1_000_000)
+    reader = DiskResultCache(path, max_bytes=1_000_000)
+
+    threads = [
+        threading.Thread(
+            target=writer.set,
+            args=(f"key {i}", "test-datasource", _response({"data": [i]}), 60),
+        )
+        for i in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(reader) == 8
+    assert reader.invalidate_datasource("test-datasource") == 8
+    assert writer.get("key 0") is None
+
+
+def test_result_cache_reads_through_to_disk(path):
+    """Test that a client with an empty memory tier is answered from the shared disk tier"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"data": [["Furniture"]]})
+
+    def make_client() -> VizQLDataServiceClient:
+        server = TSC.Server("http://localhost")
+        server._auth_token = "mock-token"  # type: ignore
+        client = VizQLDataServiceClient(
+            "http://localhost",
+            server,
+            TSC.TableauAuth("test-user", "test-password"),
+            result_cache=ResultCache(
+                1_000_000, disk_cache=DiskResultCache(path, max_bytes=1_000_000)
+            ),
+        )
+        client.client.set_httpx_client(
+            httpx.Client(
+                base_url="http://localhost", transport=httpx.MockTransport(handler)
+            )
+        )
+        return client
+
+    body = QueryRequest(
+        datasource=Datasource(datasourceLuid="test-datasource"),
+        query=Query(fields=[Field(root=DimensionField(fieldCaption="Category"))]),
+    )
+
+    cold = query_datasource.sync_detailed(client=make_client(), body=body)
+    warm_client = make_client()
+    warm = query_datasource.sync_detailed(client=warm_client, body=body)
+
+    assert len(requests) == 1
+    assert not cold.cache_hit and warm.cache_hit
+    assert warm.parsed == cold.parsed
+    assert warm_client.result_cache is not None and len(warm_client.result_cache) == 1
+
+
+def test_connections_are_opened_per_process(path):
+    """Test that no connection is opened before first use, and a forked process opens its own"""
+    cache = DiskResultCache(path, max_bytes=1_000_000)
+    assert getattr(cache._local, "connection", None) is None
+
+    inherited = cache._connect()
+    cache._pid = -1  # as seen from a process forked after the connection was opened
+
+    assert cache._connect() is not inherited
+    assert cache._pid == os.getpid()
+
+
+def test_reads_write_access_times_in_batches(path):
+    """Test that read times are kept in memory until a batch is full"""
+    cache = DiskResultCache(path, max_bytes=1_000_000, touch_batch=2)
+    for key in ("a", "b"):
+        cache.set(key, "test-datasource", _response({"data": [key]}), ttl=60)
+
+    def accessed_at(key: str) -> float:
+        return (
+            cache._connect()
+            .execute("SELECT accessed_at FROM results WHERE key = ?", (key,))
+            .fetchone()[0]
+        )
+
+    stored = accessed_at("a")
+    cache.get("a")
+    assert accessed_at("a") == stored and list(cache._touches) == ["a"]
+
+    cache.get("b")
+    assert cache._touches == {}
+    assert accessed_at("a") >= stored
+
+
+def test_total_size_is_kept_by_triggers(path):
+    """Test that the running total follows inserts, replacements and deletions"""
+    cache = DiskResultCache(path, max_bytes=1_000_000)
+    cache.set("a", "one", _response({"data": ["a"] * 10}), ttl=60)
+    cache.set("a", "one", _response({"data": ["a"] * 1000}), ttl=60)
+    cache.set("b", "two", _response({"data": ["b"]}), ttl=60)
+    cache.invalidate_datasource("two")
+
+    total = (
+        cache._connect()
+        .execute("SELECT COALESCE(SUM(size), 0) FROM results")
+        .fetchone()[0]
+    )
+    assert cache.nbytes == total > 0
+    cache.clear()
+    assert cache.nbytes == 0
+
+
+def test_invalidate_prefix_removes_every_namespace(path):
+    """Test that the results of a query are removed for every namespace"""
+    cache = DiskResultCache(path, max_bytes=1_000_000)
+    for key in ("query:alice", "query:bob", "other:alice"):
+        cache.set(key, "test-datasource", _response({"data": []}), ttl=60)
+
+    assert cache.invalidate_prefix("query:") == 2
+    assert cache.get("other:alice") is not None
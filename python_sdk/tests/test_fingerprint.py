@@ -0,0 +1,226 @@
+from datetime import date
+
+import pytest
+
+from src.api.fingerprint import canonical_form, fingerprint
+from src.api.openapi_generated import (
+    BinField,
+    CalculatedField,
+    CalculatedFilterField,
+    Comparison,
+    ConditionalFilterCondition,
+    ConditionFilter,
+    Datasource,
+    DateRangeType,
+    DimensionField,
+    DimensionFilterField,
+    Field,
+    FilterField,
+    Function,
+    GetDatasourceModelRequest,
+    MatchFilter,
+    MeasureField,
+    MeasureFilterField,
+    NullableAny,
+    Parameter,
+    PeriodType,
+    QuantitativeDateFilter,
+    QuantitativeFilterType,
+    QuantitativeNumericalFilter,
+    Query,
+    QueryDatasourceOptions,
+    QueryRequest,
+    ReadMetadataRequest,
+    RelativeDateFilter,
+    ReturnFormat,
+    SetFilter,
+    TabFilter,
+    TableCalcField,
+    TableCalcFieldReference,
+    TableCalcSpecification,
+    TableCalcType,
+    TopNFilter,
+)
+
+CATEGORY = FilterField(root=DimensionFilterField(fieldCaption="Category"))
+
+FIELDS = [
+    DimensionField(fieldCaption="Category"),
+    MeasureField(fieldCaption="Sales", function=Function.SUM, fieldAlias="Total"),
+    CalculatedField(fieldCaption="Profit Ratio", calculation="SUM([Profit])"),
+    BinField(fieldCaption="Sales (bin)", binSize=10),
+    TableCalcField(
+        fieldCaption="Sales",
+        function=Function.SUM,
+        tableCalculation=TableCalcSpecification(
+            tableCalcType=TableCalcType.RANK,
+            dimensions=[TableCalcFieldReference(fieldCaption="Category")],
+        ),
+    ),
+]
+
+FILTERS = [
+    MatchFilter(field=CATEGORY, contains="Furn"),
+    QuantitativeNumericalFilter(
+        field=FilterField(
+            root=MeasureFilterField(fieldCaption="Sales", function=Function.SUM)
+        ),
+        quantitativeFilterType=QuantitativeFilterType.MIN,
+        min=10,
+    ),
+    QuantitativeDateFilter(
+        field=FilterField(root=DimensionFilterField(fieldCaption="Order Date")),
+        quantitativeFilterType=QuantitativeFilterType.RANGE,
+        minDate=date(2024, 1, 1),
+        maxDate=date(2024, 12, 31),
+    ),
+    SetFilter(
+        field=CATEGORY,
+        values=[NullableAny("Furniture"), NullableAny("Technology")],
+    ),
+    RelativeDateFilter(
+        field=FilterField(root=DimensionFilterField(fieldCaption="Order Date")),
+        periodType=PeriodType.MONTHS,
+        dateRangeType=DateRangeType.LASTN,
+        rangeN=3,
+    ),
+    TopNFilter(
+        field=CATEGORY,
+        howMany=5,
+        fieldToMeasure=FilterField(
+            root=MeasureFilterField(fieldCaption="Sales", function=Function.SUM)
+        ),
+    ),
+    ConditionFilter(
+        field=CATEGORY,
+        condition=ConditionalFilterCondition(
+            fieldCaption="Sales",
+            function=Function.SUM,
+            comparison=Comparison.field__2,
+            value=100,
+        ),
+    ),
+    ConditionFilter(
+        field=FilterField(root=CalculatedFilterField(calculation="[Sales] > 0")),
+        calculation="SUM([Sales]) > 100",
+    ),
+]
+
+
+def _request(fields=FIELDS, filters=FILTERS, **options) -> QueryRequest:
+    return QueryRequest(
+        datasource=Datasource(datasourceLuid="test-datasource"),
+        query=Query(fields=list(fields), filters=list(filters)),
+        options=QueryDatasourceOptions(**options) if options else None,
+    )
+
+
+def test_fingerprint_is_stable():
+    """Test that equal requests built separately have the same fingerprint"""
+    assert fingerprint(_request()) == fingerprint(_request())
+    assert len(fingerprint(_request())) == 64
+
+
+def test_filter_and_field_order_is_ignored():
+    """Test that reordering filters, and fields of an object result, keeps the fingerprint"""
+    assert fingerprint(_request()) == fingerprint(
+        _request(fields=FIELDS[::-1], filters=FILTERS[::-1])
+    )
+
+
+def test_field_order_matters_for_arrays():
+    """Test that field order is significant when rows are returned as arrays"""
+    arrays = {"returnFormat": ReturnFormat.ARRAYS}
+
+    assert fingerprint(_request(**arrays)) != fingerprint(
+        _request(fields=FIELDS[::-1], **arrays)
+    )
+
+
+def test_field_aliases_are_ignored_for_arrays():
+    """Test that field aliases do not change the fingerprint of an array result"""
+    aliased = [DimensionField(fieldCaption="Category", fieldAlias="Kind")]
+    plain = [DimensionField(fieldCaption="Category")]
+
+    assert fingerprint(_request(fields=aliased)) != fingerprint(_request(fields=plain))
+    assert fingerprint(
+        _request(fields=aliased, returnFormat=ReturnFormat.ARRAYS)
+    ) == fingerprint(_request(fields=plain, returnFormat=ReturnFormat.ARRAYS))
+
+
+def test_default_options_are_ignored():
+    """Test that options set to their defaults do not change the fingerprint"""
+    assert fingerprint(_request()) == fingerprint(
+        _request(debug=False, disaggregate=False, bypassMetadataCache=False)
+    )
+    assert fingerprint(_request()) != fingerprint(_request(disaggregate=True))
+
+
+def test_filter_spellings_are_normalised():
+    """Test that wrapped, default-valued and reordered filter spellings are equal"""
+    wrapped = TabFilter(
+        root=SetFilter(
+            field=CATEGORY,
+            values=["Technology", "Furniture", "Technology"],
+            exclude=False,
+            context=False,
+        )
+    )
+    request = QueryRequest(
+        datasource=Datasource(datasourceLuid="test-datasource"),
+        query=Query(
+            fields=[Field(root=DimensionField(fieldCaption="Category"))],
+            filters=[wrapped],
+        ),
+    )
+
+    assert fingerprint(request) == fingerprint(
+        _request(
+            fields=[Field(root=DimensionField(fieldCaption="Category"))],
+            filters=[FILTERS[3]],
+        )
+    )
+
+
+@pytest.mark.parametrize("index", range(len(FILTERS)))
+def test_every_filter_changes_the_fingerprint(index):
+    """Test that each filter variant contributes to the fingerprint"""
+    without = [f for position, f in enumerate(FILTERS) if position != index]
+
+    assert fingerprint(_request()) != fingerprint(_request(filters=without))
+
+
+def test_canonical_form_is_json_compatible():
+    """Test that enums and dates are replaced by their JSON values"""
+    form = canonical_form(_request())
+    filters = form["query"]["filters"]
+
+    assert {"minDate": "2024-01-01"}.items() <= next(
+        f for f in filters if f["filterType"] == "QUANTITATIVE_DATE"
+    ).items()
+    assert "context" not in filters[0]
+
+
+def test_parameter_order_is_ignored():
+    """Test that reordering parameters keeps the fingerprint"""
+    parameters = [
+        Parameter(parameterCaption="Region", value="West"),
+        Parameter(parameterCaption="Top N", value=10),
+    ]
+
+    def request(params):
+        return QueryRequest(
+            datasource=Datasource(datasourceLuid="test-datasource"),
+            query=Query(fields=FIELDS, parameters=params),
+        )
+
+    assert fingerprint(request(parameters)) == fingerprint(request(parameters[::-1]))
+
+
+def test_request_type_is_part_of_the_fingerprint():
+    """Test that requests with the same members to different endpoints differ"""
+    datasource = Datasource(datasourceLuid="test-datasource")
+
+    assert fingerprint(ReadMetadataRequest(datasource=datasource)) != fingerprint(
+        GetDatasourceModelRequest(datasource=datasource)
+    )
@@ -2,7 +2,7 @@ from unittest.mock import AsyncMock, Mock
 
 import pytest
 
-from src.api.client import AuthenticatedClient, VizQLDataServiceClient
+from src.api.client import AuthenticatedClient
 from src.api.get_datasource_model import asyncio, asyncio_detailed, sync, sync_detailed
 from src.api.openapi_generated import (
     Datasource,
@@ -12,8 +12,8 @@ from src.api.openapi_generated import (
 
 
 @pytest.fixture
-def mock_client():
-    client = Mock(spec=VizQLDataServiceClient)
+def mock_client(make_mock_client):
+    client = make_mock_client()
     client.raise_on_unexpected_status = True
     mock_authenticated_client = Mock(spec=AuthenticatedClient)
     mock_httpx_client = Mock()
@@ -23,8 +23,8 @@ def mock_client():
 
 
 @pytest.fixture
-def mock_async_client():
-    client = Mock(spec=VizQLDataServiceClient)
+def mock_async_client(make_mock_client):
+    client = make_mock_client()
     client.raise_on_unexpected_status = True
     mock_authenticated_client = Mock(spec=AuthenticatedClient)
     mock_async_httpx_client = AsyncMock()
@@ -0,0 +1,216 @@
+import asyncio
+from typing import Optional
+
+import httpx
+import pytest
+
+from src.api import query_datasource, read_metadata
+from src.api.cache import ResultCache
+from src.api.hedging import HedgingPolicy, hedge
+from src.api.openapi_generated import (
+    Datasource,
+    DimensionField,
+    Field,
+    Query,
+    QueryRequest,
+    ReadMetadataRequest,
+)
+
+
+def _warm_policy(latency: float = 0.01, **options) -> HedgingPolicy:
+    """Return a policy that has seen enough fast responses of /read-metadata to hedge"""
+    policy = HedgingPolicy(min_samples=5, max_tokens=2, max_hedge_ratio=1, **options)
+    for _ in range(5):
+        policy.record("/read-metadata", latency)
+    return policy
+
+
+class SlowFirstServer:
+    """A server whose first answer is slow, recording the requests started and cancelled"""
+
+    def __init__(self, first_delay: float = 1.0) -> None:
+        self.first_delay = first_delay
+        self.started = 0
+        self.cancelled = 0
+
+    async def __call__(self, request: Optional[httpx.Request] = None) -> httpx.Response:
+        self.started += 1
+        number = self.started
+        try:
+            await asyncio.sleep(self.first_delay if number == 1 else 0.01)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return httpx.Response(200, json={"data": [], "copy": number})
+
+
+def test_delay_is_the_percentile_of_recent_latencies():
+    """Test that the hedge delay follows the rolling percentile of each endpoint"""
+    policy = HedgingPolicy(percentile=0.9, window=10, min_samples=10)
+    for latency in range(1, 10):
+        policy.record("/query-datasource", latency)
+    assert policy.delay("/query-datasource") is None
+
+    policy.record("/query-datasource", 10)
+    assert policy.delay("/query-datasource") == 9
+    assert policy.delay("/read-metadata") is None
+
+    for _ in range(10):
+        policy.record("/query-datasource", 0.5)
+    assert policy.delay("/query-datasource") == 0.5
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged_and_loser_cancelled():
+    """Test that a request slower than the percentile is sent again and the first response wins"""
+    server = SlowFirstServer()
+    policy = _warm_policy()
+
+    response = await hedge(policy, "/read-metadata", server)
+
+    assert response.json()["copy"] == 2
+    assert server.started == 2 and server.cancelled == 1
+
+
+@pytest.mark.asyncio
+async def test_fast_request_is_not_hedged():
+    """Test that a response arriving before the percentile is used without a hedge"""
+    server = SlowFirstServer(first_delay=0.01)
+
+    response = await hedge(_warm_policy(latency=1.0), "/read-metadata", server)
+
+    assert response.json()["copy"] == 1 and server.started == 1
+
+
+@pytest.mark.asyncio
+async def test_hedges_are_limited_by_budget():
+    """Test that hedges stop once the budget is used up"""
+    policy = HedgingPolicy(min_samples=1, max_hedge_ratio=0.5, max_tokens=1)
+    policy.record("/read-metadata", 0.01)
+    policy.record("/read-metadata", 0.01)
+
+    assert policy.take_hedge() is True
+    assert policy.take_hedge() is False
+
+
+@pytest.mark.asyncio
+async def test_hedge_waits_for_other_copy_when_one_fails():
+    """Test that a failed copy does not fail the request while the other may still succeed"""
+    calls = 0
+
+    async def send() -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(0.05)
+            raise httpx.ReadError("connection reset")
+        await asyncio.sleep(0.1)
+        return httpx.Response(200)
+
+    response = await hedge(_warm_policy(), "/read-metadata", send)
+
+    assert response.status_code == 200 and calls == 2
+
+
+@pytest.mark.asyncio
+async def test_hedge_waits_for_other_copy_on_failure_status():
+    """Test that a fast 503 of one copy does not beat a slower success of the other"""
+    calls = 0
+
+    async def send() -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(0.05)
+            return httpx.Response(503)
+        await asyncio.sleep(0.1)
+        return httpx.Response(200)
+
+    response = await hedge(_warm_policy(), "/read-metadata", send)
+
+    assert response.status_code == 200 and calls == 2
+
+
+@pytest.mark.asyncio
+async def test_hedge_returns_failure_status_when_every_copy_fails():
+    """Test that a failed response is returned once no copy can succeed"""
+
+    async def send() -> httpx.Response:
+        await asyncio.sleep(0.05)
+        return httpx.Response(502)
+
+    response = await hedge(_warm_policy(), "/read-metadata", send)
+
+    assert response.status_code == 502
+
+
+@pytest.mark.asyncio
+async def test_hedge_latency_is_measured_from_original_request():
+    """Test that the latency recorded for a hedged request includes the wait before the hedge"""
+    server = SlowFirstServer()
+    policy = _warm_policy()
+
+    await hedge(policy, "/read-metadata", server)
+
+    assert max(policy._latencies["/read-metadata"]) >= 0.015
+
+
+@pytest.mark.asyncio
+async def test_read_metadata_is_hedged(make_client):
+    """Test that read_metadata requests of the async client are hedged"""
+    server = SlowFirstServer()
+    client = make_client(server, hedging=_warm_policy())
+
+    response = await read_metadata.asyncio_detailed(
+        client=client,
+        body=ReadMetadataRequest(datasource=Datasource(datasourceLuid="luid")),
+    )
+
+    assert response.status_code == 200 and server.started == 2
+
+
+@pytest.mark.asyncio
+async def test_queries_of_uncached_data_sources_are_not_hedged(make_client):
+    """Test that queries are hedged only for data sources whose results may be cached"""
+    policy = HedgingPolicy(
+        min_samples=1, max_hedge_ratio=1, max_tokens=2, hedge_queries=True
+    )
+    policy.record("/query-datasource", 0.01)
+    server = SlowFirstServer(first_delay=0.1)
+    client = make_client(
+        server,
+        hedging=policy,
+        result_cache=ResultCache(2**20, datasource_ttls={"live": 0}),
+    )
+
+    await query_datasource.asyncio_detailed(
+        client=client,
+        body=QueryRequest(
+            datasource=Datasource(datasourceLuid="live"),
+            query=Query(fields=[Field(root=DimensionField(fieldCaption="Region"))]),
+        ),
+    )
+
+    assert server.started == 1
+
+
+@pytest.mark.asyncio
+async def test_queries_are_not_hedged_by_default(make_client):
+    """Test that queries are not hedged without hedge_queries and a result cache"""
+    policy = HedgingPolicy(min_samples=1, max_hedge_ratio=1, max_tokens=2)
+    policy.record("/query-datasource", 0.01)
+    server = SlowFirstServer(first_delay=0.1)
+    body = QueryRequest(
+        datasource=Datasource(datasourceLuid="luid"),
+        query=Query(fields=[Field(root=DimensionField(fieldCaption="Region"))]),
+    )
+
+    await query_datasource.asyncio_detailed(
+        client=make_client(server, hedging=policy), body=body
+    )
+    policy.hedge_queries = True
+    await query_datasource.asyncio_detailed(
+        client=make_client(server, hedging=policy), body=body
+    )
+
+    assert server.started == 2
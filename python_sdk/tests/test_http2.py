@@ -0,0 +1,50 @@
+import sys
+
+import pytest
+import tableauserverclient as TSC
+
+from src.api.client import AuthenticatedClient, VizQLDataServiceClient
+from src.api.retry import RetryPolicy
+
+pytest.importorskip("h2")
+
+
+def _client(**options) -> AuthenticatedClient:
+    return AuthenticatedClient(base_url="http://test.com", token="token", **options)
+
+
+def test_http2_enables_multiplexing_in_connection_pools():
+    """Test that http2 is passed to the connection pools of the sync and async clients"""
+    client = _client(http2=True)
+
+    assert client.get_httpx_client()._transport._pool._http2
+    assert client.get_async_httpx_client()._transport._pool._http2
+    assert not _client().get_httpx_client()._transport._pool._http2
+
+
+def test_http2_is_kept_under_retry_transport():
+    """Test that the transport built for retries also uses HTTP/2"""
+    client = _client(http2=True, retry_policy=RetryPolicy())
+
+    assert client.get_httpx_client()._transport.transport._pool._http2
+    assert client.get_async_httpx_client()._transport.transport._pool._http2
+
+
+def test_vizql_client_passes_http2():
+    """Test that the VizQL Data Service client creates an HTTP/2 client"""
+    server = TSC.Server("http://localhost")
+    server._auth_token = "token"  # type: ignore
+
+    client = VizQLDataServiceClient(
+        "http://localhost", server, TSC.TableauAuth("user", "password"), http2=True
+    )
+
+    assert client.get_httpx_client()._transport._pool._http2
+
+
+def test_http2_requires_h2(monkeypatch):
+    """Test that http2 without the h2 package fails when the client is created"""
+    monkeypatch.setitem(sys.modules, "h2", None)
+
+    with pytest.raises(ImportError, match="http2"):
+        _client(http2=True)
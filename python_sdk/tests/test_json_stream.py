@@ -0,0 +1,167 @@
+import json
+
+import httpx
+import pytest
+import tableauserverclient as TSC
+
+from src.api import query_datasource
+from src.api.client import VizQLDataServiceClient
+from src.api.errors import QueryError
+from src.api.json_stream import RowArrayDecoder
+from src.api.openapi_generated import (
+    Datasource,
+    DimensionField,
+    Field,
+    Query,
+    QueryRequest,
+)
+
+BODY = json.dumps(
+    {
+        "data": [
+            {"Category": "Furniture", "Sales": 741999.7953},
+            {"Category": "Office Supplies é", "Sales": 719047},
+            {"Category": "Technology", "Sales": 836154.033},
+        ]
+    },
+    ensure_ascii=False,
+).encode()
+
+
+@pytest.fixture
+def client() -> VizQLDataServiceClient:
+    server = TSC.Server("http://localhost")
+    server._auth_token = "mock-token"  # type: ignore
+    return VizQLDataServiceClient(
+        "http://localhost", server, TSC.TableauAuth("test-user", "test-password")
+    )
+
+
+@pytest.fixture
+def query_request() -> QueryRequest:
+    return QueryRequest(
+        datasource=Datasource(datasourceLuid="test-datasource"),
+        query=Query(fields=[Field(root=DimensionField(fieldCaption="Category"))]),
+    )
+
+
+def _chunked(body: bytes, size: int):
+    return [body[start:][:size] for start in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, len(BODY)])
+def test_decoder_yields_rows_across_chunk_boundaries(size):
+    """Test that rows are decoded identically however the body is split"""
+    decoder = RowArrayDecoder()
+    rows = []
+    for chunk in _chunked(BODY, size):
+        rows.extend(decoder.feed(chunk))
+    rows.extend(decoder.close())
+
+    assert rows == json.loads(BODY)["data"]
+
+
+def test_decoder_waits_for_complete_numbers():
+    """Test that a number at the end of a chunk is not decoded before it is complete"""
+    decoder = RowArrayDecoder()
+    assert decoder.feed(b'{"data": [1, 23') == [1]
+    assert decoder.feed(b"4]}") == [234]
+    assert decoder.close() == []
+
+
+def test_decoder_keeps_other_members():
+    """Test that members other than the row array are collected"""
+    decoder = RowArrayDecoder()
+    rows = decoder.feed(b'{"error": {"errorCode": "400"}, "data": null}')
+    rows += decoder.close()
+
+    assert rows == []
+    assert decoder.members == {"error": {"errorCode": "400"}, "data": None}
+
+
+def test_decoder_rejects_truncated_body():
+    """Test that closing an incomplete body raises"""
+    decoder = RowArrayDecoder()
+    decoder.feed(b'{"data": [[1], [2')
+    with pytest.raises(json.JSONDecodeError):
+        decoder.close()
+
+
+def test_iter_rows(client, query_request):
+    """Test that rows are yielded from a chunked response"""
+    client.client.set_httpx_client(
+        httpx.Client(
+            base_url="http://localhost",
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, content=iter(_chunked(BODY, 5)))
+            ),
+        )
+    )
+
+    rows = list(query_datasource.iter_rows(client=client, body=query_request))
+
+    assert rows == json.loads(BODY)["data"]
+
+
+def test_iter_row_chunks(client, query_request):
+    """Test that rows are grouped into fixed-size chunks"""
+    client.client.set_httpx_client(
+        httpx.Client(
+            base_url="http://localhost",
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, content=BODY)
+            ),
+        )
+    )
+
+    chunks = list(
+        query_datasource.iter_row_chunks(
+            client=client, body=query_request, chunk_size=2
+        )
+    )
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+
+
+def test_iter_rows_raises_query_error(client, query_request):
+    """Test that an error member in the body raises QueryError"""
+    client.client.set_httpx_client(
+        httpx.Client(
+            base_url="http://localhost",
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(
+                    200, json={"error": {"errorCode": "400803", "message": "Bad field"}}
+                )
+            ),
+        )
+    )
+
+    with pytest.raises(QueryError, match="400803"):
+        list(query_datasource.iter_rows(client=client, body=query_request))
+
+
+@pytest.mark.asyncio
+async def test_iter_row_chunks_async(client, query_request):
+    """Test that rows are grouped into fixed-size chunks asynchronously"""
+
+    async def body_stream():
+        for chunk in _chunked(BODY, 3):
+            yield chunk
+
+    client.client.set_async_httpx_client(
+        httpx.AsyncClient(
+            base_url="http://localhost",
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, content=body_stream())
+            ),
+        )
+    )
+
+    chunks = [
+        chunk
+        async for chunk in query_datasource.iter_row_chunks_async(
+            client=client, body=query_request, chunk_size=2
+        )
+    ]
+
+    assert chunks == [json.loads(BODY)["data"][:2], json.loads(BODY)["data"][2:]]
@@ -0,0 +1,148 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.api.client import AuthenticatedClient
+from src.api.limiter import AdaptiveLimiter
+from src.api.retry import RetryPolicy
+from tests.conftest import FakeClock
+
+
+async def _round_trip(
+    limiter: AdaptiveLimiter, clock: FakeClock, latency: float, overloaded=False
+):
+    """Send a full limit of requests that all take the same latency"""
+    started = [await limiter.acquire() for _ in range(limiter.limit)]
+    clock.now += latency
+    for start in started:
+        limiter.release(start, overloaded)
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_while_latency_is_flat(clock):
+    """Test the additive increase up to max_limit while the server keeps up"""
+    limiter = AdaptiveLimiter(initial_limit=4, max_limit=10, clock=clock)
+
+    for _ in range(3):
+        await _round_trip(limiter, clock, latency=0.1)
+    assert limiter.limit == 5
+
+    for _ in range(20):
+        await _round_trip(limiter, clock, latency=0.1)
+    assert limiter.limit == 10 and limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_overload_decreases_limit_once_per_round_trip(clock):
+    """Test that a round trip of 503 responses reduces the limit once"""
+    limiter = AdaptiveLimiter(initial_limit=20, backoff_ratio=0.5, clock=clock)
+
+    await _round_trip(limiter, clock, latency=0.1, overloaded=True)
+    assert limiter.limit == 10
+
+    await _round_trip(limiter, clock, latency=0.1, overloaded=True)
+    assert limiter.limit == 5
+
+
+@pytest.mark.asyncio
+async def test_latency_increase_decreases_limit(clock):
+    """Test that a sustained rise in latency is treated as overload"""
+    limiter = AdaptiveLimiter(initial_limit=20, max_limit=20, clock=clock)
+    for _ in range(5):
+        await _round_trip(limiter, clock, latency=0.1)
+
+    await _round_trip(limiter, clock, latency=1.0)
+
+    stats = limiter.stats()
+    assert stats.limit == 14
+    assert stats.latency > 2 * stats.baseline_latency
+
+
+@pytest.mark.asyncio
+async def test_requests_over_limit_wait_in_order(clock):
+    """Test that waiting requests are queued, observable, and served first in first out"""
+    limiter = AdaptiveLimiter(initial_limit=1, max_limit=1, clock=clock)
+    started = await limiter.acquire()
+    order = []
+
+    async def request(name: str) -> None:
+        await limiter.acquire()
+        order.append(name)
+
+    waiting = [asyncio.ensure_future(request(name)) for name in "abc"]
+    await asyncio.sleep(0)
+    assert limiter.queued == 3 and limiter.in_flight == 1
+
+    waiting[1].cancel()
+    limiter.release(started)
+    await asyncio.sleep(0)
+    assert order == ["a"] and limiter.queued == 1
+
+    limiter.cancel()
+    await asyncio.gather(waiting[2])
+    assert order == ["a", "c"] and limiter.in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_async_client_requests_stay_within_limit():
+    """Test that the async client holds requests to the limit, and adapts it to 503 responses"""
+    in_flight = peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(503 if request.url.path == "/busy" else 200, json={})
+
+    limiter = AdaptiveLimiter(initial_limit=3, max_limit=3)
+    client = AuthenticatedClient(
+        base_url="http://test.com",
+        token="token",
+        httpx_args={"transport": httpx.MockTransport(handler)},
+        concurrency_limiter=limiter,
+        retry_policy=RetryPolicy(max_attempts=1),
+    )
+    async_client = client.get_async_httpx_client()
+
+    await asyncio.gather(*(async_client.post("/query") for _ in range(12)))
+    assert peak == 3 and limiter.in_flight == 0
+
+    assert (await async_client.post("/busy")).status_code == 503
+    assert limiter.limit == 2 and limiter.in_flight == 0
+
+
+class SlowReadStream(httpx.AsyncByteStream):
+    """A response body whose reading takes 100 seconds of a fake clock"""
+
+    def __init__(self, clock: FakeClock) -> None:
+        self.clock = clock
+
+    async def __aiter__(self):
+        self.clock.now += 100
+        yield b"{}"
+
+
+@pytest.mark.asyncio
+async def test_streamed_response_latency_ends_with_headers(clock):
+    """Test that a slow reader of a streamed body holds its slot without adding to the latency"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        clock.now += 1
+        return httpx.Response(200, stream=SlowReadStream(clock))
+
+    limiter = AdaptiveLimiter(clock=clock)
+    client = AuthenticatedClient(
+        base_url="http://test.com",
+        token="token",
+        httpx_args={"transport": httpx.MockTransport(handler)},
+        concurrency_limiter=limiter,
+    )
+
+    async with client.get_async_httpx_client().stream("GET", "/query") as response:
+        assert limiter.in_flight == 1
+        await response.aread()
+    assert limiter.in_flight == 0
+    assert limiter.stats().latency == 1
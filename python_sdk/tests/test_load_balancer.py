@@ -0,0 +1,145 @@
+from collections import Counter
+
+import httpx
+import pytest
+import tableauserverclient as TSC
+
+from src.api.client import AuthenticatedClient, VizQLDataServiceClient
+from src.api.load_balancer import LoadBalancer, LoadBalancingPolicy
+from src.api.retry import RetryPolicy
+
+NODES = [f"http://node{i}.example.com/api/v1/vizql-data-service" for i in range(3)]
+
+
+class FakeNodes:
+    """Nodes answering requests, except those marked down, counting the requests of each host"""
+
+    def __init__(self) -> None:
+        self.down: set[str] = set()
+        self.hosts: Counter = Counter()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        self.hosts[host] += 1
+        assert request.headers["Host"] == host
+        if host in self.down:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json={"data": []})
+
+
+def _client(nodes: FakeNodes, balancer: LoadBalancer) -> httpx.Client:
+    return AuthenticatedClient(
+        base_url=NODES[0],
+        token="token",
+        httpx_args={"transport": httpx.MockTransport(nodes)},
+        load_balancer=balancer,
+    ).get_httpx_client()
+
+
+def test_requests_are_spread_over_nodes():
+    """Test that requests to the base URL are sent to every node with the path kept"""
+    nodes = FakeNodes()
+    client = _client(nodes, LoadBalancer(NODES))
+
+    for _ in range(60):
+        response = client.post("/query-datasource")
+        assert (
+            response.request.url.path == "/api/v1/vizql-data-service/query-datasource"
+        )
+
+    assert set(nodes.hosts) == {f"node{i}.example.com" for i in range(3)}
+
+
+def test_node_with_fewer_outstanding_requests_is_chosen():
+    """Test that of two nodes, the one with fewer requests outstanding is picked"""
+    balancer = LoadBalancer(NODES[:2])
+    balancer.endpoints[0].outstanding = 5
+
+    chosen = [balancer.choose().url for _ in range(5)]
+
+    assert chosen == [NODES[1]] * 5
+    assert balancer.choose().url in NODES[:2]
+
+
+def test_failing_node_is_ejected_and_returns(clock):
+    """Test that a node failing repeatedly gets no requests until its ejection ends"""
+    balancer = LoadBalancer(
+        NODES[:2],
+        LoadBalancingPolicy(failure_threshold=2, ejection_time=10),
+        clock=clock,
+    )
+    nodes = FakeNodes()
+    nodes.down.add("node0.example.com")
+    client = _client(nodes, balancer)
+
+    while nodes.hosts["node0.example.com"] < 2:
+        try:
+            client.post("/query-datasource")
+        except httpx.ConnectError:
+            pass
+    assert [endpoint.url for endpoint in balancer.healthy()] == [NODES[1]]
+
+    for _ in range(10):
+        client.post("/query-datasource")
+    assert nodes.hosts["node0.example.com"] == 2
+
+    clock.now = 10
+    nodes.down.clear()
+    while nodes.hosts["node0.example.com"] < 3:
+        client.post("/query-datasource")
+    assert balancer.endpoints[0].ejections == 0
+
+
+def test_all_nodes_ejected_fails_open(clock):
+    """Test that requests still go out when every node is ejected"""
+    balancer = LoadBalancer(
+        NODES[:2],
+        LoadBalancingPolicy(failure_threshold=1, ejection_time=10),
+        clock=clock,
+    )
+    for endpoint in balancer.endpoints:
+        balancer.choose()
+        balancer.record(endpoint, failed=True)
+    clock.now = 1
+
+    assert balancer.healthy() == []
+    assert balancer.choose() is balancer.endpoints[0]
+
+
+def test_retries_go_through_load_balancer():
+    """Test that a request failing to connect to a node is retried on another node"""
+    nodes = FakeNodes()
+    nodes.down.add("node0.example.com")
+    balancer = LoadBalancer(NODES[:2], LoadBalancingPolicy(failure_threshold=1))
+    balancer.endpoints[1].outstanding = 1
+    client = AuthenticatedClient(
+        base_url=NODES[0],
+        token="token",
+        httpx_args={"transport": httpx.MockTransport(nodes)},
+        load_balancer=balancer,
+        retry_policy=RetryPolicy(backoff_base=0),
+    ).get_httpx_client()
+
+    assert client.post("/query-datasource").status_code == 200
+    assert nodes.hosts == {"node0.example.com": 1, "node1.example.com": 1}
+
+
+@pytest.mark.asyncio
+async def test_vizql_client_balances_several_urls():
+    """Test that a client given several URLs spreads its async requests over them"""
+    nodes = FakeNodes()
+    server = TSC.Server("http://node0.example.com")
+    server._auth_token = "token"  # type: ignore
+    client = VizQLDataServiceClient(
+        ["node0.example.com", "node1.example.com"],
+        server,
+        TSC.TableauAuth("user", "password"),
+        httpx_args={"transport": httpx.MockTransport(nodes)},
+    )
+
+    for _ in range(20):
+        await client.get_async_httpx_client().post("/read-metadata")
+
+    assert client.url == "node0.example.com"
+    assert set(nodes.hosts) == {"node0.example.com", "node1.example.com"}
+    assert all(endpoint.outstanding == 0 for endpoint in client.load_balancer.endpoints)
@@ -0,0 +1,229 @@
+import json
+from operator import itemgetter
+
+import httpx
+import pytest
+
+from src.api import pagination
+from src.api.openapi_generated import (
+    Datasource,
+    DimensionField,
+    Field,
+    Function,
+    MeasureField,
+    Query,
+    QueryDatasourceOptions,
+    QueryRequest,
+    SortDirection,
+)
+
+# Order lines with repeated and missing quantities
+ROWS = [
+    {"Order": f"O-{i}", "Quantity": quantity, "Order Date": f"2024-01-{i % 3 + 1:02d}"}
+    for i, quantity in enumerate([3, 1, None, 2, 2, 2, 5, 4, None, 1, 2, 6])
+]
+
+
+class _Server:
+    """Answer queries sorted on one column with range filters and a row limit, as the service would"""
+
+    def __init__(self, column: str, nulls_first: bool = False):
+        self.column = column
+        self.nulls_first = nulls_first
+        self.requests: list[dict] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests.append(body)
+        descending = any(
+            field.get("sortDirection") == "DESC" for field in body["query"]["fields"]
+        )
+        rows = [dict(row) for row in ROWS]
+        for query_filter in body["query"].get("filters", []):
+            rows = [row for row in rows if self._matches(query_filter, row)]
+        present = sorted(
+            (row for row in rows if row[self.column] is not None),
+            key=itemgetter(self.column),
+            reverse=descending,
+        )
+        missing = [row for row in rows if row[self.column] is None]
+        rows = missing + present if self.nulls_first else present + missing
+        limit = body.get("options", {}).get("rowLimit")
+        return httpx.Response(200, json={"data": rows[:limit]})
+
+    def _matches(self, query_filter: dict, row: dict) -> bool:
+        value = row[self.column]
+        if value is not None and self.column == "Order Date":
+            value = value[:10]
+        filter_type = query_filter["quantitativeFilterType"]
+        if filter_type == "ONLY_NULL":
+            return value is None
+        if value is None:
+            return query_filter.get("includeNulls", False)
+        if filter_type == "MIN":
+            return value >= query_filter.get("min", query_filter.get("minDate"))
+        return value <= query_filter.get("max", query_filter.get("maxDate"))
+
+
+def _query(field: Field, **options) -> QueryRequest:
+    return QueryRequest(
+        datasource=Datasource(datasourceLuid="test-datasource"),
+        query=Query(fields=[Field(root=DimensionField(fieldCaption="Order")), field]),
+        options=QueryDatasourceOptions(**options) if options else None,
+    )
+
+
+QUANTITY = Field(root=DimensionField(fieldCaption="Quantity", sortPriority=1))
+
+
+def _orders(pages) -> list[str]:
+    return [row["Order"] for page in pages for row in page.rows]
+
+
+@pytest.mark.parametrize("nulls_first", [False, True])
+def test_iter_pages_returns_every_row_once(nulls_first, make_client):
+    """Test that pages hold every row once, in order, with null keys last"""
+    server = _Server("Quantity", nulls_first=nulls_first)
+
+    pages = list(
+        pagination.iter_pages(
+            client=make_client(server), body=_query(QUANTITY), page_size=3
+        )
+    )
+
+    quantities = [row["Quantity"] for page in pages for row in page.rows]
+    assert sorted(_orders(pages)) == sorted(row["Order"] for row in ROWS)
+    assert quantities == [1, 1, 2, 2, 2, 2, 3, 4, 5, 6, None, None]
+    assert all(request["options"]["rowLimit"] for request in server.requests)
+
+
+def test_iter_pages_grows_page_for_repeated_keys(make_client):
+    """Test that a page whose rows all share a key is requested again with more rows"""
+    server = _Server("Quantity")
+
+    pages = list(
+        pagination.iter_pages(
+            client=make_client(server), body=_query(QUANTITY), page_size=1
+        )
+    )
+
+    quantities = [row["Quantity"] for page in pages for row in page.rows]
+    limits = [request["options"].get("rowLimit") for request in server.requests]
+    assert quantities[:6] == [1, 1, 2, 2, 2, 2]
+    assert limits[:4] == [1, 2, 4, 1]
+
+
+def test_iter_pages_grows_page_for_null_keys(make_client):
+    """Test that the rows without a key are requested with a row limit, doubled until they all fit"""
+    server = _Server("Quantity")
+
+    pages = list(
+        pagination.iter_pages(
+            client=make_client(server), body=_query(QUANTITY), page_size=1
+        )
+    )
+
+    null_requests = [
+        request
+        for request in server.requests
+        if any(
+            query_filter["quantitativeFilterType"] == "ONLY_NULL"
+            for query_filter in request["query"].get("filters", [])
+        )
+    ]
+    assert [request["options"]["rowLimit"] for request in null_requests] == [1, 2, 4]
+    assert [row["Quantity"] for row in pages[-1].rows] == [None, None]
+
+
+def test_iter_pages_rejects_date_time_keys(make_client):
+    """Test that date time sort keys, which filters only bound by day, are rejected"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, json={"data": [{"Order": "O-1", "Order Date": "2024-01-01T10:00:00"}]}
+        )
+
+    body = _query(Field(root=DimensionField(fieldCaption="Order Date", sortPriority=1)))
+    with pytest.raises(ValueError, match="date time"):
+        next(pagination.iter_pages(client=make_client(handler), body=body, page_size=1))
+
+
+def test_iter_pages_resumes_from_cursor(make_client):
+    """Test that a cursor resumes after its page without repeating rows"""
+    server = _Server("Quantity")
+    client = make_client(server)
+    body = _query(QUANTITY)
+
+    first = next(pagination.iter_pages(client=client, body=body, page_size=4))
+    rest = list(
+        pagination.iter_pages(
+            client=client, body=body, page_size=4, cursor=first.cursor
+        )
+    )
+
+    assert sorted(_orders([first, *rest])) == sorted(row["Order"] for row in ROWS)
+    assert len(_orders([first, *rest])) == len(ROWS)
+
+
+def test_iter_pages_rejects_cursor_of_another_query(make_client):
+    """Test that a cursor cannot resume a different query"""
+    client = make_client(_Server("Quantity"))
+    first = next(
+        pagination.iter_pages(client=client, body=_query(QUANTITY), page_size=4)
+    )
+    other = _query(
+        Field(
+            root=MeasureField(
+                fieldCaption="Quantity", function=Function.SUM, sortPriority=1
+            )
+        )
+    )
+
+    with pytest.raises(ValueError, match="different query"):
+        next(
+            pagination.iter_pages(
+                client=client, body=other, page_size=4, cursor=first.cursor
+            )
+        )
+    with pytest.raises(ValueError, match="Invalid"):
+        next(pagination.iter_pages(client=client, body=other, page_size=4, cursor="x"))
+
+
+@pytest.mark.asyncio
+async def test_iter_pages_async_pages_descending_dates(make_client):
+    """Test that descending date keys are paged with maximum date filters and the row limit is kept"""
+    server = _Server("Order Date")
+    body = _query(
+        Field(
+            root=DimensionField(
+                fieldCaption="Order Date",
+                sortPriority=1,
+                sortDirection=SortDirection.DESC,
+            )
+        ),
+        rowLimit=10,
+    )
+
+    pages = [
+        page
+        async for page in pagination.iter_pages_async(
+            client=make_client(server), body=body, page_size=5
+        )
+    ]
+
+    dates = [row["Order Date"] for page in pages for row in page.rows]
+    assert dates == sorted(dates, reverse=True) and len(dates) == 10
+    assert server.requests[1]["query"]["filters"][0]["quantitativeFilterType"] == "MAX"
+    assert server.requests[1]["query"]["filters"][0]["maxDate"] == "2024-01-02"
+
+
+def test_iter_pages_requires_sorted_query(make_client):
+    """Test that a query without a sort field cannot be paged through"""
+    with pytest.raises(ValueError, match="sorted"):
+        next(
+            pagination.iter_pages(
+                client=make_client(_Server("Quantity")),
+                body=_query(Field(root=DimensionField(fieldCaption="Quantity"))),
+                page_size=5,
+            )
+        )
@@ -0,0 +1,295 @@
+import json
+from datetime import date
+
+import httpx
+import pytest
+
+from src.api import partition
+from src.api.errors import UnexpectedStatus
+from src.api.openapi_generated import (
+    Datasource,
+    DimensionField,
+    DimensionFilterField,
+    Field,
+    FilterField,
+    Function,
+    MeasureField,
+    Query,
+    QueryDatasourceOptions,
+    QueryRequest,
+    ReturnFormat,
+    SortDirection,
+    TabFilter,
+    TopNFilter,
+)
+
+# Sales by region and category, partitioned on region
+ROWS = [
+    ("East", "Furniture", 10),
+    ("East", "Technology", 5),
+    ("West", "Furniture", 7),
+    ("West", "Office", 1),
+    ("North", "Technology", 2),
+]
+
+
+def _server(request: httpx.Request) -> httpx.Response:
+    """Answer category queries with the rows of the regions in the partition filter"""
+    body = json.loads(request.content)
+    regions = body["query"]["filters"][-1]["values"]
+    sales: dict[str, int] = {}
+    for region, category, amount in ROWS:
+        if region in regions:
+            sales[category] = sales.get(category, 0) + amount
+    return httpx.Response(
+        200,
+        json={
+            "data": [
+                {"Category": category, "SUM(Sales)": amount, "MIN(Sales)": amount}
+                for category, amount in sales.items()
+            ]
+        },
+    )
+
+
+def _query(*fields: Field, **options) -> QueryRequest:
+    return QueryRequest(
+        datasource=Datasource(datasourceLuid="test-datasource"),
+        query=Query(fields=list(fields)),
+        options=QueryDatasourceOptions(**options) if options else None,
+    )
+
+
+def test_set_partitions_split_values_evenly():
+    """Test that set partitions cover every value in chunks of about the same size"""
+    partitions = partition.set_partitions("Region", ["a", "b", "c", "d", "e"], 2)
+
+    assert [p.model_dump()["values"] for p in partitions] == [
+        ["a", "b", "c"],
+        ["d", "e"],
+    ]
+    assert partitions[0].field.root.fieldCaption == "Region"
+    assert len(partition.set_partitions("Region", ["a"], 4)) == 1
+
+
+def test_set_partitions_put_nulls_in_their_own_partition():
+    """Test that null is never a value of a set filter, and its partition excludes every other value"""
+    partitions = partition.set_partitions("Region", ["a", None, "b", "c"], 2)
+
+    assert [(p.model_dump()["values"], p.exclude) for p in partitions] == [
+        (["a", "b"], False),
+        (["c"], False),
+        (["a", "b", "c"], True),
+    ]
+    assert [
+        (p.values, p.exclude) for p in partition.set_partitions("R", [None], 2)
+    ] == [([], True)]
+
+
+def test_sync_partitioned_includes_null_partition(make_client):
+    """Test that rows of a null partition value are queried and merged with the others"""
+    rows = ROWS + [(None, "Furniture", 3)]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        set_filter = json.loads(request.content)["query"]["filters"][-1]
+        excluded = set_filter.get("exclude", False)
+        return httpx.Response(
+            200,
+            json={
+                "data": [
+                    [r, c, s]
+                    for r, c, s in rows
+                    if (r in set_filter["values"]) != excluded
+                ]
+            },
+        )
+
+    regions = [None, "East", "West", "North"]
+    output = partition.sync_partitioned(
+        client=make_client(handler),
+        body=_query(
+            Field(root=DimensionField(fieldCaption="Region")),
+            Field(root=DimensionField(fieldCaption="Category")),
+            Field(root=MeasureField(fieldCaption="Sales", function=Function.SUM)),
+            returnFormat=ReturnFormat.ARRAYS,
+        ),
+        partitions=partition.set_partitions("Region", regions, 2),
+    )
+
+    assert sorted(output.data, key=str) == sorted([list(row) for row in rows], key=str)
+
+
+def test_date_partitions_cover_range_without_overlap():
+    """Test that date partitions are consecutive inclusive ranges and the first includes nulls"""
+    partitions = partition.date_partitions(
+        "Order Date", date(2024, 1, 1), date(2024, 1, 10), 3
+    )
+
+    assert [(p.minDate, p.maxDate) for p in partitions] == [
+        (date(2024, 1, 1), date(2024, 1, 3)),
+        (date(2024, 1, 4), date(2024, 1, 6)),
+        (date(2024, 1, 7), date(2024, 1, 10)),
+    ]
+    assert [p.includeNulls for p in partitions] == [True, False, False]
+    assert (
+        len(partition.date_partitions("D", date(2024, 1, 1), date(2024, 1, 2), 5)) == 2
+    )
+
+
+def test_partition_query_rejects_non_additive_aggregates():
+    """Test that measures which cannot be combined across partitions are rejected"""
+    partitions = partition.set_partitions("Region", ["East", "West"], 2)
+    countd = Field(root=MeasureField(fieldCaption="Customer", function=Function.COUNTD))
+
+    with pytest.raises(ValueError, match="COUNTD"):
+        partition.partition_query(
+            _query(Field(root=DimensionField(fieldCaption="Category")), countd),
+            partitions,
+        )
+
+    # Each region is in a single partition, so its distinct count is exact
+    requests = partition.partition_query(
+        _query(Field(root=DimensionField(fieldCaption="Region")), countd), partitions
+    )
+    assert [r.query.filters[-1].root.model_dump()["values"] for r in requests] == [
+        ["East"],
+        ["West"],
+    ]
+
+
+def test_partition_query_rejects_top_n_filters():
+    """Test that filters computed over all rows are rejected"""
+    body = _query(Field(root=DimensionField(fieldCaption="Region")))
+    body.query.filters = [
+        TabFilter(
+            root=TopNFilter(
+                field=FilterField(root=DimensionFilterField(fieldCaption="Region")),
+                howMany=3,
+                fieldToMeasure=FilterField(
+                    root=DimensionFilterField(fieldCaption="Sales")
+                ),
+            )
+        )
+    ]
+
+    with pytest.raises(ValueError, match="TOP"):
+        partition.partition_query(body, partition.set_partitions("Region", ["East"], 1))
+
+
+def test_sync_partitioned_combines_shared_groups(make_client):
+    """Test that groups found in several partitions are re-aggregated and sorted"""
+    body = _query(
+        Field(
+            root=DimensionField(
+                fieldCaption="Category", sortPriority=2, sortDirection=SortDirection.ASC
+            )
+        ),
+        Field(
+            root=MeasureField(
+                fieldCaption="Sales",
+                function=Function.SUM,
+                sortPriority=1,
+                sortDirection=SortDirection.DESC,
+            )
+        ),
+        Field(root=MeasureField(fieldCaption="Sales", function=Function.MIN)),
+    )
+    partitions = partition.set_partitions("Region", ["East", "West", "North"], 3)
+
+    output = partition.sync_partitioned(
+        client=make_client(_server), body=body, partitions=partitions
+    )
+
+    assert output.data == [
+        {"Category": "Furniture", "SUM(Sales)": 17, "MIN(Sales)": 7},
+        {"Category": "Technology", "SUM(Sales)": 7, "MIN(Sales)": 2},
+        {"Category": "Office", "SUM(Sales)": 1, "MIN(Sales)": 1},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_asyncio_partitioned_concatenates_disjoint_rows(make_client):
+    """Test that rows of disjoint partitions are concatenated, sorted and limited"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        regions = json.loads(request.content)["query"]["filters"][-1]["values"]
+        return httpx.Response(
+            200,
+            json={"data": [[r, c, s] for r, c, s in ROWS if r in regions]},
+        )
+
+    body = _query(
+        Field(root=DimensionField(fieldCaption="Region")),
+        Field(root=DimensionField(fieldCaption="Category")),
+        Field(
+            root=MeasureField(
+                fieldCaption="Sales",
+                function=Function.SUM,
+                sortPriority=1,
+                sortDirection=SortDirection.DESC,
+            )
+        ),
+        returnFormat=ReturnFormat.ARRAYS,
+        rowLimit=3,
+    )
+
+    output = await partition.asyncio_partitioned(
+        client=make_client(handler),
+        body=body,
+        partitions=partition.set_partitions("Region", ["East", "West", "North"], 3),
+        max_concurrency=2,
+    )
+
+    assert output.data == [
+        ["East", "Furniture", 10],
+        ["West", "Furniture", 7],
+        ["East", "Technology", 5],
+    ]
+
+
+def test_distinct_values_queries_partition_dimension(make_client):
+    """Test that distinct values are read with a query on the dimension alone"""
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(json.loads(request.content))
+        return httpx.Response(
+            200, json={"data": [{"Region": "East"}, {"Region": None}]}
+        )
+
+    values = partition.distinct_values(
+        client=make_client(handler),
+        body=_query(Field(root=DimensionField(fieldCaption="Category")), rowLimit=5),
+        field_caption="Region",
+    )
+
+    assert values == ["East", None]
+    assert sent[0]["query"]["fields"] == [{"fieldCaption": "Region"}]
+    assert "rowLimit" not in sent[0]["options"]
+
+
+def test_sync_partitioned_raises_unexpected_status(make_client):
+    """Test that an unsuccessful partition query fails the whole query"""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if json.loads(request.content)["query"]["filters"][-1]["values"] == ["West"]:
+            return httpx.Response(418, content=b"teapot")
+        return _server(request)
+
+    client = make_client(handler)
+    assert (
+        partition.sync_partitioned(
+            client=client,
+            body=_query(Field(root=DimensionField(fieldCaption="Category"))),
+            partitions=partition.set_partitions("Region", ["East", "West"], 2),
+        )
+        is None
+    )
+
+    client.raise_on_unexpected_status = True
+    with pytest.raises(UnexpectedStatus):
+        partition.sync_partitioned(
+            client=client,
+            body=_query(Field(root=DimensionField(fieldCaption="Category"))),
+            partitions=partition.set_partitions("Region", ["East", "West"], 2),
+        )
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+import tableauserverclient as TSC
+
+from src.api.client import AuthenticatedClient, VizQLDataServiceClient
+from src.api.retry import RetryPolicy
+
+
+class SimpleRequestHandler(BaseHTTPRequestHandler):
+    """A handler answering the simple-request endpoint slowly, recording the port of each request"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self.server.ports.append(self.client_address[1])  # type: ignore
+        time.sleep(0.05)
+        body = b'"ok"'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SimpleRequestHandler)
+    server.ports = []  # type: ignore
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _client(url: str, **options) -> VizQLDataServiceClient:
+    server = TSC.Server(url)
+    server._auth_token = "token"  # type: ignore
+    return VizQLDataServiceClient(
+        url, server, TSC.TableauAuth("user", "password"), **options
+    )
+
+
+def test_pool_settings_reach_connection_pools():
+    """Test that the pool settings are passed to the connection pools of the sync and async clients"""
+    client = _client(
+        "http://localhost",
+        max_connections=50,
+        max_keepalive_connections=10,
+        keepalive_expiry=30.0,
+    )
+
+    for pool in (
+        client.get_httpx_client()._transport._pool,
+        client.get_async_httpx_client()._transport._pool,
+    ):
+        assert pool._max_connections == 50
+        assert pool._max_keepalive_connections == 10
+        assert pool._keepalive_expiry == 30.0
+
+
+def test_pool_settings_are_kept_under_retry_transport():
+    """Test that the transport built for retries uses the pool settings"""
+    client = _client("http://localhost", max_connections=7, retry_policy=RetryPolicy())
+
+    assert client.get_httpx_client()._transport.transport._pool._max_connections == 7
+    assert (
+        client.get_async_httpx_client()._transport.transport._pool._max_connections == 7
+    )
+
+
+def test_limits_replace_limits_in_httpx_args():
+    """Test that the limits of the client replace those in httpx_args"""
+    client = AuthenticatedClient(
+        base_url="http://localhost",
+        token="token",
+        httpx_args={"limits": httpx.Limits(max_connections=3)},
+        limits=httpx.Limits(max_connections=4),
+    )
+
+    assert client.get_httpx_client()._transport._pool._max_connections == 4
+
+
+def test_warm_up_opens_connections(server):
+    """Test that warm_up opens one connection per request and keeps them for the next requests"""
+    client = _client(f"http://127.0.0.1:{server.server_port}")
+
+    client.warm_up(5)
+
+    assert len(set(server.ports)) == 5
+    pool = client.get_httpx_client()._transport._pool
+    assert len(pool.connections) == 5
+    assert all(connection.is_idle() for connection in pool.connections)
+
+    client.get_httpx_client().get("/simple-request")
+    assert server.ports[-1] in server.ports[:5]
+
+
+def test_warm_up_async_opens_connections(server):
+    """Test that warm_up_async sends its requests at once, each on its own connection"""
+    client = _client(f"http://127.0.0.1:{server.server_port}")
+
+    asyncio.run(client.warm_up_async(4))
+
+    assert len(set(server.ports)) == 4
+
+
+def test_warm_up_checks_connections():
+    """Test that warm_up rejects more connections than the pool opens or keeps alive"""
+    client = _client("http://localhost", max_keepalive_connections=2)
+
+    with pytest.raises(ValueError, match="max_keepalive_connections"):
+        client.warm_up(3)
+    with pytest.raises(ValueError, match="max_connections"):
+        _client(
+            "http://localhost", max_connections=2, max_keepalive_connections=5
+        ).warm_up(3)
+    with pytest.raises(ValueError):
+        asyncio.run(client.warm_up_async(0))
@@ -1,8 +1,9 @@
 from unittest.mock import AsyncMock, Mock
 
 import pytest
+from pydantic import ValidationError
 
-from src.api.client import AuthenticatedClient, VizQLDataServiceClient
+from src.api.client import AuthenticatedClient
 from src.api.openapi_generated import (
     Datasource,
     DimensionField,
@@ -11,12 +12,18 @@ from src.api.openapi_generated import (
     QueryOutput,
     QueryRequest,
 )
-from src.api.query_datasource import asyncio, asyncio_detailed, sync, sync_detailed
+from src.api.query_datasource import (
+    _sample_positions,
+    asyncio,
+    asyncio_detailed,
+    sync,
+    sync_detailed,
+)
 
 
 @pytest.fixture
-def mock_client():
-    client = Mock(spec=VizQLDataServiceClient)
+def mock_client(make_mock_client):
+    client = make_mock_client()
     client.raise_on_unexpected_status = True
     mock_authenticated_client = Mock(spec=AuthenticatedClient)
     mock_httpx_client = Mock()
@@ -26,8 +33,8 @@ def mock_client():
 
 
 @pytest.fixture
-def mock_async_client():
-    client = Mock(spec=VizQLDataServiceClient)
+def mock_async_client(make_mock_client):
+    client = make_mock_client()
     client.raise_on_unexpected_status = True
     mock_authenticated_client = Mock(spec=AuthenticatedClient)
     mock_async_httpx_client = AsyncMock()
@@ -119,3 +126,90 @@ async def test_asyncio_success(mock_async_client, mock_query_request):
     result = await asyncio(client=mock_async_client, body=mock_query_request)
 
     assert isinstance(result, QueryOutput)
+
+
+def test_sync_fast_decode(mock_client, mock_query_request):
+    # Mock successful response
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.content = (
+        b'{"data": [{"id": 1, "name": "test"}, {"id": 2, "name": "other"}]}'
+    )
+    mock_response.headers = {}
+
+    mock_client.fast_decode_sample_rows = 2
+    mock_client.client.get_httpx_client.return_value.request.return_value = (
+        mock_response
+    )
+
+    result = sync(client=mock_client, body=mock_query_request, fast_decode=True)
+
+    assert isinstance(result, QueryOutput)
+    assert result.data == [{"id": 1, "name": "test"}, {"id": 2, "name": "other"}]
+
+
+def test_sync_fast_decode_from_client(mock_client, mock_query_request):
+    # Mock successful response with an invalid envelope
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.content = b'{"data": [], "error": "not an object"}'
+    mock_response.headers = {}
+
+    mock_client.fast_decode = True
+    mock_client.fast_decode_sample_rows = 0
+    mock_client.client.get_httpx_client.return_value.request.return_value = (
+        mock_response
+    )
+
+    with pytest.raises(ValidationError):
+        sync(client=mock_client, body=mock_query_request)
+
+
+def test_sync_fast_decode_sampled_rows_mismatch(mock_client, mock_query_request):
+    # Mock successful response with rows of different shapes
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.content = b'{"data": [[1, "a"], [2, "b"], [3], [4, "d"]]}'
+    mock_response.headers = {}
+
+    mock_client.fast_decode_sample_rows = 4
+    mock_client.client.get_httpx_client.return_value.request.return_value = (
+        mock_response
+    )
+
+    with pytest.raises(ValueError, match="Row 2"):
+        sync(client=mock_client, body=mock_query_request, fast_decode=True)
+
+
+def test_sync_fast_decode_sampled_scalar_rows(mock_client, mock_query_request):
+    # Mock successful response with a row that is neither an array nor an object
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.content = b'{"data": [[1, "a"], 2, [3, "c"]]}'
+    mock_response.headers = {}
+
+    mock_client.fast_decode_sample_rows = 3
+    mock_client.client.get_httpx_client.return_value.request.return_value = (
+        mock_response
+    )
+
+    result = sync(client=mock_client, body=mock_query_request, fast_decode=True)
+
+    assert isinstance(result, QueryOutput)
+    assert result.data == [[1, "a"], 2, [3, "c"]]
+
+
+@pytest.mark.parametrize(
+    "length, count, positions",
+    [
+        (10, 3, [0, 4, 9]),
+        (10, 4, [0, 3, 6, 9]),
+        (5, 5, [0, 1, 2, 3, 4]),
+        (3, 10, [0, 1, 2]),
+        (10, 1, [0]),
+        (0, 4, []),
+    ],
+)
+def test_sample_positions_are_capped_at_count(length, count, positions):
+    """Test that no more rows than fast_decode_sample_rows are checked, each once"""
+    assert _sample_positions(length, count) == positions
@@ -1,15 +1,17 @@
 from unittest.mock import AsyncMock, Mock
 
 import pytest
+from pydantic import ValidationError
 
-from src.api.client import AuthenticatedClient, VizQLDataServiceClient
+from src.api.client import AuthenticatedClient
+from src.api.errors import UnexpectedStatus
 from src.api.openapi_generated import Datasource, MetadataOutput, ReadMetadataRequest
 from src.api.read_metadata import asyncio, asyncio_detailed, sync, sync_detailed
 
 
 @pytest.fixture
-def mock_client():
-    client = Mock(spec=VizQLDataServiceClient)
+def mock_client(make_mock_client):
+    client = make_mock_client()
     client.raise_on_unexpected_status = True
     mock_authenticated_client = Mock(spec=AuthenticatedClient)
     mock_httpx_client = Mock()
@@ -19,8 +21,8 @@ def mock_client():
 
 
 @pytest.fixture
-def mock_async_client():
-    client = Mock(spec=VizQLDataServiceClient)
+def mock_async_client(make_mock_client):
+    client = make_mock_client()
     client.raise_on_unexpected_status = True
     mock_authenticated_client = Mock(spec=AuthenticatedClient)
     mock_async_httpx_client = AsyncMock()
@@ -112,3 +114,59 @@ async def test_asyncio_success(mock_async_client, mock_metadata_request):
     result = await asyncio(client=mock_async_client, body=mock_metadata_request)
 
     assert isinstance(result, MetadataOutput)
+
+
+def test_sync_detailed_parses_lazily(mock_client, mock_metadata_request):
+    """Test that the response body is only parsed when parsed is accessed"""
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.content = b"not json"
+    mock_response.headers = {}
+
+    mock_client.client.get_httpx_client.return_value.request.return_value = (
+        mock_response
+    )
+
+    response = sync_detailed(client=mock_client, body=mock_metadata_request)
+
+    assert response.content == b"not json"
+    with pytest.raises(ValidationError):
+        response.parsed
+
+
+def test_sync_detailed_releases_content(mock_client, mock_metadata_request):
+    """Test that content is released once parsed has been computed"""
+    mock_client.release_content = True
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.content = b'{"data": [{"fieldName": "id", "dataType": "INTEGER"}]}'
+    mock_response.headers = {}
+
+    mock_client.client.get_httpx_client.return_value.request.return_value = (
+        mock_response
+    )
+
+    response = sync_detailed(client=mock_client, body=mock_metadata_request)
+
+    assert response.content != b""
+    parsed = response.parsed
+    assert isinstance(parsed, MetadataOutput)
+    assert response.content == b""
+    assert response.parsed is parsed
+
+
+def test_sync_detailed_raises_unexpected_status_eagerly(
+    mock_client, mock_metadata_request
+):
+    """Test that an unexpected status is raised without accessing parsed"""
+    mock_response = Mock()
+    mock_response.status_code = 500
+    mock_response.content = b"Internal Server Error"
+    mock_response.headers = {}
+
+    mock_client.client.get_httpx_client.return_value.request.return_value = (
+        mock_response
+    )
+
+    with pytest.raises(UnexpectedStatus):
+        sync_detailed(client=mock_client, body=mock_metadata_request)
@@ -0,0 +1,127 @@
+import httpx
+import pytest
+
+from src.api.client import AuthenticatedClient
+from src.api.retry import RetryBudget, RetryPolicy
+
+
+def _client(handler, policy: RetryPolicy) -> AuthenticatedClient:
+    return AuthenticatedClient(
+        base_url="http://test.com",
+        token="test-token",
+        httpx_args={"transport": httpx.MockTransport(handler)},
+        retry_policy=policy,
+    )
+
+
+def _flaky(*responses):
+    """Return a handler answering with each response in turn, and the list of requests it received"""
+    requests = []
+
+    def handler(request: httpx.Request):
+        requests.append(request)
+        response = responses[len(requests) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    return handler, requests
+
+
+def test_retry_transport_retries_gateway_errors():
+    """Test that transient statuses and connect errors are retried until success"""
+    handler, requests = _flaky(
+        httpx.Response(503),
+        httpx.ConnectError("connection refused"),
+        httpx.Response(200, json={"data": []}),
+    )
+    client = _client(handler, RetryPolicy(max_attempts=3, backoff_base=0))
+
+    response = client.get_httpx_client().post("/query", content=b"{}")
+
+    assert response.status_code == 200
+    assert len(requests) == 3 and requests[2].content == b"{}"
+
+
+def test_retry_transport_gives_up_after_max_attempts():
+    """Test that the last response is returned once the attempts are used up"""
+    handler, requests = _flaky(httpx.Response(502), httpx.Response(504))
+    client = _client(handler, RetryPolicy(max_attempts=2, backoff_base=0))
+
+    assert client.get_httpx_client().post("/query").status_code == 504
+    assert len(requests) == 2
+
+
+def test_retry_transport_does_not_retry_client_errors():
+    """Test that statuses other than the retryable ones are returned at once"""
+    handler, requests = _flaky(httpx.Response(400))
+    client = _client(handler, RetryPolicy(backoff_base=0))
+
+    assert client.get_httpx_client().post("/query").status_code == 400
+    assert len(requests) == 1
+
+
+def test_retry_policy_honours_retry_after():
+    """Test that Retry-After extends the backoff, and a long one stops retrying"""
+    policy = RetryPolicy(backoff_base=0, max_retry_after=5, budget=None)
+
+    assert policy.delay(1, httpx.Response(429, headers={"Retry-After": "2"})) == 2
+    assert policy.delay(1, httpx.Response(429, headers={"Retry-After": "60"})) is None
+    assert policy.delay(1, httpx.Response(429, headers={"Retry-After": "soon"})) == 0
+
+
+def test_retry_policy_backoff_is_jittered_and_capped():
+    """Test that backoff is drawn below an exponentially growing, capped bound"""
+    policy = RetryPolicy(backoff_base=1, backoff_max=4)
+
+    for retry, bound in [(1, 1), (2, 2), (3, 4), (6, 4)]:
+        delays = [policy.backoff(retry) for _ in range(50)]
+        assert all(0 <= delay <= bound for delay in delays)
+        assert len(set(delays)) > 1
+
+
+def test_retry_budget_stops_retries_when_most_requests_fail():
+    """Test that retries stop once failures use up half of the budget, and resume after successes"""
+    budget = RetryBudget(max_tokens=4, token_ratio=0.5)
+    handler, requests = _flaky(*[httpx.Response(503)] * 10)
+    client = _client(
+        handler, RetryPolicy(max_attempts=5, backoff_base=0, budget=budget)
+    )
+
+    client.get_httpx_client().post("/query")
+
+    # Only the first failure leaves more than half of the budget
+    assert len(requests) == 2
+    assert budget.record_failure() is False
+    for _ in range(6):
+        budget.record_success()
+    assert budget.record_failure() is True
+
+
+def test_retry_budget_is_only_charged_for_retries():
+    """Test that final attempts and responses that are not retried leave the budget untouched"""
+    budget = RetryBudget(max_tokens=4)
+    handler, requests = _flaky(*[httpx.Response(503)] * 5)
+    client = _client(handler, RetryPolicy(max_attempts=1, budget=budget))
+
+    for _ in range(5):
+        client.get_httpx_client().post("/query")
+
+    assert len(requests) == 5
+    policy = RetryPolicy(max_retry_after=5, budget=budget)
+    assert policy.delay(1, httpx.Response(429, headers={"Retry-After": "60"})) is None
+    assert policy.delay(1, httpx.Response(400)) is None
+    assert budget.tokens == 4
+
+
+@pytest.mark.asyncio
+async def test_async_retry_transport_retries():
+    """Test that the async client retries transient errors"""
+    handler, requests = _flaky(
+        httpx.ConnectTimeout("timed out"), httpx.Response(200, json={})
+    )
+    client = _client(handler, RetryPolicy(backoff_base=0))
+
+    response = await client.get_async_httpx_client().post("/query")
+
+    assert response.status_code == 200 and len(requests) == 2
@@ -0,0 +1,173 @@
+import json
+
+import httpx
+import pytest
+import tableauserverclient as TSC
+
+from src.api import query_datasource
+from src.api.client import VizQLDataServiceClient
+from src.api.errors import QueryError, UnexpectedStatus
+from src.api.openapi_generated import (
+    Datasource,
+    DimensionField,
+    Field,
+    Query,
+    QueryRequest,
+)
+from src.api.sse import ServerSentEvent, SSEDecoder, aiter_sse, iter_sse
+
+EVENT_STREAM = (
+    'event: METADATA\ndata: {"rowCount": 3}\n\n'
+    'event: DATA\ndata: [["Furniture", 1], ["Office Supplies", 2]]\n\n'
+    ": keep-alive\n\n"
+    'event: DATA\ndata: [["Technology", 3]]\n\n'
+)
+
+
+@pytest.fixture
+def client() -> VizQLDataServiceClient:
+    server = TSC.Server("http://localhost")
+    server._auth_token = "mock-token"  # type: ignore
+    return VizQLDataServiceClient(
+        "http://localhost", server, TSC.TableauAuth("test-user", "test-password")
+    )
+
+
+@pytest.fixture
+def query_request() -> QueryRequest:
+    return QueryRequest(
+        datasource=Datasource(datasourceLuid="test-datasource"),
+        query=Query(fields=[Field(root=DimensionField(fieldCaption="Category"))]),
+    )
+
+
+def _event_stream_response(request: httpx.Request, body: str) -> httpx.Response:
+    assert json.loads(request.content)["options"]["returnServerSentEvents"] is True
+    return httpx.Response(
+        200, content=body.encode(), headers={"Content-Type": "text/event-stream"}
+    )
+
+
+def test_sse_decoder_multiline_data():
+    """Test that data lines are joined and the event is dispatched on a blank line"""
+    decoder = SSEDecoder()
+    assert decoder.decode("event: DATA") is None
+    assert decoder.decode("data: [1,") is None
+    assert decoder.decode("data:2]") is None
+    assert decoder.decode("") == ServerSentEvent(event="DATA", data="[1,\n2]")
+
+
+def test_iter_sse_discards_unterminated_event():
+    """Test that an event is not dispatched when the stream ends before its blank line"""
+    events = list(iter_sse(["event: DATA", "data: []", "", "data: x\r"]))
+    assert events == [ServerSentEvent(event="DATA", data="[]")]
+
+
+@pytest.mark.asyncio
+async def test_aiter_sse_discards_unterminated_event():
+    """Test that the async decoder also drops a truncated last event"""
+
+    async def lines():
+        for line in ["data: [1]", "", "event: DATA", "data: [2"]:
+            yield line
+
+    events = [sse async for sse in aiter_sse(lines())]
+    assert events == [ServerSentEvent(event="message", data="[1]")]
+
+
+def test_stream_yields_data_batches(client, query_request):
+    """Test that each DATA event is yielded as a row batch"""
+    client.client.set_httpx_client(
+        httpx.Client(
+            base_url="http://localhost",
+            transport=httpx.MockTransport(
+                lambda request: _event_stream_response(request, EVENT_STREAM)
+            ),
+        )
+    )
+
+    batches = list(query_datasource.stream(client=client, body=query_request))
+
+    assert batches == [
+        [["Furniture", 1], ["Office Supplies", 2]],
+        [["Technology", 3]],
+    ]
+
+
+def test_stream_raises_on_error_event(client, query_request):
+    """Test that an ERROR event raises QueryError after earlier batches are yielded"""
+    body = (
+        'event: DATA\ndata: [["Furniture", 1]]\n\n'
+        'event: ERROR\ndata: {"errorCode": "400800", "message": "Query timed out"}\n\n'
+    )
+    client.client.set_httpx_client(
+        httpx.Client(
+            base_url="http://localhost",
+            transport=httpx.MockTransport(
+                lambda request: _event_stream_response(request, body)
+            ),
+        )
+    )
+
+    batches = query_datasource.stream(client=client, body=query_request)
+    assert next(batches) == [["Furniture", 1]]
+    with pytest.raises(QueryError, match="400800") as exc_info:
+        next(batches)
+    assert exc_info.value.error.message == "Query timed out"
+
+
+def test_stream_falls_back_to_json_body(client, query_request):
+    """Test that a buffered JSON response is yielded as a single batch"""
+    client.client.set_httpx_client(
+        httpx.Client(
+            base_url="http://localhost",
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, json={"data": [["Furniture", 1]]})
+            ),
+        )
+    )
+
+    batches = list(query_datasource.stream(client=client, body=query_request))
+
+    assert batches == [[["Furniture", 1]]]
+
+
+def test_stream_unexpected_status(client, query_request):
+    """Test that an undocumented status raises when raise_on_unexpected_status is set"""
+    client.raise_on_unexpected_status = True
+    client.client.set_httpx_client(
+        httpx.Client(
+            base_url="http://localhost",
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(500, content=b"boom")
+            ),
+        )
+    )
+
+    with pytest.raises(UnexpectedStatus):
+        list(query_datasource.stream(client=client, body=query_request))
+
+
+@pytest.mark.asyncio
+async def test_stream_async_yields_data_batches(client, query_request):
+    """Test that each DATA event is yielded as a row batch asynchronously"""
+    client.client.set_async_httpx_client(
+        httpx.AsyncClient(
+            base_url="http://localhost",
+            transport=httpx.MockTransport(
+                lambda request: _event_stream_response(request, EVENT_STREAM)
+            ),
+        )
+    )
+
+    batches = [
+        batch
+        async for batch in query_datasource.stream_async(
+            client=client, body=query_request
+        )
+    ]
+
+    assert batches == [
+        [["Furniture", 1], ["Office Supplies", 2]],
+        [["Technology", 3]],
+    ]
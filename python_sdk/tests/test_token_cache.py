@@ -0,0 +1,169 @@
+import base64
+import itertools
+import json
+import os
+from unittest.mock import Mock
+
+import pytest
+import tableauserverclient as TSC
+
+from src.api.auth import TokenProvider
+from src.api.client import VizQLDataServiceClient
+
+pytest.importorskip("cryptography")
+
+from src.api.token_cache import TokenCache, principal  # noqa: E402
+
+
+def _jwt(subject: str, **claims) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({"sub": subject, **claims}).encode())
+    return f"e30.{payload.decode().rstrip('=')}.signature"
+
+
+TOKENS = itertools.count(1)
+
+
+def _server() -> TSC.Server:
+    """Return a server whose every sign-in issues a new numbered token"""
+    server = TSC.Server("http://tableau.example.com")
+    server.auth = Mock()
+    sign_ins = []
+
+    def sign_in(auth):
+        sign_ins.append(auth)
+        server._set_auth("site-luid", "user-luid", f"token-{next(TOKENS)}", "site")
+
+    server.auth.sign_in.side_effect = sign_in
+    server.sign_ins = sign_ins  # type: ignore
+    return server
+
+
+@pytest.fixture
+def cache(tmp_path, clock) -> TokenCache:
+    clock.now = 1_000_000.0
+    return TokenCache(
+        str(tmp_path / "tokens"), TokenCache.generate_key(), ttl=60, clock=clock
+    )
+
+
+def test_sign_in_reuses_cached_session_on_new_server(cache):
+    """Test that a second server restores the cached session instead of signing in"""
+    auth = TSC.PersonalAccessTokenAuth("pat", "secret", site_id="site")
+    token = cache.sign_in(_server(), auth)
+
+    server = _server()
+    assert cache.sign_in(server, auth) == token
+
+    assert server.sign_ins == []
+    assert server.auth_token == token and server.site_id == "site-luid"
+    assert server.site_url == "site"
+
+
+def test_sessions_are_keyed_by_site_and_principal(cache):
+    """Test that other sites, principals and secrets do not share a session"""
+    server = _server()
+    cache.sign_in(server, TSC.TableauAuth("alice", "password", site_id="a"))
+
+    assert cache.get(server, TSC.TableauAuth("alice", "password", site_id="a"))
+    assert cache.get(server, TSC.TableauAuth("alice", "other", site_id="a")) is None
+    assert cache.get(server, TSC.TableauAuth("alice", "password", site_id="b")) is None
+    assert cache.get(server, TSC.TableauAuth("bob", "password", site_id="a")) is None
+
+
+def test_personal_access_tokens_with_same_name_do_not_share_a_session(cache):
+    """Test that personal access tokens of two users with the same name are signed in separately"""
+    first = cache.sign_in(
+        _server(), TSC.PersonalAccessTokenAuth("automation", "alice-secret", "a")
+    )
+    server = _server()
+    second = cache.sign_in(
+        server, TSC.PersonalAccessTokenAuth("automation", "bob-secret", "a")
+    )
+
+    assert second != first
+    assert len(server.sign_ins) == 1
+
+
+def test_sessions_expire_after_ttl(cache):
+    """Test that a session is signed in again once its TTL has passed"""
+    auth = TSC.TableauAuth("alice", "password")
+    token = cache.sign_in(_server(), auth)
+
+    cache.clock.now += 60
+    server = _server()
+
+    assert cache.sign_in(server, auth) != token
+    assert len(server.sign_ins) == 1
+
+
+def test_cache_file_is_encrypted(cache, tmp_path):
+    """Test that tokens are not readable in the file and a wrong key reads nothing"""
+    auth = TSC.TableauAuth("alice", "password")
+    token = cache.sign_in(_server(), auth)
+
+    assert token.encode() not in (tmp_path / "tokens").read_bytes()
+    assert os.stat(tmp_path / "tokens").st_mode & 0o077 == 0
+    other = TokenCache(cache.path, TokenCache.generate_key())
+    assert other.get(_server(), auth) is None
+
+
+def test_jwt_principal_uses_subject():
+    """Test that JWTs of the same subject share a principal"""
+    assert principal(TSC.JWTAuth(_jwt("alice"))) == principal(
+        TSC.JWTAuth(_jwt("alice"))
+    )
+    assert principal(TSC.JWTAuth(_jwt("alice"))) != principal(TSC.JWTAuth(_jwt("bob")))
+
+
+def test_jwts_of_same_subject_share_a_session(cache):
+    """Test that a newly issued JWT of the same subject reuses the cached session"""
+    token = cache.sign_in(_server(), TSC.JWTAuth(_jwt("alice", jti="1"), site_id="a"))
+    server = _server()
+
+    assert (
+        cache.sign_in(server, TSC.JWTAuth(_jwt("alice", jti="2"), site_id="a")) == token
+    )
+    assert server.sign_ins == []
+    assert cache.get(server, TSC.JWTAuth(_jwt("bob", jti="3"), site_id="a")) is None
+
+
+def test_token_provider_invalidates_session_of_new_jwt(cache):
+    """Test that a rejected session is removed although the provider issues a new JWT for each sign-in"""
+    jtis = itertools.count()
+    token = cache.sign_in(_server(), TSC.JWTAuth(_jwt("alice", jti="first")))
+    server = _server()
+    provider = TokenProvider(
+        server,
+        lambda: TSC.JWTAuth(_jwt("alice", jti=str(next(jtis)))),
+        token_cache=cache,
+    )
+
+    assert provider.get_token() == token and server.sign_ins == []
+    new_token = provider.refresh(token)
+
+    assert new_token != token and len(server.sign_ins) == 1
+    assert cache.get(_server(), TSC.JWTAuth(_jwt("alice"))).token == new_token
+
+
+def test_token_provider_replaces_rejected_cached_session(cache):
+    """Test that a rejected token is removed from the cache and a new session stored"""
+    auth = TSC.TableauAuth("alice", "password")
+    token = cache.sign_in(_server(), auth)
+    server = _server()
+    provider = TokenProvider(server, auth, token_cache=cache)
+
+    assert provider.get_token() == token and server.sign_ins == []
+    new_token = provider.refresh(token)
+    assert new_token != token and len(server.sign_ins) == 1
+    assert cache.get(_server(), auth).token == new_token == server.auth_token
+
+
+def test_client_signs_in_through_token_cache(cache):
+    """Test that a client reuses a cached session for a server that is not signed in"""
+    auth = TSC.TableauAuth("alice", "password")
+    token = cache.sign_in(_server(), auth)
+    server = _server()
+
+    client = VizQLDataServiceClient("http://localhost", server, auth, token_cache=cache)
+
+    assert client.client.token == token and server.sign_ins == []